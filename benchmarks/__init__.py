@@ -0,0 +1,7 @@
+"""
+Offline-Benchmarks und Werkzeuge (lokaler Swisspost Mock-Server, Lastgenerator)
+
+Alle Werkzeuge laufen ohne echte Swisspost Credentials gegen den Mock-Server:
+
+    python -m benchmarks.mock_swisspost_api --port 8089
+"""
@@ -0,0 +1,165 @@
+"""
+Gemeinsame Helfer der Benchmarks: Module laden, Szenarien, Statistik, Ergebnisdateien
+"""
+
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AGENT_FILE = os.path.join(PROJECT_ROOT, "smart-address-agent.py")
+PROXY_FILE = os.path.join(PROJECT_ROOT, "n8n-workflows", "http-proxy.py")
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Korrekturpfade von validate_smart mit Adressen aus den Mock-Fixtures
+# (Eingabe, erwartete Qualität des Endergebnisses)
+SCENARIOS: Dict[str, List[Dict[str, Any]]] = {
+    "certified": [
+        {"address": {"street": "Bahnhofstrasse 1", "city": "Zürich", "postcode": "8001"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Kramgasse 10", "city": "Bern", "postcode": "3011"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Via Nassa 5", "city": "Lugano", "postcode": "6900"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Rue de Bourg 3", "city": "Lausanne", "postcode": "1003"}, "expected": "CERTIFIED"},
+    ],
+    "swapped_plz_city": [
+        {"address": {"street": "Kramgasse 10", "city": "3011", "postcode": "Bern"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Pilatusstrasse 4", "city": "6003", "postcode": "Luzern"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Rue du Seyon 8", "city": "2000", "postcode": "Neuchâtel"}, "expected": "CERTIFIED"},
+    ],
+    "wrong_street": [
+        {"address": {"street": "Limatquai 3", "city": "Zürich", "postcode": "8001"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Stauffacherstr 20", "city": "Zürich", "postcode": "8004"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Bahnhofstr. 5", "city": "Zürich", "postcode": "8001"}, "expected": "CERTIFIED"},
+    ],
+    "unknown_city": [
+        {"address": {"street": "Rennweg 7", "city": "Zurch", "postcode": "8001"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Rue de Bourg 3", "city": "Lozanne", "postcode": "1003"}, "expected": "CERTIFIED"},
+        {"address": {"street": "Via Nassa 5", "city": "Lugan", "postcode": "6900"}, "expected": "CERTIFIED"},
+    ],
+    "usable": [
+        {"address": {"street": "Bahnhofstrasse 999", "city": "Zürich", "postcode": "8001"}, "expected": "USABLE"},
+        {"address": {"street": "Kramgasse 500", "city": "Bern", "postcode": "3011"}, "expected": "USABLE"},
+    ],
+}
+
+
+def load_module(name: str, path: str):
+    """Lädt ein Modul aus einer Datei (die Skripte haben Bindestriche im Namen)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_agent_module():
+    return load_module("smart_address_agent", AGENT_FILE)
+
+
+def load_proxy_module():
+    return load_module("swisspost_http_proxy", PROXY_FILE)
+
+
+def all_addresses() -> List[Dict[str, Any]]:
+    return [case["address"] for cases in SCENARIOS.values() for case in cases]
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Perzentil mit linearer Interpolation (Werte bereits sortiert)"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * p / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99, Mittelwert und Extremwerte in Millisekunden"""
+    values = sorted(samples_ms)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "min": round(values[0], 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Metadaten, damit Ergebnisdateien vergleichbar bleiben"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def default_output(prefix: str) -> str:
+    return os.path.join(RESULTS_DIR, f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+
+def write_results(path: str, payload: Dict[str, Any]) -> str:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return path
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_metrics(baseline: Dict[str, float], current: Dict[str, float],
+                    threshold: float, higher_is_better: Callable[[str], bool] = lambda name: False) -> List[str]:
+    """
+    Vergleicht flache Kennzahlen (Name -> Wert) und liefert die Regressionen
+    über `threshold` (relativ, z.B. 0.15 = 15 %). `higher_is_better(name)`
+    markiert Kennzahlen wie Durchsatz, bei denen ein Rückgang die Regression ist.
+    """
+    regressions = []
+    for name, old in sorted(baseline.items()):
+        new = current.get(name)
+        if new is None or not old:
+            continue
+        change = (old - new) / old if higher_is_better(name) else (new - old) / old
+        if change > threshold:
+            regressions.append(f"{name}: {old:g} -> {new:g} ({change:+.1%})")
+    return regressions
+
+
+def quiet_logging(level: str = "WARNING") -> None:
+    """Agent/Proxy-Logs während der Messung reduzieren (vor dem Laden der Module aufrufen)"""
+    os.environ.setdefault("SWISSPOST_LOG_LEVEL", level)
+
+
+def serve_proxy_in_background(proxy_module, host: str = "127.0.0.1", port: int = 0):
+    """Startet den HTTP Proxy in einem Hintergrund-Thread und liefert (server, base_url)"""
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), proxy_module.SwisspostHTTPHandler)
+    thread = threading.Thread(target=server.serve_forever, name="proxy-under-test", daemon=True)
+    thread.start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}"
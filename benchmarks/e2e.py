@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+End-to-End Benchmark für validate_smart, das MCP Tool und den HTTP Proxy
+
+Läuft vollständig gegen den lokalen Swisspost Mock-Server und misst:
+- Latenz (p50/p95/p99) pro Korrekturpfad (certified, swapped_plz_city,
+  wrong_street, unknown_city, usable) inkl. Upstream-Aufrufe pro Adresse
+- Durchsatz unter Parallelität für das MCP Tool (call_tool Handler) und
+  für POST /validate des HTTP Proxys
+
+Ergebnisse werden als JSON geschrieben (Standard: benchmarks/results/) und
+können mit --compare gegen eine frühere Datei geprüft werden:
+
+    python -m benchmarks.e2e --latency-ms 30 --jitter-ms 10
+    python -m benchmarks.e2e --compare benchmarks/results/e2e-baseline.json --max-regression 0.15
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks import common
+from benchmarks.mock_swisspost_api import FaultProfile, MockSwisspostServer
+
+TOOL_NAME = "validate_address_smart"
+
+
+def _upstream_total(stats: Dict[str, Dict[str, int]]) -> int:
+    return sum(values.get("requests", 0) for endpoint, values in stats.items() if endpoint != "oauth")
+
+
+async def bench_paths(agent, iterations: int, warm_cache: bool) -> Dict[str, Any]:
+    """Latenz und Upstream-Aufrufe pro Korrekturpfad (sequentiell)"""
+    from swisspost_mcp.cache import AUTOCOMPLETE_CACHE
+
+    results: Dict[str, Any] = {}
+    for name, cases in common.SCENARIOS.items():
+        latencies: List[float] = []
+        upstream_calls: List[int] = []
+        mismatches = 0
+        for _ in range(iterations):
+            for case in cases:
+                if not warm_cache:
+                    AUTOCOMPLETE_CACHE.clear()
+                started = time.perf_counter()
+                result = await agent.validate_smart(dict(case["address"], debug_timing=True))
+                latencies.append((time.perf_counter() - started) * 1000.0)
+                upstream_calls.append(result.get("trace", {}).get("upstream_calls", 0))
+                if result.get("quality") != case["expected"]:
+                    mismatches += 1
+        results[name] = {
+            "latency_ms": common.summarize(latencies),
+            "upstream_calls": {
+                "mean": round(sum(upstream_calls) / len(upstream_calls), 3),
+                "max": max(upstream_calls),
+            },
+            "quality_mismatches": mismatches,
+        }
+    return results
+
+
+async def bench_mcp_throughput(agent, mock: MockSwisspostServer, concurrency: int, requests: int) -> Dict[str, Any]:
+    """Durchsatz über den registrierten call_tool Handler (inkl. Serialisierung)"""
+    from mcp import types
+
+    handler = agent.server.request_handlers[types.CallToolRequest]
+    addresses = common.all_addresses()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(index: int) -> None:
+        nonlocal errors
+        request = types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(name=TOOL_NAME, arguments=dict(addresses[index % len(addresses)])),
+        )
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await handler(request)
+                if getattr(response.root, "isError", False):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    mock.reset_stats()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return _throughput_result(concurrency, requests, elapsed, latencies, errors, mock)
+
+
+async def bench_proxy_throughput(base_url: str, mock: MockSwisspostServer, concurrency: int, requests: int) -> Dict[str, Any]:
+    """Durchsatz von POST /validate über HTTP"""
+    import httpx
+
+    addresses = common.all_addresses()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        async def one(index: int) -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/validate", json=addresses[index % len(addresses)])
+                    if response.status_code != 200 or not response.json().get("success"):
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000.0)
+
+        mock.reset_stats()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+    return _throughput_result(concurrency, requests, elapsed, latencies, errors, mock)
+
+
+def _throughput_result(concurrency: int, requests: int, elapsed: float, latencies: List[float],
+                       errors: int, mock: MockSwisspostServer) -> Dict[str, Any]:
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(requests / elapsed, 2) if elapsed > 0 else 0.0,
+        "errors": errors,
+        "latency_ms": common.summarize(latencies),
+        "upstream_calls_per_address": round(_upstream_total(mock.stats()) / requests, 3),
+    }
+
+
+def flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    """Kennzahlen für --compare (Latenz: niedriger ist besser, rps: höher ist besser)"""
+    flat: Dict[str, float] = {}
+    for name, path in results.get("paths", {}).items():
+        for key in ("p50", "p95", "p99"):
+            flat[f"paths.{name}.{key}"] = path["latency_ms"][key]
+        flat[f"paths.{name}.upstream_calls"] = path["upstream_calls"]["mean"]
+    for target, runs in results.get("throughput", {}).items():
+        for run in runs:
+            prefix = f"throughput.{target}.c{run['concurrency']}"
+            flat[prefix + ".rps"] = run["rps"]
+            flat[prefix + ".p95"] = run["latency_ms"].get("p95", 0.0)
+    return flat
+
+
+def print_summary(results: Dict[str, Any]) -> None:
+    print("\nKorrekturpfade (ms, Upstream-Aufrufe pro Adresse)")
+    for name, path in results["paths"].items():
+        latency = path["latency_ms"]
+        print(f"  {name:<18} p50={latency['p50']:>8.2f} p95={latency['p95']:>8.2f} p99={latency['p99']:>8.2f}"
+              f"  calls={path['upstream_calls']['mean']:>5.2f}  mismatches={path['quality_mismatches']}")
+    for target, runs in results["throughput"].items():
+        print(f"\nDurchsatz {target}")
+        for run in runs:
+            latency = run["latency_ms"]
+            print(f"  c={run['concurrency']:<4} rps={run['rps']:>8.2f} p95={latency.get('p95', 0):>8.2f}"
+                  f" errors={run['errors']} calls/addr={run['upstream_calls_per_address']}")
+
+
+async def run(args: argparse.Namespace, mock: MockSwisspostServer) -> Dict[str, Any]:
+    agent_module = common.load_agent_module()
+    agent = agent_module.SmartAddressAgent()
+
+    results: Dict[str, Any] = {"paths": await bench_paths(agent, args.iterations, args.warm_cache), "throughput": {}}
+
+    results["throughput"]["mcp_tool"] = [
+        await bench_mcp_throughput(agent, mock, concurrency, args.requests) for concurrency in args.concurrency
+    ]
+
+    if not args.skip_proxy:
+        proxy_module = common.load_proxy_module()
+        server, base_url = common.serve_proxy_in_background(proxy_module)
+        try:
+            results["throughput"]["proxy_validate"] = [
+                await bench_proxy_throughput(base_url, mock, concurrency, args.requests) for concurrency in args.concurrency
+            ]
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="End-to-End Benchmark gegen den Swisspost Mock-Server")
+    parser.add_argument("--iterations", type=int, default=20, help="Wiederholungen pro Szenario-Adresse")
+    parser.add_argument("--requests", type=int, default=200, help="Anfragen pro Durchsatz-Messung")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulierte Upstream-Latenz")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Autocomplete-Cache zwischen den Pfad-Messungen nicht leeren")
+    parser.add_argument("--skip-proxy", action="store_true", help="Proxy-Durchsatz nicht messen")
+    parser.add_argument("--output", default=None, help="Ergebnisdatei (Standard: benchmarks/results/e2e-<zeit>.json)")
+    parser.add_argument("--compare", default=None, help="Frühere Ergebnisdatei zum Vergleich")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Erlaubte relative Verschlechterung bei --compare (Exit-Code 1 darüber)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    common.quiet_logging()
+
+    faults = FaultProfile(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    mock = MockSwisspostServer(faults=faults).start()
+    os.environ.update(mock.env())
+    try:
+        results = asyncio.run(run(args, mock))
+    finally:
+        mock.stop()
+
+    payload = {
+        "benchmark": "e2e",
+        "environment": common.environment_info(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+        "metrics": flatten(results),
+    }
+    path = common.write_results(args.output or common.default_output("e2e"), payload)
+    print_summary(results)
+    print(f"\nErgebnisse: {path}")
+
+    if args.compare:
+        baseline = common.load_results(args.compare)
+        regressions = common.compare_metrics(baseline.get("metrics", {}), payload["metrics"], args.max_regression,
+                                             higher_is_better=lambda name: name.endswith(".rps"))
+        if regressions:
+            print(f"\nRegressionen gegenüber {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nKeine Regression über {args.max_regression:.0%} gegenüber {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Lastgenerator und Traffic-Replay für den HTTP Proxy (POST /validate)
+
+Quellen:
+- synthetisch: Adressen aus den Benchmark-Szenarien mit wählbarer Gewichtung (--mix)
+- Replay: NDJSON-Datei (--replay) mit einer Adresse pro Zeile oder JSON-Logzeilen
+  des Proxys (SWISSPOST_LOG_FORMAT=json, Meldung "Adressvalidierung"); mit
+  --replay-timing werden die ursprünglichen Abstände (Feld "ts") nachgespielt
+
+Modi:
+- closed-loop (--concurrency): N Clients senden jeweils nach Erhalt der Antwort erneut
+- open-loop (--rps): Anfragen starten nach Fahrplan (Poisson oder konstant),
+  unabhängig von laufenden Antworten; die Latenz wird ab dem geplanten
+  Startzeitpunkt gemessen (keine "coordinated omission")
+
+Mit mehreren Stufen (--steps) wird die Last schrittweise erhöht und der
+Sättigungspunkt bestimmt (erreichter Durchsatz < 90 % des Ziels, p99 über --slo-ms
+oder Fehlerrate über --max-error-rate).
+
+    python -m benchmarks.loadgen --url http://localhost:3000 --rps 5 --duration 30
+    python -m benchmarks.loadgen --spawn --mode open --steps 2 4 8 16 --duration 20
+    python -m benchmarks.loadgen --replay requests.ndjson --replay-timing --replay-speed 2
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from benchmarks import common
+
+DEFAULT_URL = os.getenv("MCP_PROXY_URL", "http://localhost:3000")
+REPLAY_FIELDS = ("street", "street2", "city", "postcode", "firstname", "lastname", "company")
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'certified=0.6,wrong_street=0.2' -> Gewichte pro Szenario"""
+    weights = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in common.SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unbekanntes Szenario: {name} ({', '.join(common.SCENARIOS)})")
+        weights[name] = float(weight or 1.0)
+    return weights
+
+
+def synthetic_source(mix: Dict[str, float], seed: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    names = list(mix) or list(common.SCENARIOS)
+    weights = [mix.get(name, 1.0) for name in names]
+    while True:
+        case = rng.choice(common.SCENARIOS[rng.choices(names, weights)[0]])
+        yield {"body": dict(case["address"])}
+
+
+def load_replay(path: str) -> List[Dict[str, Any]]:
+    """Liest Adressen oder Proxy-Logzeilen; liefert [{"body": ..., "ts": ...}]"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "msg" in record and record.get("msg") != "Adressvalidierung":
+                continue
+            body = record.get("body") if isinstance(record.get("body"), dict) else {
+                key: record[key] for key in REPLAY_FIELDS if record.get(key)
+            }
+            if body:
+                entries.append({"body": body, "ts": record.get("ts")})
+    if not entries:
+        raise SystemExit(f"Keine Anfragen in {path} gefunden")
+    return entries
+
+
+class StepResult:
+    """Messwerte einer Laststufe"""
+
+    def __init__(self, mode: str, target: float, duration: float):
+        self.mode = mode
+        self.target = target
+        self.duration = duration
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.sent = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.dropped = 0
+        self.elapsed = 0.0
+
+    def started(self) -> None:
+        self.sent += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finished(self, latency_ms: float, error: Optional[str]) -> None:
+        self.in_flight -= 1
+        self.latencies.append(latency_ms)
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        completed = len(self.latencies)
+        failed = sum(self.errors.values())
+        return {
+            "mode": self.mode,
+            "target": self.target,
+            "duration_s": round(self.elapsed, 3),
+            "sent": self.sent,
+            "completed": completed,
+            "dropped": self.dropped,
+            "achieved_rps": round(completed / self.elapsed, 2) if self.elapsed else 0.0,
+            "error_rate": round(failed / completed, 4) if completed else 0.0,
+            "errors": dict(self.errors),
+            "max_in_flight": self.max_in_flight,
+            "latency_ms": common.summarize(self.latencies),
+        }
+
+
+async def _send(client, body: Dict[str, Any], scheduled: float, result: StepResult, headers: Dict[str, str]) -> None:
+    import httpx
+
+    result.started()
+    error = None
+    try:
+        response = await client.post("/validate", json=body, headers=headers)
+        if response.status_code != 200:
+            error = f"http_{response.status_code}"
+        elif not response.json().get("success", False):
+            error = "unsuccessful"
+    except httpx.TimeoutException:
+        error = "timeout"
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    result.finished((time.perf_counter() - scheduled) * 1000.0, error)
+
+
+async def run_closed_loop(client, source: Iterator[Dict[str, Any]], concurrency: int, duration: float,
+                          headers: Dict[str, str]) -> StepResult:
+    result = StepResult("closed", concurrency, duration)
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            await _send(client, next(source)["body"], time.perf_counter(), result, headers)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def run_open_loop(client, source: Iterator[Dict[str, Any]], rps: float, duration: float,
+                        headers: Dict[str, str], arrivals: str, max_in_flight: int, seed: int,
+                        replay_timing: bool = False, replay_speed: float = 1.0) -> StepResult:
+    result = StepResult("replay" if replay_timing else "open", rps, duration)
+    rng = random.Random(seed)
+    tasks = set()
+    started = time.perf_counter()
+    next_at = started
+    previous_ts: Optional[float] = None
+
+    while next_at - started < duration:
+        entry = next(source)
+        if replay_timing and entry.get("ts") is not None:
+            if previous_ts is not None:
+                next_at += max(0.0, float(entry["ts"]) - previous_ts) / replay_speed
+            previous_ts = float(entry["ts"])
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if result.in_flight >= max_in_flight:
+            # Client-seitige Sättigung: Anfrage verwerfen statt den Fahrplan zu verschieben
+            result.dropped += 1
+        else:
+            task = asyncio.ensure_future(_send(client, entry["body"], next_at, result, headers))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if not (replay_timing and entry.get("ts") is not None):
+            next_at += rng.expovariate(rps) if arrivals == "poisson" else 1.0 / rps
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def is_saturated(step: Dict[str, Any], slo_ms: float, max_error_rate: float) -> Optional[str]:
+    if step["mode"] == "open" and step["achieved_rps"] < 0.9 * step["target"]:
+        return f"Durchsatz {step['achieved_rps']} < 90 % von {step['target']} rps"
+    if step["latency_ms"].get("p99", 0.0) > slo_ms:
+        return f"p99 {step['latency_ms']['p99']} ms > SLO {slo_ms} ms"
+    if step["error_rate"] > max_error_rate:
+        return f"Fehlerrate {step['error_rate']:.2%} > {max_error_rate:.2%}"
+    return None
+
+
+async def run(args: argparse.Namespace, base_url: str) -> List[Dict[str, Any]]:
+    import httpx
+
+    if args.replay:
+        entries = load_replay(args.replay)
+        source: Iterator[Dict[str, Any]] = itertools.cycle(entries)
+    else:
+        source = synthetic_source(args.mix, args.seed)
+
+    headers = {"X-Response-Profile": args.profile} if args.profile else {}
+    steps = args.steps or [args.rps if args.mode == "open" else args.concurrency]
+    limit = max(int(max(steps)) * 2, args.max_in_flight)
+    limits = httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+
+    reports = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        for index, target in enumerate(steps):
+            if args.mode == "open":
+                step = await run_open_loop(client, source, float(target), args.duration, headers, args.arrivals,
+                                           args.max_in_flight, args.seed + index, args.replay_timing, args.replay_speed)
+            else:
+                step = await run_closed_loop(client, source, int(target), args.duration, headers)
+            report = step.to_dict()
+            report["saturated"] = is_saturated(report, args.slo_ms, args.max_error_rate)
+            reports.append(report)
+            latency = report["latency_ms"]
+            print(f"{args.mode:<6} target={target:<6g} rps={report['achieved_rps']:>7.2f} "
+                  f"p50={latency.get('p50', 0):>8.1f} p95={latency.get('p95', 0):>8.1f} p99={latency.get('p99', 0):>8.1f} "
+                  f"errors={report['error_rate']:.2%} in_flight<={report['max_in_flight']}"
+                  + (f"  GESÄTTIGT: {report['saturated']}" if report["saturated"] else ""))
+            if report["saturated"] and args.stop_at_saturation:
+                break
+    return reports
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Lastgenerator für POST /validate des HTTP Proxys")
+    parser.add_argument("--url", default=DEFAULT_URL, help="Basis-URL des Proxys (Standard: MCP_PROXY_URL)")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Mock-Server und Proxy im selben Prozess starten (ignoriert --url)")
+    parser.add_argument("--mock-latency-ms", type=float, default=20.0, help="Upstream-Latenz des Mocks bei --spawn")
+    parser.add_argument("--mode", choices=("open", "closed"), default="open")
+    parser.add_argument("--rps", type=float, default=5.0, help="Ziel-Anfragen pro Sekunde (open-loop)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallele Clients (closed-loop)")
+    parser.add_argument("--steps", type=float, nargs="+", default=None,
+                        help="Laststufen (rps bzw. Clients) für die Sättigungssuche")
+    parser.add_argument("--duration", type=float, default=30.0, help="Dauer pro Stufe in Sekunden")
+    parser.add_argument("--arrivals", choices=("poisson", "constant"), default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Obergrenze offener Anfragen (open-loop)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--mix", type=parse_mix, default={}, help="Szenario-Gewichte, z.B. certified=0.6,usable=0.1")
+    parser.add_argument("--replay", default=None, help="NDJSON mit Adressen oder Proxy-JSON-Logs")
+    parser.add_argument("--replay-timing", action="store_true", help="Ursprüngliche Abstände (Feld ts) nachspielen")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Zeitraffer-Faktor für --replay-timing")
+    parser.add_argument("--profile", default=None, help="X-Response-Profile Header")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p99-Grenze für die Sättigung")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--stop-at-saturation", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Ergebnisdatei (Standard: benchmarks/results/loadgen-<zeit>.json)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    mock = server = None
+    base_url = args.url.rstrip("/")
+    if args.spawn:
+        from benchmarks.mock_swisspost_api import FaultProfile, MockSwisspostServer
+
+        common.quiet_logging()
+        mock = MockSwisspostServer(faults=FaultProfile(latency_ms=args.mock_latency_ms, seed=args.seed)).start()
+        os.environ.update(mock.env())
+        server, base_url = common.serve_proxy_in_background(common.load_proxy_module())
+
+    try:
+        steps = asyncio.run(run(args, base_url))
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if mock is not None:
+            mock.stop()
+
+    saturation = next((step for step in steps if step["saturated"]), None)
+    payload = {
+        "benchmark": "loadgen",
+        "environment": common.environment_info(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "target_url": base_url,
+        "steps": steps,
+        "saturation_point": {"target": saturation["target"], "reason": saturation["saturated"]} if saturation else None,
+    }
+    path = common.write_results(args.output or common.default_output("loadgen"), payload)
+    print(f"\nErgebnisse: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
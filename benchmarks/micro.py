@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmark der AddressAnalyzer Hot-Path-Funktionen
+
+Misst ns/op und Speicher-Allokationen für normalize_street,
+expand_street_abbreviations, normalize_company_legal_forms, normalize_string
+und similarity_score auf einem generierten Korpus (DE/FR/IT, mit Tippfehlern,
+Abkürzungen, vertauschten Hausnummern und Rechtsformen in beliebiger Schreibweise).
+
+Äquivalenz-Check: Mit --candidate wird eine alternative Implementierung
+(Modul:Klasse mit denselben statischen Methoden) auf dem ganzen Korpus gegen
+die aktuelle AddressAnalyzer geprüft und mitgemessen. Zusätzlich enthält jede
+Ergebnisdatei einen Digest der Ausgaben pro Funktion; --compare meldet
+abweichende Digests (Verhaltensänderung) und Laufzeit-Regressionen.
+
+    python -m benchmarks.micro --size 5000
+    python -m benchmarks.micro --candidate my_module:FastAddressAnalyzer
+    python -m benchmarks.micro --compare benchmarks/results/micro-baseline.json
+"""
+
+import argparse
+import gc
+import hashlib
+import importlib
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks import common
+
+STREETS_DE = ["Bahnhofstrasse", "Hauptstrasse", "Pfingstweidstrasse", "Seestrasse", "Kirchweg", "Dorfstrasse",
+              "Schulhausstrasse", "Marktgasse", "Kramgasse", "Löwenstrasse", "Mühlemattstrasse", "Zürcherstrasse",
+              "Rosenbergstrasse", "Bergstrasse", "Lindenallee", "Seepromenade", "Industriestrasse"]
+STREETS_FR = ["Rue du Grand-Pré", "Avenue de la Gare", "Rue du Mont-Blanc", "Boulevard James-Fazy", "Chemin de Mornex",
+              "Route de Genève", "Rue de Lausanne", "Place du Molard", "Rue du Rhône", "Faubourg de l'Hôpital",
+              "Chemin des Vignes", "Avenue de Béthusy"]
+STREETS_IT = ["Via Nassa", "Corso Pestalozzi", "Via Pessina", "Piazza della Riforma", "Viale Carlo Cattaneo",
+              "Via della Pace", "Piazza Grande", "Via Cittadella", "Largo Zorzi", "Vicolo dei Nobili", "Viale Stazione"]
+CITIES = ["Zürich", "Genève", "Neuchâtel", "Lugano", "Bern", "Biel/Bienne", "St. Gallen", "Delémont", "Locarno",
+          "Yverdon-les-Bains", "Münchenstein", "Bellinzona", "Lausanne", "Fribourg", "Thônex", "Küsnacht"]
+COMPANIES = ["Muster", "Rossi Costruzioni", "Boulangerie du Lac", "Alpen Treuhand", "Ticino Logistica", "Helvetia Bau",
+             "Garage Central", "Studio Bianchi", "Weber & Söhne", "Atelier Dupont"]
+LEGAL_FORMS = ["AG", "GmbH", "SA", "Sàrl", "SAGL", "S.r.l.", "S.p.A.", "KG", "GmbH & Co. KG", "Coop", "e.V.", "Ltd", "SE"]
+
+# Abkürzungen, wie sie in Eingaben vorkommen (DE/FR/IT)
+ABBREVIATIONS = [("strasse", "str."), ("Strasse", "Str."), ("weg", "wg."), ("allee", "all."), ("promenade", "prom."),
+                 ("gasse", "g."), ("Avenue", "av."), ("Boulevard", "bd."), ("Chemin", "ch."), ("Route", "rt."),
+                 ("Corso", "c.so"), ("Piazza", "p.za"), ("Largo", "l.go"), ("Vicolo", "vic."), ("Viale", "vl."),
+                 ("Via", "v.")]
+
+FUNCTIONS = ("normalize_street", "expand_street_abbreviations", "normalize_company_legal_forms",
+             "normalize_string", "similarity_score")
+
+
+def _typo(rng: random.Random, text: str) -> str:
+    """Ein zufälliger Tippfehler: vertauschen, auslassen, verdoppeln, Diakritika weg, Gross/Klein"""
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 2)
+    kind = rng.randrange(6)
+    if kind == 0:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    if kind == 1:
+        return text[:i] + text[i + 1:]
+    if kind == 2:
+        return text[:i] + text[i] + text[i:]
+    if kind == 3:
+        return text.translate(str.maketrans("äöüéèêàâôûç", "aoueeeaaouc"))
+    if kind == 4:
+        return text.lower()
+    return text.upper()
+
+
+def _abbreviate(rng: random.Random, street: str) -> str:
+    candidates = [(full, short) for full, short in ABBREVIATIONS if full in street]
+    if not candidates:
+        return street
+    full, short = rng.choice(candidates)
+    return street.replace(full, short.lower() if rng.random() < 0.7 else short, 1)
+
+
+def _house_number(rng: random.Random) -> str:
+    number = str(rng.randint(1, 250))
+    roll = rng.random()
+    if roll < 0.15:
+        return number + rng.choice("abc")
+    if roll < 0.22:
+        return f"{number}-{int(number) + 2}"
+    if roll < 0.26:
+        return f"{number}/{rng.randint(1, 9)}"
+    return number
+
+
+def _street_input(rng: random.Random, street: str) -> str:
+    if rng.random() < 0.35:
+        street = _abbreviate(rng, street)
+    if rng.random() < 0.3:
+        street = _typo(rng, street)
+    number = _house_number(rng)
+    layout = rng.random()
+    if layout < 0.6:
+        return f"{street} {number}"
+    if layout < 0.75:
+        return f"{number} {street}"
+    if layout < 0.85:
+        return f"{number}, {street}"
+    if layout < 0.93:
+        return f"{street}{number}"
+    return f"  {street}  "
+
+
+def generate_corpus(size: int, seed: int = 1) -> Dict[str, List[Any]]:
+    """Reproduzierbarer Korpus; Sprachverteilung etwa DE 60 %, FR 25 %, IT 15 %"""
+    rng = random.Random(seed)
+    streets, companies, strings, pairs = [], [], [], []
+    for _ in range(size):
+        roll = rng.random()
+        pool = STREETS_DE if roll < 0.6 else STREETS_FR if roll < 0.85 else STREETS_IT
+        canonical = rng.choice(pool)
+        streets.append(_street_input(rng, canonical))
+
+        company = rng.choice(COMPANIES) + " " + rng.choice(LEGAL_FORMS)
+        companies.append(rng.choice((str.lower, str.upper, str, str.title))(company))
+
+        city = rng.choice(CITIES)
+        typed = _typo(rng, city) if rng.random() < 0.5 else city
+        strings.append(typed)
+        pairs.append((typed, city if rng.random() < 0.7 else rng.choice(CITIES)))
+        if rng.random() < 0.3:
+            pairs.append((_typo(rng, canonical), canonical))
+    return {
+        "normalize_street": streets,
+        "expand_street_abbreviations": [s.lower() if rng.random() < 0.5 else s for s in streets],
+        "normalize_company_legal_forms": companies,
+        "normalize_string": strings,
+        "similarity_score": pairs,
+    }
+
+
+def _caller(implementation: Any, name: str) -> Callable[[Any], Any]:
+    function = getattr(implementation, name)
+    if name == "similarity_score":
+        return lambda pair: function(pair[0], pair[1])
+    return function
+
+
+def digest(outputs: Sequence[Any]) -> str:
+    h = hashlib.sha1()
+    for value in outputs:
+        h.update(repr(value).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def measure(call: Callable[[Any], Any], inputs: Sequence[Any], repeat: int) -> Dict[str, float]:
+    """ns/op (bester und medianer Durchlauf) und Allokationen pro Aufruf"""
+    for value in inputs[: min(len(inputs), 200)]:
+        call(value)  # Warm-up (Regex-Cache, Lazy-Imports)
+
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter_ns()
+            for value in inputs:
+                call(value)
+            timings.append((time.perf_counter_ns() - started) / len(inputs))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    timings.sort()
+
+    # Allokationen: Spitzenbedarf pro Aufruf (tracemalloc) und verbleibende Blöcke
+    sample = inputs[: min(len(inputs), 1000)]
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        blocks_before = sys.getallocatedblocks()
+        for value in sample:
+            before, _ = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            call(value)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += max(0, peak - before)
+        retained_blocks = sys.getallocatedblocks() - blocks_before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ns_per_op": round(timings[0], 1),
+        "ns_per_op_median": round(timings[len(timings) // 2], 1),
+        "peak_alloc_bytes_per_op": round(peak_total / len(sample), 1),
+        "retained_blocks_per_op": round(retained_blocks / len(sample), 3),
+    }
+
+
+def check_equivalence(reference: Any, candidate: Any, corpus: Dict[str, List[Any]],
+                      functions: Sequence[str], max_examples: int = 5) -> Dict[str, Dict[str, Any]]:
+    """Vergleicht die Ausgaben von Referenz und Kandidat auf dem ganzen Korpus"""
+    report = {}
+    for name in functions:
+        ref_call, cand_call = _caller(reference, name), _caller(candidate, name)
+        mismatches: List[Tuple[Any, Any, Any]] = []
+        count = 0
+        for value in corpus[name]:
+            expected, actual = ref_call(value), cand_call(value)
+            if expected != actual:
+                count += 1
+                if len(mismatches) < max_examples:
+                    mismatches.append((value, expected, actual))
+        report[name] = {"mismatches": count, "examples": [
+            {"input": value, "expected": expected, "actual": actual} for value, expected, actual in mismatches
+        ]}
+    return report
+
+
+def load_candidate(spec: str) -> Any:
+    module_name, _, attribute = spec.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute) if attribute else module
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Micro-Benchmark der AddressAnalyzer Funktionen")
+    parser.add_argument("--size", type=int, default=5000, help="Anzahl generierter Adressen")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=7, help="Messdurchläufe pro Funktion")
+    parser.add_argument("--functions", nargs="+", default=list(FUNCTIONS), choices=FUNCTIONS)
+    parser.add_argument("--candidate", default=None,
+                        help="Alternative Implementierung als modul:Klasse (Äquivalenz-Check + Messung)")
+    parser.add_argument("--output", default=None, help="Ergebnisdatei (Standard: benchmarks/results/micro-<zeit>.json)")
+    parser.add_argument("--compare", default=None, help="Frühere Ergebnisdatei zum Vergleich")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    common.quiet_logging()
+    reference = common.load_agent_module().AddressAnalyzer
+    corpus = generate_corpus(args.size, args.seed)
+
+    results: Dict[str, Any] = {}
+    for name in args.functions:
+        call = _caller(reference, name)
+        inputs = corpus[name]
+        entry = measure(call, inputs, args.repeat)
+        entry["inputs"] = len(inputs)
+        entry["output_digest"] = digest([call(value) for value in inputs])
+        results[name] = entry
+        print(f"{name:<32} {entry['ns_per_op']:>10.0f} ns/op  {entry['peak_alloc_bytes_per_op']:>8.0f} B/op"
+              f"  retained={entry['retained_blocks_per_op']}")
+
+    exit_code = 0
+    payload: Dict[str, Any] = {
+        "benchmark": "micro",
+        "environment": common.environment_info(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+        "metrics": {f"{name}.ns_per_op": entry["ns_per_op"] for name, entry in results.items()},
+    }
+
+    if args.candidate:
+        candidate = load_candidate(args.candidate)
+        equivalence = check_equivalence(reference, candidate, corpus, args.functions)
+        candidate_results = {}
+        print(f"\nKandidat {args.candidate}")
+        for name in args.functions:
+            entry = measure(_caller(candidate, name), corpus[name], args.repeat)
+            entry["speedup"] = round(results[name]["ns_per_op"] / entry["ns_per_op"], 2) if entry["ns_per_op"] else None
+            entry["mismatches"] = equivalence[name]["mismatches"]
+            candidate_results[name] = entry
+            status = "OK" if entry["mismatches"] == 0 else f"{entry['mismatches']} ABWEICHUNGEN"
+            print(f"{name:<32} {entry['ns_per_op']:>10.0f} ns/op  x{entry['speedup']}  {status}")
+            for example in equivalence[name]["examples"]:
+                print(f"    {example['input']!r}: {example['expected']!r} != {example['actual']!r}")
+            if entry["mismatches"]:
+                exit_code = 1
+        payload["candidate"] = {"spec": args.candidate, "results": candidate_results, "equivalence": equivalence}
+
+    path = common.write_results(args.output or common.default_output("micro"), payload)
+    print(f"\nErgebnisse: {path}")
+
+    if args.compare:
+        baseline = common.load_results(args.compare)
+        changed = [name for name, entry in baseline.get("results", {}).items()
+                   if name in results and baseline.get("config", {}).get("size") == args.size
+                   and baseline.get("config", {}).get("seed") == args.seed
+                   and entry.get("output_digest") != results[name]["output_digest"]]
+        regressions = common.compare_metrics(baseline.get("metrics", {}), payload["metrics"], args.max_regression)
+        for name in changed:
+            print(f"Verhalten geändert (Output-Digest): {name}")
+        for line in regressions:
+            print(f"Regression: {line}")
+        if changed or regressions:
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Lokaler Swisspost API Mock-Server für reproduzierbare Offline-Benchmarks
+
+Stellt die von Agent und Proxy genutzten Endpoints bereit:
+- POST /OAuth/token
+- GET  /address/v1/zips, /address/v1/streets, /address/v1/houses
+- POST /address/v1/addresses/validation
+
+Antworten kommen aus einer Fixture-Datei: zuerst exakt aufgezeichnete
+Antworten ("recorded"), sonst aus den Stammdaten (zips/streets/houses)
+berechnet. Latenz, Jitter und Fehler lassen sich pro Lauf konfigurieren.
+
+Agent und Proxy auf den Mock umleiten:
+
+    python -m benchmarks.mock_swisspost_api --port 8089 --latency-ms 40 --jitter-ms 15
+    export SWISSPOST_API_BASE_URL=http://127.0.0.1:8089/address/v1
+    export SWISSPOST_OAUTH_TOKEN_URL=http://127.0.0.1:8089/OAuth/token
+
+Mit --record werden Anfragen an die echte API weitergeleitet und die
+Antworten in die Fixture-Datei übernommen (Credentials erforderlich).
+
+Zusätzliche Endpoints: GET /__stats (Aufrufe pro Endpoint), POST /__reset.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import unicodedata
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "swisspost_fixtures.json")
+API_PREFIX = "/address/v1"
+OAUTH_PATH = "/OAuth/token"
+ENDPOINTS = ("/zips", "/streets", "/houses", "/addresses/validation")
+
+REAL_OAUTH_TOKEN_URL = "https://api.post.ch/OAuth/token"
+REAL_API_BASE_URL = "https://dcapi.apis.post.ch/address/v1"
+
+
+def normalize(value: str) -> str:
+    """Kleinschreibung, ohne Diakritika, Leerzeichen vereinheitlicht"""
+    value = unicodedata.normalize("NFD", str(value or "").strip().lower())
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(value.split())
+
+
+def _overlap(a: str, b: str) -> float:
+    """Zeichen-Überschneidung wie AddressAnalyzer.similarity_score"""
+    a, b = a.replace(" ", ""), b.replace(" ", "")
+    if not a or not b:
+        return 0.0
+    freq: Dict[str, int] = {}
+    for c in b:
+        freq[c] = freq.get(c, 0) + 1
+    overlap = 0
+    for c in a:
+        if freq.get(c, 0) > 0:
+            freq[c] -= 1
+            overlap += 1
+    return overlap / max(len(a), len(b))
+
+
+def _expand_houses(spec: Any) -> List[str]:
+    if isinstance(spec, list):
+        return [str(h) for h in spec]
+    start, _, end = str(spec).partition("-")
+    return [str(n) for n in range(int(start), int(end or start) + 1)]
+
+
+class FixtureStore:
+    """Stammdaten und aufgezeichnete Antworten"""
+
+    def __init__(self, data: Dict[str, Any], path: Optional[str] = None):
+        self.path = path
+        self.data = data
+        self.recorded: Dict[str, Any] = data.setdefault("recorded", {})
+        self.zips: List[Dict[str, str]] = data.get("zips", [])
+        self.streets: Dict[str, List[str]] = data.get("streets", {})
+        self.houses: Dict[str, List[str]] = {key: _expand_houses(spec) for key, spec in data.get("houses", {}).items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_FIXTURES) -> "FixtureStore":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), path)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+            os.replace(tmp, self.path)
+
+    @staticmethod
+    def recorded_key(method: str, endpoint: str, query: Dict[str, str], body: bytes = b"") -> str:
+        if method == "POST":
+            try:
+                canonical = json.dumps(json.loads(body or b"{}"), sort_keys=True, ensure_ascii=False)
+            except ValueError:
+                canonical = body.decode("utf-8", "replace")
+            return f"POST {endpoint}#{hashlib.sha1(canonical.encode('utf-8')).hexdigest()}"
+        params = "&".join(f"{key}={value}" for key, value in sorted(query.items()))
+        return f"{method} {endpoint}?{params}"
+
+    def record(self, key: str, status: int, payload: Any) -> None:
+        with self._lock:
+            self.recorded[key] = {"status": status, "body": payload}
+
+    # --- Synthetische Antworten aus den Stammdaten ---------------------------
+
+    def search_zips(self, term: str) -> Dict[str, Any]:
+        term = str(term or "").strip()
+        if term.isdigit():
+            hits = [z for z in self.zips if z["zip"].startswith(term)]
+        else:
+            needle = normalize(term)
+            hits = [z for z in self.zips
+                    if needle and (normalize(z.get("city18", "")).startswith(needle)
+                                   or normalize(z.get("city27", "")).startswith(needle))]
+        return {"zips": hits[:20]}
+
+    def search_streets(self, zip_code: str, name: str) -> Dict[str, Any]:
+        candidates = self.streets.get(str(zip_code).strip(), [])
+        # Abkürzungen wie "Bahnhofstr." als Präfix behandeln
+        needle = normalize(name).rstrip(".")
+        if not needle:
+            return {"streets": []}
+        hits = [s for s in candidates if normalize(s).startswith(needle)]
+        if not hits:
+            # Tippfehler: beste Überschneidung ab 0.75
+            scored = sorted(((_overlap(needle, normalize(s)), s) for s in candidates), reverse=True)
+            hits = [s for score, s in scored if score >= 0.75][:1]
+        return {"streets": [{"name": s} for s in hits[:10]]}
+
+    def search_houses(self, zip_code: str, street: str, number: str) -> Dict[str, Any]:
+        canonical = self.canonical_street(zip_code, street)
+        if not canonical:
+            return {"houses": []}
+        houses = self.houses.get(f"{zip_code}|{canonical}", [])
+        prefix = normalize(number)
+        hits = [h for h in houses if normalize(h).startswith(prefix)] if prefix else houses
+        return {"houses": [{"number": h} for h in hits[:10]]}
+
+    def canonical_street(self, zip_code: str, street: str) -> Optional[str]:
+        needle = normalize(street)
+        for candidate in self.streets.get(str(zip_code).strip(), []):
+            if normalize(candidate) == needle:
+                return candidate
+        return None
+
+    def validate(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        location = body.get("geographicLocation", {})
+        house = location.get("house", {})
+        zip_block = location.get("zip", {})
+        zip_code = str(zip_block.get("zip", "")).strip()
+        city = zip_block.get("city", "")
+        street = house.get("street", "")
+        number = str(house.get("houseNumber", "")).strip()
+
+        entries = [z for z in self.zips if z["zip"] == zip_code]
+        city_match = next((z.get("city18") or z.get("city27") for z in entries
+                           if normalize(city) in (normalize(z.get("city18", "")), normalize(z.get("city27", "")))), None)
+        canonical = self.canonical_street(zip_code, street) if entries else None
+        house_ok = bool(canonical) and number in self.houses.get(f"{zip_code}|{canonical}", [])
+
+        if not entries:
+            quality = "UNUSABLE"
+        elif not canonical:
+            quality = "COMPROMISED" if city_match else "UNUSABLE"
+        elif not house_ok or not city_match:
+            quality = "USABLE"
+        else:
+            quality = "CERTIFIED"
+
+        return {
+            "quality": quality,
+            "address": {
+                "addressee": body.get("addressee", {}),
+                "geographicLocation": {
+                    "house": {"street": canonical or street, "houseNumber": number},
+                    "zip": {"zip": zip_code, "city": city_match or city},
+                },
+            },
+        }
+
+
+class FaultProfile:
+    """Latenz, Jitter und Fehlerinjektion"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 endpoint_latency_ms: Optional[Dict[str, float]] = None,
+                 error_rate: float = 0.0, error_status: int = 503,
+                 stall_rate: float = 0.0, stall_seconds: float = 20.0,
+                 token_ttl: int = 300, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.endpoint_latency_ms = endpoint_latency_ms or {}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.token_ttl = token_ttl
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay_seconds(self, endpoint: str) -> float:
+        base = self.endpoint_latency_ms.get(endpoint, self.latency_ms)
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, base + jitter) / 1000.0
+
+    def draw_fault(self) -> Optional[str]:
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.stall_rate:
+            return "stall"
+        if roll < self.stall_rate + self.error_rate:
+            return "error"
+        return None
+
+
+class MockSwisspostHandler(BaseHTTPRequestHandler):
+    """Request Handler; Zustand liegt am Server-Objekt (self.server)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _endpoint(self) -> Tuple[Optional[str], Dict[str, str]]:
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        if parts.path == OAUTH_PATH:
+            return "oauth", query
+        if parts.path.startswith(API_PREFIX):
+            endpoint = parts.path[len(API_PREFIX):]
+            if endpoint in ENDPOINTS:
+                return endpoint, query
+        return parts.path, query
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method: str) -> None:
+        server: "MockSwisspostServer" = self.server.mock  # type: ignore[attr-defined]
+        endpoint, query = self._endpoint()
+        body = self._read_body() if method == "POST" else b""
+
+        if endpoint == "/__stats" and method == "GET":
+            self._send(200, server.stats())
+            return
+        if endpoint == "/__reset" and method == "POST":
+            server.reset_stats()
+            self._send(200, {"status": "ok"})
+            return
+        if endpoint != "oauth" and endpoint not in ENDPOINTS:
+            self._send(404, {"error": "not found"})
+            return
+
+        server.count(endpoint)
+        faults = server.faults
+        time.sleep(faults.delay_seconds(endpoint))
+        fault = faults.draw_fault()
+        if fault == "stall":
+            time.sleep(faults.stall_seconds)
+        elif fault == "error":
+            server.count(endpoint, "errors")
+            self._send(faults.error_status, {"error": "injected fault"})
+            return
+
+        if server.record_upstream:
+            status, payload = server.forward(method, endpoint, query, body, self.headers)
+            self._send(status, payload)
+            return
+
+        if endpoint == "oauth":
+            self._send(200, server.issue_token())
+            return
+        if not str(self.headers.get("Authorization", "")).startswith("Bearer "):
+            self._send(401, {"error": "missing bearer token"})
+            return
+
+        store = server.fixtures
+        recorded = store.recorded.get(store.recorded_key(method, endpoint, query, body))
+        if recorded is not None:
+            self._send(recorded.get("status", 200), recorded.get("body"))
+            return
+
+        if endpoint == "/zips":
+            self._send(200, store.search_zips(query.get("zipCity", "")))
+        elif endpoint == "/streets":
+            self._send(200, store.search_streets(query.get("zip", ""), query.get("name", "")))
+        elif endpoint == "/houses":
+            self._send(200, store.search_houses(query.get("zip", ""), query.get("streetname", ""), query.get("number", "")))
+        elif method == "POST":
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                self._send(400, {"error": "invalid json"})
+                return
+            self._send(200, store.validate(payload))
+        else:
+            self._send(405, {"error": "method not allowed"})
+
+
+class _QuietThreadingHTTPServer(ThreadingHTTPServer):
+    """Abgebrochene Client-Verbindungen (z.B. spekulative Anfragen) nicht als Fehler ausgeben"""
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class MockSwisspostServer:
+    """Mock-Server, der im Hintergrund-Thread läuft (für Benchmarks einbettbar)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 fixtures: Optional[FixtureStore] = None, faults: Optional[FaultProfile] = None,
+                 record_upstream: bool = False):
+        self.fixtures = fixtures or FixtureStore.load()
+        self.faults = faults or FaultProfile()
+        self.record_upstream = record_upstream
+        self.httpd = _QuietThreadingHTTPServer((host, port), MockSwisspostHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._token_counter = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base_url(self) -> str:
+        return self.url + API_PREFIX
+
+    @property
+    def oauth_token_url(self) -> str:
+        return self.url + OAUTH_PATH
+
+    def env(self) -> Dict[str, str]:
+        """Umgebungsvariablen, mit denen Agent und Proxy den Mock verwenden"""
+        return {
+            "SWISSPOST_API_BASE_URL": self.api_base_url,
+            "SWISSPOST_OAUTH_TOKEN_URL": self.oauth_token_url,
+            "SWISSPOST_CLIENT_ID": os.getenv("SWISSPOST_CLIENT_ID") or "mock-client",
+            "SWISSPOST_CLIENT_SECRET": os.getenv("SWISSPOST_CLIENT_SECRET") or "mock-secret",
+        }
+
+    def start(self) -> "MockSwisspostServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-swisspost", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.record_upstream:
+            self.fixtures.save()
+
+    def __enter__(self) -> "MockSwisspostServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def count(self, endpoint: str, kind: str = "requests") -> None:
+        with self._lock:
+            bucket = self._counts.setdefault(endpoint, {})
+            bucket[kind] = bucket.get(kind, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {endpoint: dict(values) for endpoint, values in self._counts.items()}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def issue_token(self) -> Dict[str, Any]:
+        with self._lock:
+            self._token_counter += 1
+            number = self._token_counter
+        return {"access_token": f"mock-token-{number}", "token_type": "Bearer", "expires_in": self.faults.token_ttl}
+
+    def forward(self, method: str, endpoint: str, query: Dict[str, str], body: bytes, headers) -> Tuple[int, Any]:
+        """Record-Modus: an die echte API weiterleiten und Antwort aufzeichnen"""
+        import httpx
+
+        if endpoint == "oauth":
+            url = os.getenv("SWISSPOST_RECORD_OAUTH_URL", REAL_OAUTH_TOKEN_URL)
+        else:
+            url = os.getenv("SWISSPOST_RECORD_API_URL", REAL_API_BASE_URL) + endpoint
+        forward_headers = {key: value for key, value in headers.items()
+                           if key.lower() in ("authorization", "content-type")}
+        with httpx.Client(timeout=30.0) as client:
+            response = client.request(method, url, params=query or None, content=body or None, headers=forward_headers)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {"raw": response.text}
+        if endpoint != "oauth":
+            self.fixtures.record(self.fixtures.recorded_key(method, endpoint, query, body), response.status_code, payload)
+        return response.status_code, payload
+
+
+def _parse_endpoint_latency(values: List[str]) -> Dict[str, float]:
+    result: Dict[str, float] = {}
+    for value in values:
+        endpoint, _, millis = value.partition("=")
+        result[endpoint if endpoint == "oauth" else "/" + endpoint.lstrip("/")] = float(millis)
+    return result
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Lokaler Swisspost API Mock-Server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Fixture-Datei (JSON)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Basis-Latenz pro Anfrage")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Gleichverteilter Jitter (+/-)")
+    parser.add_argument("--endpoint-latency", action="append", default=[], metavar="ENDPOINT=MS",
+                        help="Latenz pro Endpoint, z.B. addresses/validation=120 (mehrfach möglich)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil Antworten mit --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Anteil Anfragen, die --stall-seconds hängen")
+    parser.add_argument("--stall-seconds", type=float, default=20.0)
+    parser.add_argument("--token-ttl", type=int, default=300, help="expires_in der ausgegebenen Tokens")
+    parser.add_argument("--seed", type=int, default=None, help="Zufalls-Seed für reproduzierbare Fehler/Jitter")
+    parser.add_argument("--record", action="store_true",
+                        help="An die echte Swisspost API weiterleiten und Antworten in --fixtures aufzeichnen")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    faults = FaultProfile(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        endpoint_latency_ms=_parse_endpoint_latency(args.endpoint_latency),
+        error_rate=args.error_rate, error_status=args.error_status,
+        stall_rate=args.stall_rate, stall_seconds=args.stall_seconds,
+        token_ttl=args.token_ttl, seed=args.seed,
+    )
+    server = MockSwisspostServer(args.host, args.port, FixtureStore.load(args.fixtures), faults, args.record)
+    print(f"Swisspost Mock läuft auf {server.url} ({'Record' if args.record else 'Replay'}-Modus)", file=sys.stderr)
+    for key, value in server.env().items():
+        if key.endswith("_URL"):
+            print(f"  export {key}={value}", file=sys.stderr)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        if args.record:
+            server.fixtures.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Startzeit-Benchmark des MCP Servers (Kaltstart)
+
+Claude Desktop und andere MCP-Clients starten smart-address-agent.py bei jeder
+Verbindung neu. Gemessen wird in frischen Python-Prozessen:
+
+- import:      Laden von smart-address-agent.py als Modul (Proxy, Jobs, Warm-up)
+- initialize:  Prozessstart bis zur Antwort auf MCP `initialize` über stdio
+- interpreter: leerer Python-Prozess als Referenz für die Grundkosten
+
+Der Server braucht dafür keine echten Credentials und keinen Upstream: das
+Token wird erst beim ersten Tool-Aufruf (oder mit SWISSPOST_PREWARM im
+Hintergrund) geholt.
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --compare benchmarks/results/startup-baseline.json --max-regression 0.2
+    python -m benchmarks.startup --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks import common
+
+INITIALIZE_REQUEST = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-03-26",
+        "capabilities": {},
+        "clientInfo": {"name": "startup-benchmark", "version": "1.0"},
+    },
+}
+
+IMPORT_SCRIPT = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "sys.path.insert(0, {root!r})\n"
+    "from benchmarks import common\n"
+    "common.load_agent_module()\n"
+    "print((time.perf_counter() - started) * 1000)\n"
+)
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Dummy-Credentials: der Konstruktor prüft nur, ob sie gesetzt sind
+    env.setdefault("SWISSPOST_CLIENT_ID", "startup-benchmark")
+    env.setdefault("SWISSPOST_CLIENT_SECRET", "startup-benchmark")
+    env.setdefault("SWISSPOST_LOG_LEVEL", "WARNING")
+    env.pop("SWISSPOST_WARMUP_FILES", None)
+    env.pop("SWISSPOST_MCP_TRANSPORT", None)
+    return env
+
+
+def measure_interpreter() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def measure_import(env: Dict[str, str]) -> float:
+    """Importzeit im Kindprozess (ohne Interpreter-Start)"""
+    result = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT.format(root=common.PROJECT_ROOT)],
+                            env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure_initialize(env: Dict[str, str], timeout: float = 30.0) -> float:
+    """Prozessstart bis zur ersten Antwort auf `initialize` (stdio)"""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, common.AGENT_FILE], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, env=env, cwd=common.PROJECT_ROOT)
+    try:
+        process.stdin.write((json.dumps(INITIALIZE_REQUEST) + "\n").encode("utf-8"))
+        process.stdin.flush()
+        line = process.stdout.readline()
+        elapsed = (time.perf_counter() - started) * 1000
+        if not line or json.loads(line).get("id") != 1:
+            raise RuntimeError(f"Keine initialize-Antwort: {line[:200]!r}")
+        return elapsed
+    finally:
+        process.kill()
+        process.wait(timeout=timeout)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Startzeit-Benchmark des MCP Servers")
+    parser.add_argument("--runs", type=int, default=10, help="Frische Prozesse pro Messung")
+    parser.add_argument("--output", default=None,
+                        help="Ergebnisdatei (Standard: benchmarks/results/startup-<zeit>.json)")
+    parser.add_argument("--compare", default=None, help="Frühere Ergebnisdatei zum Vergleich")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Obergrenze für initialize p50 in ms (Exit-Code 1 bei Überschreitung)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    env = _env()
+
+    # Ein Lauf vorab, damit .pyc-Dateien existieren und alle Messungen gleich starten
+    measure_import(env)
+    samples: Dict[str, List[float]] = {"interpreter": [], "import": [], "initialize": []}
+    for _ in range(args.runs):
+        samples["interpreter"].append(measure_interpreter())
+        samples["import"].append(measure_import(env))
+        samples["initialize"].append(measure_initialize(env))
+
+    results = {name: common.summarize(values) for name, values in samples.items()}
+    for name, summary in results.items():
+        print(f"{name:<12} p50={summary['p50']:>8.1f} ms  p95={summary['p95']:>8.1f} ms  max={summary['max']:>8.1f} ms")
+
+    payload: Dict[str, Any] = {
+        "benchmark": "startup",
+        "environment": common.environment_info(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+        "samples_ms": samples,
+        "metrics": {f"{name}.p50_ms": results[name]["p50"] for name in ("import", "initialize")},
+    }
+    path = common.write_results(args.output or common.default_output("startup"), payload)
+    print(f"\nErgebnisse: {path}")
+
+    exit_code = 0
+    if args.budget_ms is not None and results["initialize"]["p50"] > args.budget_ms:
+        print(f"Budget überschritten: initialize p50 {results['initialize']['p50']:g} ms > {args.budget_ms:g} ms")
+        exit_code = 1
+    if args.compare:
+        baseline = common.load_results(args.compare)
+        regressions = common.compare_metrics(baseline.get("metrics", {}), payload["metrics"], args.max_regression)
+        for line in regressions:
+            print(f"Regression: {line}")
+        if regressions:
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,22 +3,75 @@
 Produktiver HTTP Proxy für Swisspost MCP Server
 """
 
+import asyncio
+import concurrent.futures
+import importlib.util
 import json
+import logging
 import sys
 import os
+import select
+import signal
+import socket
+import threading
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import subprocess
 import tempfile
+from urllib.parse import urlsplit, parse_qs
 from dotenv import load_dotenv
 import httpx
 
+# Projekt-Root für gemeinsame Module (swisspost_mcp) in den Python Path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from swisspost_mcp import deadline, jobs, lifecycle, metrics, readiness, scheduler, serialization, warmup
+from swisspost_mcp.log import get_logger, payloads_enabled
+
 # Load environment variables
 load_dotenv(override=True)
 
-# Swisspost API Konfiguration
-OAUTH_TOKEN_URL = "https://api.post.ch/OAuth/token"
-API_BASE_URL = "https://dcapi.apis.post.ch/address/v1"
+# Swisspost API Konfiguration (per Umgebungsvariable überschreibbar, z.B. für den lokalen Mock-Server)
+OAUTH_TOKEN_URL = os.getenv("SWISSPOST_OAUTH_TOKEN_URL", "https://api.post.ch/OAuth/token")
+API_BASE_URL = os.getenv("SWISSPOST_API_BASE_URL", "https://dcapi.apis.post.ch/address/v1").rstrip("/")
+
+logger = get_logger("proxy")
+
+PROXY_REQUESTS = metrics.REGISTRY.counter(
+    "swisspost_proxy_requests_total",
+    "HTTP Requests an den Proxy nach Route und Status",
+    ("route", "status"),
+)
+PROXY_LATENCY = metrics.REGISTRY.histogram(
+    "swisspost_proxy_request_duration_seconds",
+    "Antwortzeit des Proxys nach Route",
+    ("route",),
+)
+KNOWN_ROUTES = ('/validate', '/health', '/health/live', '/health/ready', '/metrics', '/jobs')
+CLIENT_DISCONNECTS = metrics.REGISTRY.counter(
+    "swisspost_proxy_client_disconnects_total",
+    "Validierungen, die abgebrochen wurden, weil der Client nicht mehr wartet",
+)
+
+# Deadline pro /validate ohne X-Timeout-Ms (knapp unter dem 30 s Timeout von n8n; 0 = keine)
+try:
+    PROXY_TIMEOUT_MS = float(os.getenv("SWISSPOST_PROXY_TIMEOUT_MS", "25000"))
+except ValueError:
+    PROXY_TIMEOUT_MS = 25000.0
+
+
+class ClientDisconnected(Exception):
+    """Der HTTP-Client hat die Verbindung geschlossen, bevor das Ergebnis vorlag"""
+
+
+CREDENTIALS_MISSING = "Swisspost credentials not found in environment"
+
+
+def credentials_configured():
+    """Der Agent-Konstruktor wirft ohne Client-ID/Secret ValueError; vorher prüfen statt in Fallbacks zu fallen"""
+    return bool(os.getenv("SWISSPOST_CLIENT_ID") and os.getenv("SWISSPOST_CLIENT_SECRET"))
 
 async def get_swisspost_token():
     """Holt Swisspost OAuth Token"""
@@ -30,27 +83,33 @@ async def get_swisspost_token():
         if not client_id or not client_secret:
             return None
             
+        started = time.perf_counter()
         async with httpx.AsyncClient() as client:
-            response = await client.post(
-                OAUTH_TOKEN_URL,
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": client_id,
-                    "client_secret": client_secret,
-                    "scope": scope
-                },
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=10.0
-            )
+            try:
+                response = await client.post(
+                    OAUTH_TOKEN_URL,
+                    data={
+                        "grant_type": "client_credentials",
+                        "client_id": client_id,
+                        "client_secret": client_secret,
+                        "scope": scope
+                    },
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                    timeout=10.0
+                )
+            except Exception:
+                metrics.observe_upstream("oauth", "error", started)
+                raise
+            metrics.observe_upstream("oauth", str(response.status_code), started)
             
             if response.status_code == 200:
                 data = response.json()
                 return data["access_token"]
             else:
-                print(f"OAuth Fehler: {response.status_code} - {response.text}")
+                logger.warning("OAuth Fehler", extra={'http_status': response.status_code, 'body': response.text[:500]})
                 return None
     except Exception as e:
-        print(f"Token Fehler: {e}")
+        logger.warning("Token Fehler: %s", e)
         return None
 
 async def enhanced_zip_lookup(zip_code: str, city_input: str):
@@ -60,31 +119,37 @@ async def enhanced_zip_lookup(zip_code: str, city_input: str):
     try:
         token = await get_swisspost_token()
         if not token:
-            print(f"DEBUG: No token available for enhanced ZIP lookup")
+            logger.debug("No token available for enhanced ZIP lookup")
             return None
             
+        started = time.perf_counter()
         async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{API_BASE_URL}/zips",
-                headers={"Authorization": f"Bearer {token}"},
-                params={
-                    "zipCity": zip_code,
-                    "type": "DOMICILE"
-                },
-                timeout=10.0
-            )
+            try:
+                response = await client.get(
+                    f"{API_BASE_URL}/zips",
+                    headers={"Authorization": f"Bearer {token}"},
+                    params={
+                        "zipCity": zip_code,
+                        "type": "DOMICILE"
+                    },
+                    timeout=10.0
+                )
+            except Exception:
+                metrics.observe_upstream("/zips", "error", started)
+                raise
+            metrics.observe_upstream("/zips", str(response.status_code), started)
             
             if response.status_code != 200:
-                print(f"DEBUG: ZIP API returned status {response.status_code}: {response.text}")
+                logger.debug("ZIP API returned status %s", response.status_code)
                 return None
             
             data = response.json()
             zips = data.get('zips', [])
             
-            print(f"DEBUG: ZIP API response for {zip_code}: {len(zips)} cities found")
+            logger.debug("ZIP API response for %s: %d cities found", zip_code, len(zips))
             
             if not zips:
-                print(f"DEBUG: No cities found for ZIP {zip_code}")
+                logger.debug("No cities found for ZIP %s", zip_code)
                 return None
             
             # Verschiedene Suchstrategien
@@ -94,75 +159,306 @@ async def enhanced_zip_lookup(zip_code: str, city_input: str):
             for zip_entry in zips:
                 for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
                     if candidate and candidate.lower() == city_lower:
-                        print(f"DEBUG: Exact match found: {candidate}")
+                        logger.debug("Exact match found: %s", candidate)
                         return candidate
             
             # 2. "Startet mit" Match
             for zip_entry in zips:
                 for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
                     if candidate and candidate.lower().startswith(city_lower):
-                        print(f"DEBUG: Starts-with match found: {candidate}")
+                        logger.debug("Starts-with match found: %s", candidate)
                         return candidate
             
             # 3. "Enthält" Match
             for zip_entry in zips:
                 for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
                     if candidate and city_lower in candidate.lower():
-                        print(f"DEBUG: Contains match found: {candidate}")
+                        logger.debug("Contains match found: %s", candidate)
                         return candidate
             
             # 4. Ähnlichkeits-Score (niedrigere Schwelle)
             best_match = None
             best_score = 0.0
             
-            print(f"DEBUG: Trying similarity matching for '{city_input}'")
+            logger.debug("Trying similarity matching for '%s'", city_input)
             for zip_entry in zips:
                 for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
                     if candidate:
                         # Einfache Ähnlichkeits-Berechnung
                         score = len(set(city_lower) & set(candidate.lower())) / max(len(city_lower), len(candidate.lower()))
-                        print(f"DEBUG: Candidate '{candidate}' score: {score:.2f}")
+                        logger.debug("Candidate '%s' score: %.2f", candidate, score)
                         if score > best_score and score > 0.2:  # Niedrigere Schwelle
                             best_score = score
                             best_match = candidate
             
             if best_match:
-                print(f"DEBUG: Best similarity match: {best_match} (score: {best_score:.2f})")
+                logger.debug("Best similarity match: %s (score: %.2f)", best_match, best_score)
             else:
-                print(f"DEBUG: No similarity match found (best score: {best_score:.2f})")
+                logger.debug("No similarity match found (best score: %.2f)", best_score)
             
             return best_match
     
     except Exception as e:
-        print(f"Enhanced ZIP lookup Fehler: {e}")
+        logger.warning("Enhanced ZIP lookup Fehler: %s", e)
+        return None
+
+class AgentRuntime:
+    """
+    Persistente Laufzeit für den Smart Address Agent: ein Event-Loop in einem
+    Hintergrund-Thread, ein geladenes Agent-Modul und eine Agent-Instanz.
+    Alle Handler-Threads teilen sich so Token, Caches und den Prioritäts-Scheduler.
+    """
+    
+    def __init__(self, agent_file):
+        self.agent_file = agent_file
+        self._lock = threading.Lock()
+        self._loop = None
+        self._agent = None
+    
+    def _ensure_loop(self):
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="swisspost-agent-loop", daemon=True).start()
+            self._loop = loop
+        return self._loop
+    
+    def agent(self):
+        """Lädt smart-address-agent.py einmalig und liefert die gemeinsame SmartAddressAgent-Instanz"""
+        with self._lock:
+            if self._agent is None:
+                if not os.path.exists(self.agent_file):
+                    raise ImportError(f"smart-address-agent.py not found at {self.agent_file}")
+                logger.debug("Loading module from: %s", self.agent_file)
+                spec = importlib.util.spec_from_file_location("smart_address_agent", self.agent_file)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                self._agent = module.SmartAddressAgent()
+                logger.debug("Successfully loaded smart_address_agent from file")
+            return self._agent
+    
+    def run(self, coro, disconnected=None):
+        """
+        Führt eine Coroutine auf dem gemeinsamen Loop aus und wartet auf das Ergebnis.
+        Meldet `disconnected()` währenddessen True, wird die Coroutine abgebrochen (ClientDisconnected).
+        """
+        with self._lock:
+            loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        if disconnected is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(timeout=0.25)
+            except concurrent.futures.TimeoutError:
+                if disconnected():
+                    future.cancel()
+                    raise ClientDisconnected() from None
+
+
+AGENT_RUNTIME = AgentRuntime(os.path.join(PROJECT_ROOT, 'smart-address-agent.py'))
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+async def validate_job_address(address):
+    """Validierung einer Job-Zeile; ohne Credentials wird die Zeile als Fehler verbucht"""
+    if not credentials_configured():
+        raise RuntimeError(CREDENTIALS_MISSING)
+    return await AGENT_RUNTIME.agent().validate_smart(address)
+
+
+def get_job_manager():
+    """Job-Manager für /jobs (einmalig erstellt); nimmt beim Start offene Jobs wieder auf"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            manager = jobs.JobManager(
+                jobs.JobStore(),
+                validate=validate_job_address,
+                run=AGENT_RUNTIME.run
+            )
+            resumed = manager.start()
+            if resumed:
+                logger.info("%s offene Jobs wieder aufgenommen", resumed)
+            _job_manager = manager
+        return _job_manager
+
+
+# Zustand des Cache-Warm-ups beim Start (SWISSPOST_WARMUP_FILES); /health meldet erst danach "healthy"
+WARMUP_STATE = {'status': 'disabled'}
+
+
+def start_health_probes():
+    """Readiness-Proben (Token, Upstream) im Hintergrund auf dem Agent-Loop; /health liest nur deren Ergebnisse"""
+    if not credentials_configured():
+        logger.warning("Health-Proben nicht gestartet: %s", CREDENTIALS_MISSING)
+        return
+    agent = AGENT_RUNTIME.agent()
+    
+    async def start():
+        readiness.start(agent.token_manager, agent.probe_upstream)
+    
+    AGENT_RUNTIME.run(start())
+
+
+def start_warmup():
+    """Startet den Cache-Warm-up im Hintergrund, falls Quellen konfiguriert sind"""
+    if not warmup.configured_sources():
         return None
+    WARMUP_STATE['status'] = 'running'
+    
+    def run():
+        try:
+            WARMUP_STATE['summary'] = AGENT_RUNTIME.run(warmup.warm_agent(AGENT_RUNTIME.agent()))
+            WARMUP_STATE['status'] = 'done'
+        except Exception as e:
+            # Ein fehlgeschlagener Warm-up soll den Dienst nicht blockieren
+            logger.warning("Cache-Warm-up fehlgeschlagen: %s", e)
+            WARMUP_STATE.update(status='failed', error=str(e))
+    
+    thread = threading.Thread(target=run, name="swisspost-warmup", daemon=True)
+    thread.start()
+    return thread
 
 class SwisspostHTTPHandler(BaseHTTPRequestHandler):
     """HTTP Request Handler für Swisspost MCP Proxy"""
     
+    @property
+    def route(self):
+        """Pfad ohne Query-String"""
+        return urlsplit(self.path).path
+    
+    @property
+    def query(self):
+        """Query-Parameter (jeweils erster Wert)"""
+        return {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+    
+    def send_response(self, code, message=None):
+        """Merkt sich den Status für die Request-Metriken"""
+        self._response_status = code
+        super().send_response(code, message)
+    
+    def client_disconnected(self):
+        """True, wenn der Client die Verbindung geschlossen hat (lesbar, aber keine Daten mehr)"""
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and self.connection.recv(1, socket.MSG_PEEK) == b''
+        except (OSError, ValueError):
+            return True
+    
+    @staticmethod
+    def _remaining_ms(request_deadline):
+        """Restzeit bis zur Deadline in ms (None = keine Deadline)"""
+        if request_deadline is None:
+            return None
+        return max(1.0, (request_deadline - time.monotonic()) * 1000.0)
+    
+    def _observe_request(self, started):
+        route = '/jobs' if self.route.startswith('/jobs/') else self.route
+        route = route if route in KNOWN_ROUTES else 'other'
+        status = str(getattr(self, '_response_status', 0))
+        PROXY_REQUESTS.inc(route=route, status=status)
+        PROXY_LATENCY.observe(time.perf_counter() - started, route=route)
+    
     def do_POST(self):
         """Handle POST requests"""
-        if self.path == '/validate':
-            self.handle_validate()
-        else:
-            self.send_error(404, "Not Found")
+        started = time.perf_counter()
+        try:
+            if self.route in ('/validate', '/jobs') and not lifecycle.LIFECYCLE.accepting:
+                # Herunterfahren läuft: der Client soll es bei einer anderen Instanz versuchen
+                self.send_json_response({
+                    'success': False,
+                    'error': 'Server wird heruntergefahren',
+                    'timestamp': time.time()
+                }, 503, headers={'Retry-After': '1', 'Connection': 'close'})
+                self.close_connection = True
+            elif self.route == '/validate':
+                with lifecycle.LIFECYCLE.track():
+                    self.handle_validate()
+            elif self.route == '/jobs':
+                with lifecycle.LIFECYCLE.track():
+                    self.handle_job_submit()
+            else:
+                self.send_error(404, "Not Found")
+        finally:
+            self._observe_request(started)
     
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == '/health':
-            self.handle_health()
-        else:
-            self.send_error(404, "Not Found")
+        started = time.perf_counter()
+        try:
+            if self.route in ('/health', '/health/ready'):
+                self.handle_health()
+            elif self.route == '/health/live':
+                self.handle_liveness()
+            elif self.route == '/metrics':
+                self.handle_metrics()
+            elif self.route == '/jobs' or self.route.startswith('/jobs/'):
+                self.handle_jobs_get()
+            else:
+                self.send_error(404, "Not Found")
+        finally:
+            self._observe_request(started)
+    
+    def do_DELETE(self):
+        """Handle DELETE requests"""
+        started = time.perf_counter()
+        try:
+            if self.route.startswith('/jobs/'):
+                self.handle_job_cancel()
+            else:
+                self.send_error(404, "Not Found")
+        finally:
+            self._observe_request(started)
     
     def handle_validate(self):
         """Handle address validation requests"""
+        started = time.perf_counter()
         try:
             # Read request body
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             data = json.loads(post_data.decode('utf-8'))
             
-            print(f"INFO: Adressvalidierung: {data.get('street', '')} {data.get('city', '')} {data.get('postcode', '')} | street2={data.get('street2', '')}")
+            # Antwort-Profil: Query (?profile=) > Header (X-Response-Profile) > Body (response_profile)
+            profile = serialization.resolve_profile(
+                self.query.get('profile')
+                or self.headers.get('X-Response-Profile')
+                or data.get('response_profile')
+            )
+            
+            # Trace anfordern: ?debug_timing=1 oder Header X-Debug-Timing
+            debug_flag = self.query.get('debug_timing') or self.headers.get('X-Debug-Timing')
+            if debug_flag and debug_flag.strip().lower() in ('1', 'true', 'yes'):
+                data['debug_timing'] = True
+            
+            # Spekulativer Modus: ?speculative=1 oder Header X-Speculative (überschreibt den Body)
+            speculative_flag = self.query.get('speculative') or self.headers.get('X-Speculative')
+            if speculative_flag:
+                data['speculative'] = speculative_flag.strip().lower() in ('1', 'true', 'yes')
+            
+            # Prioritätsklasse: ?priority= oder Header X-Priority (überschreibt den Body)
+            priority = self.query.get('priority') or self.headers.get('X-Priority')
+            if priority:
+                data['priority'] = scheduler.resolve_priority(priority)
+            
+            # Deadline für den ganzen Request: ?timeout_ms= oder Header X-Timeout-Ms (überschreibt den Body)
+            timeout = deadline.resolve_timeout(
+                self.query.get('timeout_ms') or self.headers.get('X-Timeout-Ms') or data.get('timeout_ms'),
+                PROXY_TIMEOUT_MS
+            )
+            request_deadline = time.monotonic() + timeout if timeout is not None else None
+            
+            logger.info(
+                "Adressvalidierung",
+                extra={
+                    'street': data.get('street', ''),
+                    'city': data.get('city', ''),
+                    'postcode': data.get('postcode', ''),
+                    'street2': data.get('street2', '')
+                }
+            )
             
             # Validate required fields
             required_fields = ['street', 'city', 'postcode']
@@ -177,14 +473,16 @@ class SwisspostHTTPHandler(BaseHTTPRequestHandler):
                 return
             
             # Call MCP Agent
+            data['timeout_ms'] = self._remaining_ms(request_deadline)
             result = self.call_mcp_agent(data)
             
             # Check if validation failed due to wrong city name
-            if (result.get('status') == 'failed' and 
+            if (not result.get('deadline_exceeded') and
+                result.get('status') == 'failed' and 
                 (result.get('quality') == 'UNUSABLE' or result.get('quality') == 'UNUSABLE') and 
                 result.get('score') == 0):
                 
-                print(f"INFO: Validation failed, trying city correction for {data.get('postcode')}")
+                logger.info("Validation failed, trying city correction for %s", data.get('postcode'))
                 
                 # Erweiterte Stadt-Korrektur für alle PLZ
                 corrected_city = None
@@ -194,23 +492,28 @@ class SwisspostHTTPHandler(BaseHTTPRequestHandler):
                 if postcode and city:
                     # Versuche erweiterte ZIP-Autocomplete (synchrone Version)
                     try:
-                        import asyncio
-                        print(f"DEBUG: Attempting city correction for ZIP {postcode}, city '{city}'")
-                        corrected_city = asyncio.run(enhanced_zip_lookup(postcode, city))
-                        print(f"DEBUG: City correction result: {corrected_city}")
+                        logger.debug("Attempting city correction for ZIP %s, city '%s'", postcode, city)
+                        lookup = enhanced_zip_lookup(postcode, city)
+                        if request_deadline is not None:
+                            lookup = asyncio.wait_for(lookup, self._remaining_ms(request_deadline) / 1000.0)
+                        corrected_city = AGENT_RUNTIME.run(lookup, self.client_disconnected)
+                        logger.debug("City correction result: %s", corrected_city)
+                    except ClientDisconnected:
+                        raise
                     except Exception as e:
-                        print(f"DEBUG: City correction failed: {e}")
+                        logger.debug("City correction failed: %s", e)
                         corrected_city = None
                 
                 if corrected_city and corrected_city != data.get('city'):
-                    print(f"INFO: Found correct city name: {corrected_city} (was: {data.get('city')})")
+                    logger.info("Found correct city name: %s (was: %s)", corrected_city, data.get('city'))
                     
                     # Update data with correct city name
                     corrected_data = data.copy()
                     corrected_data['city'] = corrected_city
+                    corrected_data['timeout_ms'] = self._remaining_ms(request_deadline)
                     
                     # Try validation again with corrected city
-                    print(f"INFO: Retrying validation with corrected city: {corrected_city}")
+                    logger.info("Retrying validation with corrected city: %s", corrected_city)
                     result = self.call_mcp_agent(corrected_data)
                     
                     # Add correction info to result
@@ -221,35 +524,200 @@ class SwisspostHTTPHandler(BaseHTTPRequestHandler):
                             'auto_corrected': True
                         }
             
+            if isinstance(result.get('trace'), dict):
+                result['trace']['proxy_total_ms'] = round((time.perf_counter() - started) * 1000.0, 3)
+            
             self.send_json_response({
                 'success': True,
-                'data': result,
+                'data': serialization.shape_result(result, profile),
                 'timestamp': time.time()
-            })
-            
+            }, profile=profile)
+            
+        except ClientDisconnected:
+            # Niemand wartet mehr auf die Antwort – offene Upstream-Aufrufe wurden abgebrochen
+            CLIENT_DISCONNECTS.inc()
+            logger.info("Client hat die Verbindung geschlossen, Validierung abgebrochen")
+            self.close_connection = True
+        except scheduler.DeadlineExceeded as e:
+            # Überlast: Request wurde vom Scheduler verworfen, der Client soll später erneut senden
+            logger.warning("Adressvalidierung verworfen: %s", e)
+            self.send_json_response({
+                'success': False,
+                'error': str(e),
+                'priority': e.priority,
+                'timestamp': time.time()
+            }, 503)
         except Exception as e:
-            print(f"ERROR: Fehler bei Adressvalidierung: {e}")
+            logger.error("Fehler bei Adressvalidierung: %s", e)
             self.send_json_response({
                 'success': False,
                 'error': str(e),
                 'timestamp': time.time()
             }, 500)
     
+    def _iter_request_body(self, chunk_size=65536):
+        """Request-Body blockweise (Content-Length oder Transfer-Encoding: chunked)"""
+        if 'chunked' in (self.headers.get('Transfer-Encoding') or '').lower():
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    # Trailer bis zur Leerzeile überspringen
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return
+                remaining = size
+                while remaining > 0:
+                    chunk = self.rfile.read(min(chunk_size, remaining))
+                    if not chunk:
+                        raise jobs.JobError("Upload vorzeitig abgebrochen")
+                    remaining -= len(chunk)
+                    yield chunk
+                self.rfile.readline()
+        remaining = int(self.headers.get('Content-Length') or 0)
+        while remaining > 0:
+            chunk = self.rfile.read(min(chunk_size, remaining))
+            if not chunk:
+                raise jobs.JobError("Upload vorzeitig abgebrochen")
+            remaining -= len(chunk)
+            yield chunk
+    
+    def handle_job_submit(self):
+        """POST /jobs – Datei (CSV oder NDJSON) hochladen, liefert die Job-ID"""
+        try:
+            input_format = jobs.detect_format(self.query.get('format'), self.headers.get('Content-Type'))
+            priority = scheduler.resolve_priority(
+                self.query.get('priority') or self.headers.get('X-Priority') or 'bulk'
+            )
+            # Inkrementell: unveränderte, noch frische Datensätze nicht erneut validieren
+            incremental_flag = self.query.get('incremental') or self.headers.get('X-Incremental') or ''
+            job = get_job_manager().submit(
+                self._iter_request_body(), input_format, priority,
+                incremental_mode=incremental_flag.strip().lower() in ('1', 'true', 'yes')
+            )
+        except jobs.JobError as e:
+            self.send_json_response({'success': False, 'error': str(e), 'timestamp': time.time()}, 400)
+            return
+        self.send_json_response({
+            'success': True,
+            'job_id': job.id,
+            'status_url': f"/jobs/{job.id}",
+            'results_url': f"/jobs/{job.id}/results",
+            'data': job.progress(),
+            'timestamp': time.time()
+        }, 202)
+    
+    def handle_jobs_get(self):
+        """GET /jobs, /jobs/{id} (Fortschritt, Durchsatz) und /jobs/{id}/results?format=csv|ndjson|parquet"""
+        parts = [part for part in self.route.split('/') if part]
+        manager = get_job_manager()
+        try:
+            if len(parts) == 1:
+                self.send_json_response({
+                    'success': True,
+                    'data': [job.progress() for job in manager.store.list()],
+                    'timestamp': time.time()
+                })
+            elif len(parts) == 2:
+                self.send_json_response({
+                    'success': True,
+                    'data': manager.store.get(parts[1]).progress(),
+                    'timestamp': time.time()
+                })
+            elif len(parts) == 3 and parts[2] == 'results':
+                self.send_job_results(manager.store, manager.store.get(parts[1]))
+            else:
+                self.send_error(404, "Not Found")
+        except jobs.JobNotFound:
+            self.send_json_response({'success': False, 'error': 'Job nicht gefunden', 'timestamp': time.time()}, 404)
+        except jobs.JobError as e:
+            self.send_json_response({'success': False, 'error': str(e), 'timestamp': time.time()}, 400)
+    
+    def send_job_results(self, store, job):
+        """Streamt die bisher vorliegenden Ergebnisse (auch während der Job noch läuft)"""
+        fmt = (self.query.get('format') or 'ndjson').strip().lower()
+        chunks = jobs.export_results(store, job, fmt)
+        content_types = {
+            'csv': 'text/csv; charset=utf-8',
+            'ndjson': 'application/x-ndjson',
+            'parquet': 'application/vnd.apache.parquet'
+        }
+        self.send_response(200)
+        self.send_header('Content-Type', content_types[fmt])
+        self.send_header('Content-Disposition', f'attachment; filename="{job.id}.{fmt}"')
+        self.send_header('X-Job-Status', job.status)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        # Ohne Content-Length: die Verbindung endet mit dem letzten Block (HTTP/1.0)
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(chunk)
+    
+    def handle_job_cancel(self):
+        """DELETE /jobs/{id} – Job nach dem laufenden Block abbrechen"""
+        parts = [part for part in self.route.split('/') if part]
+        try:
+            if len(parts) != 2:
+                raise jobs.JobNotFound(self.route)
+            job = get_job_manager().cancel(parts[1])
+        except jobs.JobNotFound:
+            self.send_json_response({'success': False, 'error': 'Job nicht gefunden', 'timestamp': time.time()}, 404)
+            return
+        self.send_json_response({'success': True, 'data': job.progress(), 'timestamp': time.time()})
+    
     def handle_health(self):
-        """Handle health check requests"""
+        """
+        Readiness (/health, /health/ready): 503 während Warm-up und Herunterfahren sowie bei
+        offenem Upstream-Breaker, fehlendem Token oder voller Warteschlange (nur zwischengespeicherte Proben)
+        """
+        warming_up = WARMUP_STATE['status'] == 'running'
+        state = lifecycle.LIFECYCLE.health()
+        deep = readiness.report()
+        ready = state['ready'] and not warming_up and deep['ready']
+        if state['state'] == 'draining':
+            status = 'draining'
+        elif warming_up:
+            status = 'warming_up'
+        else:
+            status = 'healthy' if deep['ready'] else 'unavailable'
+        self.send_json_response({
+            'status': status,
+            'service': 'swisspost-mcp-proxy',
+            'live': state['live'],
+            'ready': ready,
+            'reasons': deep['reasons'],
+            'checks': deep['checks'],
+            'lifecycle': state,
+            'warmup': WARMUP_STATE,
+            'timestamp': time.time()
+        }, 200 if ready else 503)
+    
+    def handle_liveness(self):
+        """Liveness (/health/live): 200, solange der Prozess Requests beantwortet – auch beim Herunterfahren"""
         self.send_json_response({
-            'status': 'healthy',
+            'status': 'alive',
             'service': 'swisspost-mcp-proxy',
+            'lifecycle': lifecycle.LIFECYCLE.health(),
             'timestamp': time.time()
         })
     
+    def handle_metrics(self):
+        """Prometheus-Metriken im Text-Format"""
+        body = metrics.render().encode('utf-8')
+        body, content_encoding = serialization.compress(body, self.headers.get('Accept-Encoding'))
+        self.send_response(200)
+        self.send_header('Content-Type', metrics.PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        if content_encoding:
+            self.send_header('Content-Encoding', content_encoding)
+        self.end_headers()
+        self.wfile.write(body)
+    
     def get_correct_city_name(self, postcode):
         """Get correct city name from Swisspost ZIP API"""
         try:
             # Use Swisspost ZIP API to get correct city name
-            url = f"https://dcapi.apis.post.ch/address/v1/zips?zipCity={postcode}&type=DOMICILE"
+            url = f"{API_BASE_URL}/zips?zipCity={postcode}&type=DOMICILE"
             
-            print(f"DEBUG: Calling ZIP API: {url}")
+            logger.debug("Calling ZIP API: %s", url)
             
             with httpx.Client(timeout=10.0) as client:
                 response = client.get(url)
@@ -262,91 +730,65 @@ class SwisspostHTTPHandler(BaseHTTPRequestHandler):
                         city_info = data['zips'][0]
                         correct_city = city_info.get('city18') or city_info.get('city27')
                         
-                        print(f"DEBUG: ZIP API response: {data}")
-                        print(f"DEBUG: Correct city found: {correct_city}")
+                        if payloads_enabled(logger):
+                            logger.debug("ZIP API response", extra={'payload': data})
+                        logger.debug("Correct city found: %s", correct_city)
                         
                         return correct_city
                     else:
-                        print(f"WARNING: No cities found for ZIP {postcode}")
+                        logger.warning("No cities found for ZIP %s", postcode)
                         return None
                 else:
-                    print(f"WARNING: ZIP API returned status {response.status_code}")
+                    logger.warning("ZIP API returned status %s", response.status_code)
                     return None
                     
         except Exception as e:
-            print(f"WARNING: ZIP API call failed: {e}")
+            logger.warning("ZIP API call failed: %s", e)
             return None
     
     def call_mcp_agent(self, data):
-        """Call MCP Agent via direct import"""
+        """
+        Call MCP Agent via direct import (persistente AgentRuntime).
+        Raises: scheduler.DeadlineExceeded, wenn der Scheduler den Request verwirft
+        """
         try:
-            # Get the project root directory
-            current_file = os.path.abspath(__file__)
-            project_root = os.path.dirname(os.path.dirname(current_file))
+            project_root = PROJECT_ROOT
+            logger.debug("Project Root: %s", project_root)
             
-            # Add project root to Python path
-            if project_root not in sys.path:
-                sys.path.insert(0, project_root)
-            
-            print(f"DEBUG: Project Root: {project_root}")
-            print(f"DEBUG: Python Path: {sys.path[:3]}...")
+            # Ohne Credentials wirft der Agent-Konstruktor; das ist ein Konfigurationsfehler, kein Fall für Fallbacks
+            if not credentials_configured():
+                return {"error": CREDENTIALS_MISSING, "success": False}
             
             # Try direct import
             try:
-                # Import the module directly from file
-                import importlib.util
-                agent_file = os.path.join(project_root, 'smart-address-agent.py')
-                
-                if not os.path.exists(agent_file):
-                    raise ImportError(f"smart-address-agent.py not found at {agent_file}")
-                
-                print(f"DEBUG: Loading module from: {agent_file}")
-                
-                # Load module from file
-                spec = importlib.util.spec_from_file_location("smart_address_agent", agent_file)
-                smart_address_agent = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(smart_address_agent)
-                
-                print("SUCCESS: Successfully loaded smart_address_agent from file")
-                
-                # Use asyncio to run the validation
-                import asyncio
+                agent = AGENT_RUNTIME.agent()
                 
                 async def validate_address():
                     try:
-                        # Load credentials from environment
-                        client_id = os.getenv("SWISSPOST_CLIENT_ID")
-                        client_secret = os.getenv("SWISSPOST_CLIENT_SECRET")
-                        scope = os.getenv("SWISSPOST_SCOPE", "DCAPI_ADDRESS_VALIDATE DCAPI_ADDRESS_AUTOCOMPLETE")
-                        
-                        if not client_id or not client_secret:
-                            return {"error": "Swisspost credentials not found in environment", "success": False}
-                        
-                        # Create an instance of the main class that contains validate_smart
-                        SmartAddressAgent = smart_address_agent.SmartAddressAgent
-                        agent = SmartAddressAgent()
                         result = await agent.validate_smart(data)
                         return result
+                    except scheduler.DeadlineExceeded:
+                        raise
                     except Exception as e:
                         return {"error": str(e), "success": False}
                 
-                # Run the async function
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(validate_address())
-                loop.close()
-                
-                return result
+                # Auf dem gemeinsamen Event-Loop ausführen; bricht ab, sobald der Client nicht mehr wartet
+                return AGENT_RUNTIME.run(validate_address(), self.client_disconnected)
                 
+            except (scheduler.DeadlineExceeded, ClientDisconnected):
+                raise
             except Exception as e:
-                print(f"ERROR: Direct file loading failed: {e}")
-                print(f"DEBUG: Files in project root: {os.listdir(project_root) if os.path.exists(project_root) else 'Directory not found'}")
+                logger.error("Direct file loading failed: %s", e)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Files in project root: %s", os.listdir(project_root) if os.path.exists(project_root) else 'Directory not found')
                 
                 # Fallback to subprocess approach
                 return self.call_mcp_agent_subprocess(data)
                 
+        except (scheduler.DeadlineExceeded, ClientDisconnected):
+            raise
         except Exception as e:
-            print(f"WARNING: MCP Agent Fehler, verwende Simulation: {e}")
+            logger.warning("MCP Agent Fehler, verwende Simulation: %s", e)
             return self.simulate_validation(data)
     
     def call_mcp_agent_subprocess(self, data):
@@ -356,7 +798,7 @@ class SwisspostHTTPHandler(BaseHTTPRequestHandler):
             current_file = os.path.abspath(__file__)
             project_root = os.path.dirname(os.path.dirname(current_file))
             
-            print(f"DEBUG: Trying subprocess approach with project root: {project_root}")
+            logger.debug("Trying subprocess approach with project root: %s", project_root)
             
             # Create a simple validation script
             validation_script = f'''
@@ -398,11 +840,11 @@ if __name__ == "__main__":
             if result.returncode == 0:
                 return json.loads(result.stdout)
             else:
-                print(f"WARNING: Subprocess failed: {result.stderr}")
+                logger.warning("Subprocess failed: %s", result.stderr)
                 return self.simulate_validation(data)
                 
         except Exception as e:
-            print(f"WARNING: Subprocess approach failed: {e}")
+            logger.warning("Subprocess approach failed: %s", e)
             return self.simulate_validation(data)
     
     def simulate_validation(self, data):
@@ -449,17 +891,25 @@ if __name__ == "__main__":
             }
         }
     
-    def send_json_response(self, data, status_code=200):
-        """Send JSON response"""
+    def send_json_response(self, data, status_code=200, profile=serialization.DEFAULT_RESPONSE_PROFILE, headers=None):
+        """Send JSON response (gzip/deflate falls vom Client akzeptiert)"""
+        body = serialization.dumps_bytes(data, profile)
+        body, content_encoding = serialization.compress(body, self.headers.get('Accept-Encoding'))
+        
         self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if content_encoding:
+            self.send_header('Content-Encoding', content_encoding)
+        self.send_header('Vary', 'Accept-Encoding')
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, X-Response-Profile, X-Debug-Timing, X-Speculative, X-Priority, X-Incremental, X-Timeout-Ms')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
         
-        response = json.dumps(data, ensure_ascii=False, indent=2)
-        self.wfile.write(response.encode('utf-8'))
+        self.wfile.write(body)
     
     def log_message(self, format, *args):
         """Override to reduce log noise"""
@@ -476,16 +926,37 @@ class SwisspostHTTPProxy:
     def start_server(self):
         """Starte HTTP Server"""
         try:
-            self.server = HTTPServer((self.host, self.port), SwisspostHTTPHandler)
+            # Ein Thread pro Verbindung; die Validierung selbst läuft auf dem gemeinsamen AgentRuntime-Loop
+            self.server = ThreadingHTTPServer((self.host, self.port), SwisspostHTTPHandler)
+            # Cache-Snapshot des letzten Laufs laden (warmer Neustart)
+            restored = lifecycle.restore_state()
+            if restored:
+                print(f"INFO: {restored} Cache-Einträge aus dem letzten Lauf geladen")
+            # Job-Worker starten und unterbrochene Jobs ab dem letzten Checkpoint fortsetzen
+            get_job_manager()
+            try:
+                start_health_probes()
+            except Exception as e:
+                print(f"WARNING: Health-Proben nicht gestartet: {e}")
+            if start_warmup():
+                print(f"INFO: Cache-Warm-up läuft ({', '.join(warmup.configured_sources())}), /health meldet bis dahin 503")
             
             print(f"INFO: Swisspost MCP HTTP Proxy läuft auf http://{self.host}:{self.port}")
             print(f"INFO: Für n8n verwenden Sie: http://localhost:{self.port}")
             print("INFO: Endpoints:")
             print(f"  POST /validate - Adressvalidierung")
             print(f"  GET  /health   - Health Check")
+            print(f"  GET  /metrics  - Prometheus Metriken")
+            print(f"  POST /jobs     - Datei-Job anlegen (CSV/NDJSON)")
+            print(f"  GET  /jobs/ID  - Job-Fortschritt, /jobs/ID/results?format=csv|ndjson|parquet")
             print("\nINFO: Drücken Sie Ctrl+C zum Beenden")
             
-            # Server läuft bis unterbrochen
+            # SIGTERM (Rolling Restart) und Ctrl+C fahren geordnet herunter
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, self._on_signal)
+            lifecycle.LIFECYCLE.mark_ready()
+            
+            # Server läuft bis zum Herunterfahren
             self.server.serve_forever()
             
         except KeyboardInterrupt:
@@ -494,7 +965,22 @@ class SwisspostHTTPProxy:
             print(f"ERROR: Server Fehler: {e}")
         finally:
             if self.server:
-                self.server.shutdown()
+                self.server.server_close()
+                lifecycle.flush_state()
+                lifecycle.LIFECYCLE.state = "stopped"
+                print("INFO: Server beendet")
+    
+    def _on_signal(self, signum, frame):
+        # serve_forever läuft im Hauptthread: shutdown() muss aus einem anderen Thread kommen
+        threading.Thread(target=self.shutdown, name="swisspost-shutdown", daemon=True).start()
+    
+    def shutdown(self):
+        """Readiness aus, laufende Requests abwarten (SWISSPOST_SHUTDOWN_TIMEOUT), dann Listener schliessen"""
+        if not lifecycle.LIFECYCLE.begin_drain():
+            return
+        print(f"\nINFO: Server wird beendet, warte auf {lifecycle.LIFECYCLE.in_flight} laufende Requests...")
+        lifecycle.LIFECYCLE.wait_idle()
+        self.server.shutdown()
 
 def main():
     """Hauptfunktion"""
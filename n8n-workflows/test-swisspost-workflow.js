@@ -14,7 +14,7 @@ const http = require('http');
 // Konfiguration
 const N8N_BASE_URL = process.env.N8N_BASE_URL || 'http://localhost:5678';
 const WEBHOOK_PATH = '/webhook/swisspost-validate';
-const MCP_PROXY_URL = 'http://localhost:3000';
+const MCP_PROXY_URL = process.env.MCP_PROXY_URL || 'http://localhost:3000';
 
 // Test-Adressen
 const testAddresses = [
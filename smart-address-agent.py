@@ -7,24 +7,61 @@ Nutzt Swisspost API für:
 - House number auto-completion (Hausnummer validieren)
 """
 
+import asyncio
 import os
-import json
 import re
 import time
 from typing import Any, Optional, Dict, List, Tuple
-import httpx
-from mcp.server import Server
-from mcp.types import Tool, TextContent
-import mcp.server.stdio
-from dotenv import load_dotenv
 
-# .env Datei laden (override=True um bereits gesetzte Variablen zu überschreiben)
-load_dotenv(override=True)
+# mcp, httpx und python-dotenv werden erst bei Bedarf importiert (schneller Start, siehe benchmarks/startup.py)
+from swisspost_mcp import adaptive, batch, certified, deadline, hedging, http_pool, memo, metrics, readiness, scheduler, serialization, speculation, tracing, transport
+from swisspost_mcp.cache import AUTOCOMPLETE_CACHE, make_key
+from swisspost_mcp.log import get_logger, payloads_enabled
+from swisspost_mcp.records import AddressInput, CorrectedAddress, Correction, ValidationResult, plain
 
 
-# Swisspost API Konfiguration
-OAUTH_TOKEN_URL = "https://api.post.ch/OAuth/token"
-API_BASE_URL = "https://dcapi.apis.post.ch/address/v1"
+def _load_dotenv() -> None:
+    """
+    .env Datei laden (override=True um bereits gesetzte Variablen zu überschreiben).
+    Sucht wie load_dotenv() ab dem Verzeichnis dieses Skripts aufwärts; python-dotenv
+    wird nur importiert, wenn tatsächlich eine .env gefunden wird.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path, override=True)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
+
+_load_dotenv()
+
+
+# Swisspost API Konfiguration (per Umgebungsvariable überschreibbar, z.B. für den lokalen Mock-Server)
+OAUTH_TOKEN_URL = os.getenv("SWISSPOST_OAUTH_TOKEN_URL", "https://api.post.ch/OAuth/token")
+API_BASE_URL = os.getenv("SWISSPOST_API_BASE_URL", "https://dcapi.apis.post.ch/address/v1").rstrip("/")
+
+# OAuth-Token direkt nach dem Start im Hintergrund holen statt beim ersten Tool-Aufruf
+PREWARM_TOKEN = os.getenv("SWISSPOST_PREWARM", "0").strip().lower() in ("1", "true", "yes")
+
+# Lokale Vorprüfung: aussichtslose Eingaben ohne Upstream-Aufruf als UNUSABLE beantworten
+PREFLIGHT_ENABLED = os.getenv("SWISSPOST_PREFLIGHT", "1").strip().lower() in ("1", "true", "yes")
+PREFLIGHT_REASONS = {
+    'street_missing': 'Keine Strasse angegeben',
+    'street_invalid': 'Strasse enthält keine Buchstaben',
+    'postcode_not_swiss': 'PLZ liegt nicht im Schweizer Bereich und es ist kein Ort angegeben',
+    'location_missing': 'Weder PLZ noch Ort angegeben',
+}
+
+# MCP Resource mit den Prometheus-Metriken dieses Prozesses
+METRICS_RESOURCE_URI = "metrics://swisspost/prometheus"
+
+logger = get_logger("agent")
 
 
 class TokenManager:
@@ -36,13 +73,29 @@ class TokenManager:
         self.scope = scope
         self.access_token: Optional[str] = None
         self.token_expires_at: float = 0
+        self._refresh: Optional[asyncio.Future] = None
     
     async def get_token(self) -> str:
         if self.access_token and time.time() < (self.token_expires_at - 30):
+            metrics.CACHE_REQUESTS.inc(cache="token", result="hit")
             return self.access_token
+        metrics.CACHE_REQUESTS.inc(cache="token", result="miss")
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        # Gleichzeitige Aufrufe (z.B. mehrere MCP-Sessions) teilen sich eine laufende Token-Anfrage
+        refresh = self._refresh
+        if refresh is None or refresh.get_loop() is not asyncio.get_running_loop():
+            refresh = self._refresh = asyncio.ensure_future(self._fetch_token())
+            refresh.add_done_callback(self._refresh_done)
+        return await asyncio.shield(refresh)
+    
+    def _refresh_done(self, refresh: asyncio.Future) -> None:
+        if self._refresh is refresh:
+            self._refresh = None
+    
+    async def _fetch_token(self) -> str:
+        started = time.perf_counter()
+        try:
+            response = await http_pool.client().post(
                 OAUTH_TOKEN_URL,
                 data={
                     "grant_type": "client_credentials",
@@ -55,17 +108,24 @@ class TokenManager:
                 },
                 timeout=10.0
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                self.access_token = data["access_token"]
-                expires_in = data.get("expires_in", 300)
-                self.token_expires_at = time.time() + expires_in
-                return self.access_token
-            else:
-                print(f"OAuth Debug: Status {response.status_code}")
-                print(f"OAuth Debug: Response {response.text}")
-                raise Exception(f"OAuth Fehler: {response.status_code} - {response.text}")
+        except Exception:
+            tracing.record_upstream("oauth", "error", metrics.observe_upstream("oauth", "error", started))
+            raise
+        status = str(response.status_code)
+        tracing.record_upstream("oauth", status, metrics.observe_upstream("oauth", status, started))
+        
+        if response.status_code == 200:
+            data = response.json()
+            self.access_token = data["access_token"]
+            expires_in = data.get("expires_in", 300)
+            self.token_expires_at = time.time() + expires_in
+            return self.access_token
+        else:
+            logger.warning("OAuth Fehler", extra={'http_status': response.status_code, 'body': response.text[:500]})
+            raise Exception(f"OAuth Fehler: {response.status_code} - {response.text}")
+
+
+HOUSE_NUMBER_IN_STREET2 = re.compile(r"^\d+[a-zA-Z]?([\/-]\d+[a-zA-Z]?)?$|^\d+\.\d+$")
 
 
 class AddressAnalyzer:
@@ -73,8 +133,32 @@ class AddressAnalyzer:
     
     @staticmethod
     def is_swiss_plz(value: str) -> bool:
-        """Prüft ob Wert eine Schweizer PLZ ist (4 Ziffern)"""
-        return bool(re.match(r'^\d{4}$', str(value).strip()))
+        """Prüft ob Wert eine Schweizer PLZ ist (4 Ziffern, 1000-9699 inkl. Liechtenstein)"""
+        value = str(value).strip()
+        return bool(re.match(r'^[0-9]{4}$', value)) and 1000 <= int(value) <= 9699
+    
+    @staticmethod
+    def has_letters(value: str) -> bool:
+        """Enthält der Wert mindestens einen Buchstaben (inkl. Umlaute/Akzente)?"""
+        return any(ch.isalpha() for ch in value)
+    
+    @classmethod
+    def preflight(cls, street_name: str, city: str, postcode: str) -> Optional[str]:
+        """
+        Lokale Vorprüfung der bereinigten Eingabe.
+        Returns: Grund-Code aus PREFLIGHT_REASONS, wenn keine Validierung gelingen kann, sonst None.
+        Bewusst zurückhaltend: vertauschte PLZ/Ort, falsche PLZ bei gültigem Ort und
+        fehlender Ort bei gültiger PLZ können die Korrekturpfade noch retten.
+        """
+        if not street_name:
+            return 'street_missing'
+        if not cls.has_letters(street_name):
+            return 'street_invalid'
+        if cls.is_swiss_plz(postcode) or cls.is_swiss_plz(city):
+            return None
+        if cls.has_letters(city) or cls.has_letters(postcode):
+            return None
+        return 'postcode_not_swiss' if postcode else 'location_missing'
     
     @staticmethod
     def normalize_street(street: str) -> Tuple[str, str]:
@@ -228,6 +312,64 @@ class AddressAnalyzer:
         
         return result
     
+    @staticmethod
+    def clean_garbage(text: str) -> str:
+        """Entfernt Müll-Strings wie '------', '???' oder '...'"""
+        if not text:
+            return text
+        text = text.strip()
+        # Entferne Strings ohne einen einzigen Buchstaben oder Ziffer (reine Zahlen bleiben erhalten)
+        if not any(ch.isalnum() for ch in text):
+            return ''
+        return text
+    
+    @classmethod
+    def normalize_input(cls, address: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Eingabe so, wie validate_smart sie vor dem ersten Upstream-Aufruf verwendet:
+        Müll-Filter, Strassen-Split, Hausnummer aus street2, Kapitalisierung von Strasse und Ort.
+        Enthält auch die bereinigten Zwischenwerte (`*_input`, `street_name_split`,
+        `street2_candidate`), aus denen validate_smart seine Korrekturen ableitet.
+        Der Cache-Warm-up plant seine Lookups mit denselben Werten.
+        """
+        street = cls.clean_garbage(str(address.get('street', '')))
+        street2 = cls.clean_garbage(str(address.get('street2', '')).strip())
+        city = cls.clean_garbage(str(address.get('city', '')).strip())
+        postcode = cls.clean_garbage(str(address.get('postcode', '')).strip())
+        
+        # Strasse splitten (ohne weitere Korrekturen)
+        street_name, house_no = cls.normalize_street(street)
+        
+        # street2 Logik: Hausnummer aus street2 verwenden, wenn street keine hat
+        # Erlaube typische Hausnummern-Formate: 18, 18a, 18/2, 64-66, 12-12a, 12.2
+        street2_final = street2
+        street2_candidate = ''
+        if street2 and not house_no:
+            # Vorab leichte Normalisierung: Kommas entfernen, Mehrfach-Leerzeichen reduzieren
+            street2_candidate = re.sub(r",\s*", " ", street2).strip()
+            street2_candidate = re.sub(r"\s+", " ", street2_candidate)
+            # Vollständiger Match ohne Wörter wie 'Apt', 'Nr', etc.: nur Hausnummern-Muster zulassen
+            if HOUSE_NUMBER_IN_STREET2.match(street2_candidate):
+                house_no = street2_candidate
+                # street2 leeren, da Hausnummer übernommen wurde
+                street2_final = ""
+        elif street2 and house_no:
+            # street2 nur Großbuchstaben prüfen (nicht für Adresse wichtig)
+            street2_final = street2.upper() if street2.islower() else street2
+        
+        return {
+            'street': street,
+            'street2_input': street2,
+            'street2': street2_final,
+            'street2_candidate': street2_candidate,
+            'street_name_split': street_name,
+            'street_name': cls.capitalize_street_name(street_name),
+            'house_no': house_no,
+            'city_input': city,
+            'city': cls.capitalize_street_name(city),
+            'postcode': postcode,
+        }
+    
     @staticmethod
     def capitalize_street_name(street_name: str) -> str:
         """Kapitalisiert den ersten Buchstaben des Straßennamens, falls nötig."""
@@ -321,7 +463,7 @@ class SmartAddressAgent:
     """Intelligenter Adress-Agent mit Swisspost Autocomplete"""
     
     def __init__(self):
-        self.server = Server("smart-address-agent")
+        self._server: Any = None
         
         # OAuth2 Setup
         client_id = os.getenv("SWISSPOST_CLIENT_ID")
@@ -329,21 +471,100 @@ class SmartAddressAgent:
         scope = os.getenv("SWISSPOST_SCOPE", "DCAPI_ADDRESS_VALIDATE DCAPI_ADDRESS_AUTOCOMPLETE")
         
         if not client_id or not client_secret:
-            print(f"DEBUG: CLIENT_ID = '{client_id}'")
-            print(f"DEBUG: CLIENT_SECRET = '{client_secret}'")
-            print(f"DEBUG: .env Datei vorhanden: {os.path.exists('.env')}")
+            logger.error(
+                "Swisspost Credentials fehlen",
+                extra={
+                    'client_id_set': bool(client_id),
+                    'client_secret_set': bool(client_secret),
+                    'dotenv_present': os.path.exists('.env')
+                }
+            )
             raise ValueError("SWISSPOST_CLIENT_ID und SWISSPOST_CLIENT_SECRET müssen gesetzt sein")
         
         self.token_manager = TokenManager(client_id, client_secret, scope)
         self.analyzer = AddressAnalyzer()
-        
-        self.setup_tools()
+        # Im Netzwerk-Modus (run) pro Session begrenzt; stdio hat nur eine Session
+        self.session_limiter = transport.SessionLimiter(limit=0)
+    
+    @property
+    def server(self) -> Any:
+        """
+        MCP Server mit registrierten Tools. Wird erst beim ersten Zugriff erstellt:
+        Proxy, Jobs und Warm-up nutzen nur validate_smart und sparen so den Import von mcp.
+        """
+        if self._server is None:
+            from mcp.server import Server
+            self._server = Server("smart-address-agent")
+            self.setup_tools()
+        return self._server
     
     def setup_tools(self):
         """Registriere Tools"""
+        from mcp.types import Resource, TextContent, Tool
         
         @self.server.list_tools()
         async def list_tools() -> list[Tool]:
+            address_properties = {
+                "firstname": {
+                    "type": "string",
+                    "description": "Vorname (optional)"
+                },
+                "lastname": {
+                    "type": "string",
+                    "description": "Nachname (optional)"
+                },
+                "company": {
+                    "type": "string",
+                    "description": "Firma (optional)"
+                },
+                "street": {
+                    "type": "string",
+                    "description": "Strasse mit oder ohne Hausnummer"
+                },
+                "city": {
+                    "type": "string",
+                    "description": "Ort"
+                },
+                "postcode": {
+                    "type": "string",
+                    "description": "Postleitzahl"
+                },
+                "debug_timing": {
+                    "type": "boolean",
+                    "description": "Ergebnis um einen Trace (Upstream-Aufrufe, Dauer, Cache) ergänzen"
+                },
+                "priority": {
+                    "type": "string",
+                    "enum": list(scheduler.PRIORITIES),
+                    "description": (
+                        "Prioritätsklasse für Upstream-Aufrufe: interactive, normal "
+                        "oder bulk (Standard: SWISSPOST_DEFAULT_PRIORITY)"
+                    )
+                },
+                "speculative": {
+                    "type": "boolean",
+                    "description": (
+                        "Korrekturstrategien parallel validieren (schneller, dafür mehr "
+                        "Upstream-Aufrufe; Standard: SWISSPOST_SPECULATIVE)"
+                    )
+                },
+                "timeout_ms": {
+                    "type": "integer",
+                    "description": (
+                        "Deadline in ms: danach werden offene Upstream-Aufrufe abgebrochen und das "
+                        "beste bisherige Ergebnis geliefert (Standard: SWISSPOST_REQUEST_TIMEOUT_MS)"
+                    )
+                },
+                "response_profile": {
+                    "type": "string",
+                    "enum": list(serialization.RESPONSE_PROFILES),
+                    "description": (
+                        "Antwortumfang: full (Standard), compact (ohne Einrückung, "
+                        "gekürzte validation) oder minimal (quality, score, corrected)"
+                    )
+                }
+            }
+            
             return [
                 Tool(
                     name="validate_address_smart",
@@ -355,112 +576,206 @@ class SmartAddressAgent:
                         "4. Nutzt House-Autocomplete für Hausnummer\n"
                         "5. Validiert finale Adresse und gibt Score zurück"
                     ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": address_properties,
+                        "required": ["street", "city", "postcode"]
+                    }
+                ),
+                Tool(
+                    name="validate_addresses_batch",
+                    description=(
+                        "Validiert mehrere Adressen wie validate_address_smart. Meldet den Fortschritt "
+                        "(Progress-Notifications, falls ein progressToken gesetzt ist) und liefert mit "
+                        "partial_results fertige Ergebnisse laufend als Log-Notifications. "
+                        "Ein Abbruch des Aufrufs stoppt alle offenen Validierungen."
+                    ),
                     inputSchema={
                         "type": "object",
                         "properties": {
-                            "firstname": {
-                                "type": "string",
-                                "description": "Vorname (optional)"
-                            },
-                            "lastname": {
-                                "type": "string",
-                                "description": "Nachname (optional)"
+                            "addresses": {
+                                "type": "array",
+                                "maxItems": batch.MAX_ADDRESSES,
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        key: value for key, value in address_properties.items()
+                                        if key != "response_profile"
+                                    },
+                                    "required": ["street", "city", "postcode"]
+                                },
+                                "description": "Adressen (Felder wie bei validate_address_smart)"
                             },
-                            "company": {
-                                "type": "string",
-                                "description": "Firma (optional)"
+                            "priority": {
+                                **address_properties["priority"],
+                                "description": "Prioritätsklasse für Adressen ohne eigene priority"
                             },
-                            "street": {
-                                "type": "string",
-                                "description": "Strasse mit oder ohne Hausnummer"
+                            "response_profile": address_properties["response_profile"],
+                            "partial_results": {
+                                "type": "boolean",
+                                "description": (
+                                    "Ergebnisse paketweise als Log-Notifications senden (logger "
+                                    "validate_addresses_batch); die Antwort enthält dann nur die Übersicht"
+                                )
                             },
-                            "city": {
-                                "type": "string",
-                                "description": "Ort"
-                            },
-                            "postcode": {
-                                "type": "string",
-                                "description": "Postleitzahl"
+                            "chunk_size": {
+                                "type": "integer",
+                                "minimum": 1,
+                                "description": f"Ergebnisse pro Paket (Standard: {batch.CHUNK_SIZE})"
                             }
                         },
-                        "required": ["street", "city", "postcode"]
+                        "required": ["addresses"]
                     }
                 )
             ]
         
+        @self.server.list_resources()
+        async def list_resources() -> list[Resource]:
+            return [
+                Resource(
+                    uri=METRICS_RESOURCE_URI,
+                    name="metrics",
+                    description="Prometheus-Metriken (Upstream-Latenzen, Phasen, Cache-Treffer)",
+                    mimeType="text/plain"
+                )
+            ]
+        
+        @self.server.read_resource()
+        async def read_resource(uri: Any) -> str:
+            if str(uri) == METRICS_RESOURCE_URI:
+                return metrics.render()
+            raise ValueError(f"Unbekannte Resource: {uri}")
+        
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Any) -> list[TextContent]:
             if name == "validate_address_smart":
-                result = await self.validate_smart(arguments)
+                async with self.session_limiter.slot(self._current_session()):
+                    result = await self.validate_smart(arguments)
+                profile = serialization.resolve_profile(arguments.get('response_profile'))
                 return [TextContent(
                     type="text",
-                    text=json.dumps(result, indent=2, ensure_ascii=False)
+                    text=serialization.dumps(serialization.shape_result(result, profile), profile)
                 )]
+            elif name == "validate_addresses_batch":
+                async with self.session_limiter.slot(self._current_session()):
+                    response = await self.validate_batch(arguments)
+                profile = serialization.resolve_profile(arguments.get('response_profile'))
+                return [TextContent(type="text", text=serialization.dumps(response, profile))]
             else:
                 raise ValueError(f"Unbekanntes Tool: {name}")
     
-    async def validate_smart(self, address: Dict) -> Dict:
-        """Intelligente Validierung mit Autocomplete"""
-        
-        corrections = []
+    async def validate_smart(self, address: Dict) -> ValidationResult:
+        """
+        Intelligente Validierung mit Autocomplete.
+        Mit `debug_timing` enthält das Ergebnis einen `trace` mit allen Upstream-Aufrufen.
+        Identische Validierungs-Payloads werden pro Aufruf nur einmal gesendet.
+        Upstream-Aufrufe laufen über den Prioritäts-Scheduler (`priority`).
+        Mit `timeout_ms` endet der Aufruf spätestens nach der Deadline mit dem besten Teilergebnis.
+        """
+        trace = tracing.RequestTrace(detailed=bool(address.get('debug_timing')))
+        stages = metrics.StageTimer(trace)
+        validation_memo = memo.RequestMemo("validation_memo", "/addresses/validation")
+        timeout = deadline.resolve_timeout(address.get('timeout_ms'))
+        request_deadline = time.monotonic() + timeout if timeout is not None else None
+        best = deadline.BestSoFar(self.quality_to_score)
+        trace_token = tracing.activate(trace)
+        memo_token = memo.activate(validation_memo)
+        best_token = deadline.activate(best)
+        priority_tokens = scheduler.activate(scheduler.resolve_priority(address.get('priority')), request_deadline)
+        try:
+            if timeout is None:
+                result = await self._validate_smart(address, stages)
+            else:
+                try:
+                    # Bei Ablauf bricht wait_for alle offenen Upstream-Aufrufe des Requests ab
+                    result = await asyncio.wait_for(self._validate_smart(address, stages), timeout)
+                except (asyncio.TimeoutError, scheduler.DeadlineExceeded):
+                    # Scheduler-Abweisung vor der Deadline ist Überlast, kein Timeout
+                    if time.monotonic() < request_deadline - 0.05:
+                        raise
+                    result = self._deadline_result(address, stages, best, timeout)
+        finally:
+            scheduler.deactivate(priority_tokens)
+            deadline.deactivate(best_token)
+            memo.deactivate(memo_token)
+            tracing.deactivate(trace_token)
+            stages.finish()
+            trace.finish(address)
         
-        # Schritt 1: Eingabe analysieren
-        street_raw = str(address.get('street', ''))
+        metrics.VALIDATIONS.inc(quality=result.get('quality', 'UNUSABLE'))
+        store = certified.get_store()
+        if store is not None and result.get('quality') in certified.QUALITIES and 'previously_certified' not in result:
+            store.add(result['corrected'], result['quality'])
+        if trace.detailed:
+            result['trace'] = trace.to_dict()
+            result['trace']['validation_calls_avoided'] = validation_memo.avoided
+        return result
+    
+    def _deadline_result(self, address: Dict, stages: metrics.StageTimer, best: deadline.BestSoFar,
+                         timeout: float) -> ValidationResult:
+        """Ergebnis nach Ablauf der Deadline: beste bisherige Validierung, sonst die unvalidierte Eingabe"""
+        street_raw = str(address.get('street', '')).strip()
         street2_raw = str(address.get('street2', '')).strip()
         city_raw = str(address.get('city', '')).strip()
         postcode_raw = str(address.get('postcode', '')).strip()
+        company_raw = str(address.get('company', '')).strip()
+        corrections = []
+        if best.validation is not None:
+            street_name, house_no = self._enforce_api_street(
+                best.validation, best.data.get('street_name', ''), best.data.get('house_number', ''), corrections
+            )
+            result = self._finalize_result(
+                address, corrections, stages, best.validation, best.quality,
+                street_name, house_no, best.data.get('city', ''), best.data.get('postcode', ''),
+                street_raw, street2_raw, city_raw, company_raw
+            )
+        else:
+            street_name, house_no = self.analyzer.normalize_street(street_raw)
+            result = self._finalize_result(
+                address, corrections, stages, {}, 'UNUSABLE',
+                street_name, house_no, city_raw, postcode_raw,
+                street_raw, street2_raw, city_raw, company_raw
+            )
+        deadline.DEADLINE_EXCEEDED.inc(outcome="best_effort" if best.validation is not None else "no_result")
+        logger.info("Deadline abgelaufen", extra={'timeout_ms': round(timeout * 1000), 'quality': result['quality']})
+        result['deadline_exceeded'] = {
+            'timeout_ms': round(timeout * 1000),
+            'elapsed_ms': best.elapsed_ms(),
+            'partial': best.validation is not None
+        }
+        return result
+    
+    async def _validate_smart(self, address: Dict, stages: metrics.StageTimer) -> ValidationResult:
+        """Korrektur- und Validierungsablauf (Phasen werden über `stages` gemessen)"""
         
-        # Müll-Filter für alle Felder
-        def clean_garbage(text: str) -> str:
-            """Entfernt Müll-Strings wie '------' oder nur Zahlen/Bindestriche"""
-            if not text:
-                return text
-            text = text.strip()
-            # Entferne Strings die nur aus Bindestrichen, Unterstrichen oder Leerzeichen bestehen (aber nicht reine Zahlen)
-            if re.match(r'^[\s\-_]+$', text):
-                return ''
-            return text
+        corrections = []
         
-        street_raw = clean_garbage(street_raw)
-        street2_raw = clean_garbage(street2_raw)
-        city_raw = clean_garbage(city_raw)
-        postcode_raw = clean_garbage(postcode_raw)
+        # Schritt 1: Eingabe analysieren (Müll-Filter, Strassen-Split, street2, Kapitalisierung)
+        normalized = self.analyzer.normalize_input(address)
+        street_raw = normalized['street']
+        street2_raw = normalized['street2']
+        city_raw = normalized['city_input']
+        postcode_raw = normalized['postcode']
+        street_name_raw = normalized['street_name_split']
+        house_no_raw = normalized['house_no']
         
         # Company auch bereinigen
-        company_raw = clean_garbage(str(address.get('company', '')))
+        company_raw = self.analyzer.clean_garbage(str(address.get('company', '')))
         
-        # Strasse splitten (ohne weitere Korrekturen)
-        street_name_raw, house_no_raw = self.analyzer.normalize_street(street_raw)
-        
-        # street2 Logik: Hausnummer aus street2 verwenden, wenn street keine hat
-        # Erlaube typische Hausnummern-Formate: 18, 18a, 18/2, 64-66, 12-12a, 12.2
-        if street2_raw and not house_no_raw:
-            # Vorab leichte Normalisierung: Kommas entfernen, Mehrfach-Leerzeichen reduzieren
-            street2_candidate = re.sub(r",\s*", " ", street2_raw).strip()
-            street2_candidate = re.sub(r"\s+", " ", street2_candidate)
-            # Vollständiger Match ohne Wörter wie 'Apt', 'Nr', etc.: nur Hausnummern-Muster zulassen
-            house2_pattern = re.compile(r"^\d+[a-zA-Z]?([\/-]\d+[a-zA-Z]?)?$|^\d+\.\d+$")
-            if house2_pattern.match(street2_candidate):
-                house_no_raw = street2_candidate
-                # street2 leeren, da Hausnummer übernommen wurde
-                street2_raw = ""
-            corrections.append({
-                    'type': 'house_number_from_street2',
-                    'message': 'Hausnummer aus street2 übernommen',
-                    'old': '',
-                    'new': street2_candidate
-                })
-        elif street2_raw and house_no_raw:
-            # street2 nur Großbuchstaben prüfen (nicht für Adresse wichtig)
-            street2_capitalized = street2_raw.upper() if street2_raw.islower() else street2_raw
-            if street2_capitalized != street2_raw:
-                corrections.append({
-                    'type': 'street2_capitalized',
-                    'message': 'street2 in Großbuchstaben korrigiert',
-                    'old': street2_raw,
-                    'new': street2_capitalized
-                })
-                street2_raw = street2_capitalized
+        if normalized['street2_candidate']:
+            corrections.append(Correction(
+                    type='house_number_from_street2',
+                    message='Hausnummer aus street2 übernommen',
+                    old='',
+                    new=normalized['street2_candidate']
+                ))
+        elif street2_raw != normalized['street2_input']:
+            corrections.append(Correction(
+                type='street2_capitalized',
+                message='street2 in Großbuchstaben korrigiert',
+                old=normalized['street2_input'],
+                new=street2_raw
+            ))
         
         # Originale Werte für Korrektur-Logging konservieren
         original_street_name = street_name_raw
@@ -471,45 +786,101 @@ class SmartAddressAgent:
         # Prüfe ob Komma entfernt wurde
         street_normalized = re.sub(r',\s*', ' ', street_raw)
         if street_normalized != street_raw:
-            corrections.append({
-                'type': 'comma_removed_from_street',
-                'message': 'Komma aus Straßenname entfernt',
-                'old': street_raw,
-                'new': street_normalized
-            })
+            corrections.append(Correction(
+                type='comma_removed_from_street',
+                message='Komma aus Straßenname entfernt',
+                old=street_raw,
+                new=street_normalized
+            ))
         
         # Prüfe ob Hausnummer am Anfang war und Korrektur hinzufügen
         if house_no_raw and street_raw != f"{street_name_raw} {house_no_raw}".strip():
             # Hausnummer war am Anfang, wurde aber bereits von normalize_street korrigiert
-                corrections.append({
-                'type': 'house_number_moved_to_end',
-                'message': 'Hausnummer vom Anfang der Straße ans Ende verschoben',
-                'old': street_raw,
-                'new': f"{street_name_raw} {house_no_raw}".strip()
-            })
+                corrections.append(Correction(
+                type='house_number_moved_to_end',
+                message='Hausnummer vom Anfang der Straße ans Ende verschoben',
+                old=street_raw,
+                new=f"{street_name_raw} {house_no_raw}".strip()
+            ))
         
         # Straßenname-Kapitalisierung prüfen
-        street_name_capitalized = self.analyzer.capitalize_street_name(street_name_raw)
+        street_name_capitalized = normalized['street_name']
         if street_name_capitalized != street_name_raw:
-            corrections.append({
-                'type': 'street_name_capitalized',
-                'message': 'Straßenname mit Großbuchstaben am Anfang korrigiert',
-                'old': street_name_raw,
-                'new': street_name_capitalized
-            })
+            corrections.append(Correction(
+                type='street_name_capitalized',
+                message='Straßenname mit Großbuchstaben am Anfang korrigiert',
+                old=street_name_raw,
+                new=street_name_capitalized
+            ))
             street_name_raw = street_name_capitalized
 
         # Ortsname-Kapitalisierung prüfen
-        city_capitalized = self.analyzer.capitalize_street_name(city_raw)
+        city_capitalized = normalized['city']
         if city_capitalized != city_raw:
-            corrections.append({
-                'type': 'city_capitalized',
-                'message': 'Ortsname mit Großbuchstaben am Anfang korrigiert',
-                    'old': city_raw,
-                'new': city_capitalized
-            })
+            corrections.append(Correction(
+                type='city_capitalized',
+                message='Ortsname mit Großbuchstaben am Anfang korrigiert',
+                    old=city_raw,
+                new=city_capitalized
+            ))
             city_raw = city_capitalized
         
+        stages.mark("normalization")
+        
+        # Schritt 1b: Lokale Vorprüfung – aussichtslose Eingaben verbrauchen kein Upstream-Kontingent
+        preflight_reason = self.analyzer.preflight(street_name_raw, city_raw, postcode_raw) if PREFLIGHT_ENABLED else None
+        if preflight_reason is not None:
+            metrics.PREFLIGHT_REJECTIONS.inc(reason=preflight_reason)
+            result = self._finalize_result(
+                address, corrections, stages, {}, 'UNUSABLE',
+                street_name_raw, house_no_raw, city_raw, postcode_raw,
+                street_raw, street2_raw, city_raw, company_raw
+            )
+            result['preflight'] = {'reason': preflight_reason, 'message': PREFLIGHT_REASONS[preflight_reason]}
+            return result
+        
+        # Schritt 1c: Bereits zertifizierte Adresse? (Fingerprint-Store, optional)
+        store = certified.get_store()
+        certified_entry = None
+        if store is not None:
+            company_candidate = self.analyzer.normalize_company_legal_forms(company_raw) if company_raw else ""
+            candidate = self.analyzer.format_corrected_output(
+                street_name_raw, house_no_raw, city_raw, postcode_raw,
+                address.get('firstname', ''), address.get('lastname', ''), company_candidate
+            )
+            certified_entry = store.lookup(candidate)
+            stages.mark("certified_lookup")
+            if certified_entry is not None and not certified_entry['verify']:
+                if company_raw and company_candidate != company_raw:
+                    corrections.append(Correction(
+                        type='company_legal_form_normalized',
+                        message='Rechtsform in Firmenname normalisiert',
+                        old=company_raw,
+                        new=company_candidate
+                    ))
+                result = ValidationResult(
+                    status='success',
+                    quality=certified_entry['quality'],
+                    score=self.quality_to_score(certified_entry['quality']),
+                    corrections=corrections,
+                    input=AddressInput(
+                        street=street_raw,
+                        street2=street2_raw,
+                        city=city_raw,
+                        postcode=postcode_raw,
+                        firstname=address.get('firstname', ''),
+                        lastname=address.get('lastname', ''),
+                        company=address.get('company', '')
+                    ),
+                    corrected=CorrectedAddress.from_mapping(candidate),
+                    # Gleiche Form wie eine Upstream-Antwort (quality), dazu die Herkunft
+                    validation={'quality': certified_entry['quality'], 'source': 'certified_store'}
+                )
+                result['previously_certified'] = {
+                    'certified_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(certified_entry['certified_at']))
+                }
+                return result
+        
         # Schritt 1a: Erste Validierung OHNE Änderungen (keine Abkürzungen, kein Swap, kein Autocomplete)
         initial_validation = await self.call_validation_api({
             'firstname': address.get('firstname', ''),
@@ -521,6 +892,10 @@ class SmartAddressAgent:
             'postcode': postcode_raw
         })
         initial_quality = initial_validation.get('response', {}).get('quality', 'UNUSABLE')
+        stages.mark("initial_validation")
+        if certified_entry is not None and initial_quality not in certified.QUALITIES:
+            # Stichprobe: Adresse ist nicht mehr zertifiziert
+            store.discard(candidate)
         if initial_quality in ("DOMICILE_CERTIFIED", "CERTIFIED"):
             # Sofort zurückgeben – Post hat die Adresse bereits ohne Änderungen akzeptiert
             quality = initial_quality
@@ -532,65 +907,65 @@ class SmartAddressAgent:
             company_normalized_early = self.analyzer.normalize_company_legal_forms(company_raw_early) if company_raw_early else ""
             company_formatted = company_normalized_early
             if company_raw_early and company_normalized_early != company_raw_early:
-                corrections.append({
-                    'type': 'company_legal_form_normalized',
-                    'message': 'Rechtsform in Firmenname normalisiert',
-                    'old': company_raw_early,
-                    'new': company_normalized_early
-                })
+                corrections.append(Correction(
+                    type='company_legal_form_normalized',
+                    message='Rechtsform in Firmenname normalisiert',
+                    old=company_raw_early,
+                    new=company_normalized_early
+                ))
             # Straße/Hausnummer aus API erzwingen, falls abweichend
             api_addr = initial_validation.get('response', {}).get('address', {})
             api_house = api_addr.get('geographicLocation', {}).get('house', {})
             api_street_name = api_house.get('street', '')
             api_house_number = api_house.get('houseNumber', '')
             if api_street_name and api_street_name != street_name_raw:
-                corrections.append({
-                    'type': 'street_from_api_enforced',
-                    'message': 'Strasse aus SwissPost API übernommen',
-                    'old': street_name_raw,
-                    'new': api_street_name
-                })
+                corrections.append(Correction(
+                    type='street_from_api_enforced',
+                    message='Strasse aus SwissPost API übernommen',
+                    old=street_name_raw,
+                    new=api_street_name
+                ))
                 street_name_raw = api_street_name
             if api_house_number and api_house_number != house_no_raw:
-                corrections.append({
-                    'type': 'house_number_from_api_enforced',
-                    'message': 'Hausnummer aus SwissPost API übernommen',
-                    'old': house_no_raw,
-                    'new': api_house_number
-                })
+                corrections.append(Correction(
+                    type='house_number_from_api_enforced',
+                    message='Hausnummer aus SwissPost API übernommen',
+                    old=house_no_raw,
+                    new=api_house_number
+                ))
                 house_no_raw = api_house_number
             corrected_formatted = self.analyzer.format_corrected_output(
                 street_name_raw, house_no_raw, city_raw, postcode_raw,
                 firstname_formatted, lastname_formatted, company_formatted
             )
-            return {
-                'status': 'success',
-                'quality': quality,
-                'score': score,
-                'corrections': corrections,
-                'input': {
-                    'street': street_raw,
-                    'street2': street2_raw,
-                    'city': city_raw,
-                    'postcode': postcode_raw,
-                    'firstname': address.get('firstname', ''),
-                    'lastname': address.get('lastname', ''),
-                    'company': address.get('company', '')
-                },
-                'corrected': corrected_formatted,
-                'validation': initial_validation.get('response', {}),
-                'has_corrections': len(corrections) > 0
-            }
+            stages.mark("formatting")
+            return ValidationResult(
+                status='success',
+                quality=quality,
+                score=score,
+                corrections=corrections,
+                input=AddressInput(
+                    street=street_raw,
+                    street2=street2_raw,
+                    city=city_raw,
+                    postcode=postcode_raw,
+                    firstname=address.get('firstname', ''),
+                    lastname=address.get('lastname', ''),
+                    company=address.get('company', '')
+                ),
+                corrected=CorrectedAddress.from_mapping(corrected_formatted),
+                validation=initial_validation.get('response', {})
+            )
         
         # Ab hier: Korrekturpfad, da erste Validierung nicht CERTIFIED/DOMICILE_CERTIFIED
         # PLZ/Ort-Vertauschung erkennen (ab jetzt erlaubt)
         if self.analyzer.is_swiss_plz(city_raw) and not self.analyzer.is_swiss_plz(postcode_raw):
-            corrections.append({
-                'type': 'swap_plz_city',
-                'message': 'PLZ und Ort waren vertauscht',
-                'old': {'postcode': original_postcode, 'city': original_city},
-                'new': {'postcode': city_raw, 'city': postcode_raw}
-            })
+            corrections.append(Correction(
+                type='swap_plz_city',
+                message='PLZ und Ort waren vertauscht',
+                old={'postcode': original_postcode, 'city': original_city},
+                new={'postcode': city_raw, 'city': postcode_raw}
+            ))
             postcode_raw, city_raw = city_raw, postcode_raw
         
         # City-Korrektur NICHT mehr im frühen Pfad durchführen,
@@ -600,24 +975,45 @@ class SmartAddressAgent:
         # Schritt 3: Abkürzungen erweitern
         street_expanded = self.analyzer.expand_street_abbreviations(street_name_raw)
         if street_expanded != street_name_raw:
-            corrections.append({
-                'type': 'street_abbreviation_expanded',
-                'message': f'Strassen-Abkürzung erweitert',
-                'old': original_street_name,
-                'new': street_expanded
-            })
+            corrections.append(Correction(
+                type='street_abbreviation_expanded',
+                message=f'Strassen-Abkürzung erweitert',
+                old=original_street_name,
+                new=street_expanded
+            ))
             street_name_raw = street_expanded
         
+        # Optional: Korrekturstrategien spekulativ parallel validieren (first-certified-wins)
+        speculative_best = None
+        corrections_before_speculation = list(corrections)
+        if speculation.is_enabled(address.get('speculative')):
+            speculative_best = await self._speculative_correction(
+                address, street_name_raw, house_no_raw, city_final, postcode_raw,
+                original_street_name, original_house_no
+            )
+            stages.mark("speculative_correction")
+            if speculative_best is not None and speculative_best['quality'] in ("DOMICILE_CERTIFIED", "CERTIFIED"):
+                corrections.extend(speculative_best['corrections'])
+                street_name_raw, house_no_raw = self._enforce_api_street(
+                    speculative_best['validation'], speculative_best['street_name'],
+                    speculative_best['house_number'], corrections
+                )
+                return self._finalize_result(
+                    address, corrections, stages, speculative_best['validation'], speculative_best['quality'],
+                    street_name_raw, house_no_raw, speculative_best['city'], speculative_best['postcode'],
+                    street_raw, street2_raw, city_raw, company_raw
+                )
+        
         # Schritt 4: Street Autocomplete - korrekte Schreibweise
         if postcode_raw and street_name_raw:
             street_corrected = await self.autocomplete_street(postcode_raw, street_name_raw)
             if street_corrected and street_corrected != street_name_raw:
-                corrections.append({
-                    'type': 'street_corrected',
-                    'message': f'Strassenname korrigiert via Street-Lookup',
-                    'old': original_street_name,
-                    'new': street_corrected
-                })
+                corrections.append(Correction(
+                    type='street_corrected',
+                    message=f'Strassenname korrigiert via Street-Lookup',
+                    old=original_street_name,
+                    new=street_corrected
+                ))
                 street_name_raw = street_corrected
         
         # Schritt 5: House Autocomplete - Hausnummer validieren
@@ -626,13 +1022,14 @@ class SmartAddressAgent:
                 postcode_raw, street_name_raw, house_no_raw
             )
             if house_validated and house_validated != house_no_raw:
-                corrections.append({
-                    'type': 'house_number_corrected',
-                    'message': f'Hausnummer korrigiert via House-Lookup',
-                    'old': original_house_no,
-                    'new': house_validated
-                })
+                corrections.append(Correction(
+                    type='house_number_corrected',
+                    message=f'Hausnummer korrigiert via House-Lookup',
+                    old=original_house_no,
+                    new=house_validated
+                ))
                 house_no_raw = house_validated
+        stages.mark("street_house_autocomplete")
         
         # Schritt 6: Finale Validierung
         validation_result = await self.call_validation_api({
@@ -648,26 +1045,10 @@ class SmartAddressAgent:
         quality = validation_result.get('response', {}).get('quality', 'UNUSABLE')
         
         # Straße/Hausnummer aus finaler API-Antwort erzwingen, falls abweichend
-        final_addr = validation_result.get('response', {}).get('address', {})
-        final_house = final_addr.get('geographicLocation', {}).get('house', {})
-        final_street_name = final_house.get('street', '')
-        final_house_number = final_house.get('houseNumber', '')
-        if final_street_name and final_street_name != street_name_raw:
-            corrections.append({
-                'type': 'street_from_api_enforced',
-                'message': 'Strasse aus SwissPost API übernommen',
-                'old': street_name_raw,
-                'new': final_street_name
-            })
-            street_name_raw = final_street_name
-        if final_house_number and final_house_number != house_no_raw:
-            corrections.append({
-                'type': 'house_number_from_api_enforced',
-                'message': 'Hausnummer aus SwissPost API übernommen',
-                'old': house_no_raw,
-                'new': final_house_number
-            })
-            house_no_raw = final_house_number
+        street_name_raw, house_no_raw = self._enforce_api_street(
+            validation_result, street_name_raw, house_no_raw, corrections
+        )
+        stages.mark("final_validation")
 
         # Zusätzliche Korrekturlogik auch bei schwachen Ergebnissen (UNUSABLE/COMPROMISED/VERIFIED):
         # 0) Setze Ort aus PLZ (ZIP→City), 1) Prüfe Strasse in anderen PLZs für den Ort, 2) House-Autocomplete
@@ -675,15 +1056,17 @@ class SmartAddressAgent:
             # 0) Ort aus PLZ ermitteln und ggf. erzwingen
             try:
                 city_from_zip = await self.autocomplete_zip(postcode_raw, city_final)
+            except scheduler.DeadlineExceeded:
+                raise
             except Exception:
                 city_from_zip = None
             if city_from_zip and city_from_zip != city_final:
-                corrections.append({
-                    'type': 'city_corrected_from_zip',
-                    'message': f"Ort anhand PLZ korrigiert (PLZ {postcode_raw} gehört zu '{city_from_zip}')",
-                    'old': city_final,
-                    'new': city_from_zip
-                })
+                corrections.append(Correction(
+                    type='city_corrected_from_zip',
+                    message=f"Ort anhand PLZ korrigiert (PLZ {postcode_raw} gehört zu '{city_from_zip}')",
+                    old=city_final,
+                    new=city_from_zip
+                ))
                 city_final = city_from_zip
                 re_after_zip_city = await self.call_validation_api({
                     'firstname': address.get('firstname', ''),
@@ -698,63 +1081,60 @@ class SmartAddressAgent:
                 quality = re_after_zip_city.get('response', {}).get('quality', quality)
 
             try:
-                token = await self.token_manager.get_token()
-                async with httpx.AsyncClient() as client:
-                    resp_z_by_city = await client.get(
-                        f"{API_BASE_URL}/zips",
-                        headers={"Authorization": f"Bearer {token}"},
-                        params={"zipCity": city_final, "type": "DOMICILE"},
-                        timeout=10.0
-                    )
-                    if resp_z_by_city.status_code == 200:
-                        zips_for_city = resp_z_by_city.json().get('zips', [])
-                        for entry in zips_for_city:
-                            candidate_zip = str(entry.get('zip', '')).strip()
-                            if not candidate_zip:
-                                continue
-                            try:
-                                street_in_candidate = await self.autocomplete_street(candidate_zip, street_name_raw)
-                            except Exception:
-                                street_in_candidate = None
-                            if street_in_candidate:
-                                if candidate_zip != postcode_raw:
-                                    corrections.append({
-                                        'type': 'zip_corrected_from_street',
-                                        'message': 'PLZ anhand Strasse+Ort korrigiert',
-                                        'old': postcode_raw,
-                                        'new': candidate_zip
-                                    })
-                                    postcode_raw = candidate_zip
-                                chosen_city = entry.get('city18') or entry.get('city27') or city_final
-                                if chosen_city != city_final:
-                                    corrections.append({
-                                        'type': 'city_corrected_from_street_zip',
-                                        'message': 'Ort anhand Strasse+PLZ korrigiert',
-                                        'old': city_final,
-                                        'new': chosen_city
-                                    })
-                                    city_final = chosen_city
-                                if street_in_candidate != street_name_raw:
-                                    corrections.append({
-                                        'type': 'street_corrected_from_zip_search',
-                                        'message': 'Strassenname via Street-Lookup (nach ZIP-Suche) korrigiert',
-                                        'old': street_name_raw,
-                                        'new': street_in_candidate
-                                    })
-                                    street_name_raw = street_in_candidate
-                                # Re-Validierung nach ZIP/City-Korrektur
-                                re_validation_zip2 = await self.call_validation_api({
-                                    'firstname': address.get('firstname', ''),
-                                    'lastname': address.get('lastname', ''),
-                                    'company': address.get('company', ''),
-                                    'street_name': street_name_raw,
-                                    'house_number': house_no_raw,
-                                    'city': city_final,
-                                    'postcode': postcode_raw
-                                })
-                                validation_result = re_validation_zip2
-                                quality = re_validation_zip2.get('response', {}).get('quality', quality)
-                                break
+                zips_data = await self._api_get("/zips", {"zipCity": city_final, "type": "DOMICILE"})
+                if zips_data is not None:
+                    zips_for_city = zips_data.get('zips', [])
+                    for entry in zips_for_city:
+                        candidate_zip = str(entry.get('zip', '')).strip()
+                        if not candidate_zip:
+                            continue
+                        try:
+                            street_in_candidate = await self.autocomplete_street(candidate_zip, street_name_raw)
+                        except scheduler.DeadlineExceeded:
+                            raise
+                        except Exception:
+                            street_in_candidate = None
+                        if street_in_candidate:
+                            if candidate_zip != postcode_raw:
+                                corrections.append(Correction(
+                                    type='zip_corrected_from_street',
+                                    message='PLZ anhand Strasse+Ort korrigiert',
+                                    old=postcode_raw,
+                                    new=candidate_zip
+                                ))
+                                postcode_raw = candidate_zip
+                            chosen_city = entry.get('city18') or entry.get('city27') or city_final
+                            if chosen_city != city_final:
+                                corrections.append(Correction(
+                                    type='city_corrected_from_street_zip',
+                                    message='Ort anhand Strasse+PLZ korrigiert',
+                                    old=city_final,
+                                    new=chosen_city
+                                ))
+                                city_final = chosen_city
+                            if street_in_candidate != street_name_raw:
+                                corrections.append(Correction(
+                                    type='street_corrected_from_zip_search',
+                                    message='Strassenname via Street-Lookup (nach ZIP-Suche) korrigiert',
+                                    old=street_name_raw,
+                                    new=street_in_candidate
+                                ))
+                                street_name_raw = street_in_candidate
+                            # Re-Validierung nach ZIP/City-Korrektur
+                            re_validation_zip2 = await self.call_validation_api({
+                                'firstname': address.get('firstname', ''),
+                                'lastname': address.get('lastname', ''),
+                                'company': address.get('company', ''),
+                                'street_name': street_name_raw,
+                                'house_number': house_no_raw,
+                                'city': city_final,
+                                'postcode': postcode_raw
+                            })
+                            validation_result = re_validation_zip2
+                            quality = re_validation_zip2.get('response', {}).get('quality', quality)
+                            break
+            except scheduler.DeadlineExceeded:
+                raise
             except Exception:
                 pass
 
@@ -763,12 +1143,12 @@ class SmartAddressAgent:
                 if postcode_raw and street_name_raw and house_no_raw:
                     house_validated2 = await self.autocomplete_house(postcode_raw, street_name_raw, house_no_raw)
                     if house_validated2 and house_validated2 != house_no_raw:
-                        corrections.append({
-                            'type': 'house_number_corrected_after_zip_city',
-                            'message': 'Hausnummer via House-Lookup nach ZIP/City-Korrektur korrigiert',
-                            'old': house_no_raw,
-                            'new': house_validated2
-                        })
+                        corrections.append(Correction(
+                            type='house_number_corrected_after_zip_city',
+                            message='Hausnummer via House-Lookup nach ZIP/City-Korrektur korrigiert',
+                            old=house_no_raw,
+                            new=house_validated2
+                        ))
                         house_no_raw = house_validated2
                         re_after_house = await self.call_validation_api({
                             'firstname': address.get('firstname', ''),
@@ -781,24 +1161,29 @@ class SmartAddressAgent:
                         })
                         validation_result = re_after_house
                         quality = re_after_house.get('response', {}).get('quality', quality)
+            except scheduler.DeadlineExceeded:
+                raise
             except Exception:
                 pass
+            stages.mark("weak_quality_correction")
 
         # Bei USABLE: Zusatzlogik gemäß Anforderung (Street → Revalidate → City → Revalidate)
         if quality == 'USABLE':
             # 1) Street-Korrektur per Streets-API versuchen
             try:
                 street_suggestion = await self.autocomplete_street(postcode_raw, street_name_raw)
+            except scheduler.DeadlineExceeded:
+                raise
             except Exception:
                 street_suggestion = None
 
             if street_suggestion and street_suggestion != street_name_raw:
-                corrections.append({
-                    'type': 'street_corrected_after_usable',
-                    'message': 'Strassenname via Street-Lookup nach USABLE verbessert',
-                    'old': original_street_name,
-                    'new': street_suggestion
-                })
+                corrections.append(Correction(
+                    type='street_corrected_after_usable',
+                    message='Strassenname via Street-Lookup nach USABLE verbessert',
+                    old=original_street_name,
+                    new=street_suggestion
+                ))
                 street_name_raw = street_suggestion
 
             # Re-Validierung nach Street-Korrektur
@@ -820,53 +1205,50 @@ class SmartAddressAgent:
                 # 2) Versuche PLZ anhand des Ortes zu ermitteln, für die die Strasse existiert
                 fixed_by_zip = False
                 try:
-                    token = await self.token_manager.get_token()
-                    async with httpx.AsyncClient() as client:
-                        resp_z_by_city = await client.get(
-                            f"{API_BASE_URL}/zips",
-                            headers={"Authorization": f"Bearer {token}"},
-                            params={"zipCity": city_final, "type": "DOMICILE"},
-                            timeout=10.0
-                        )
-                        if resp_z_by_city.status_code == 200:
-                            zips_for_city = resp_z_by_city.json().get('zips', [])
-                            for entry in zips_for_city:
-                                candidate_zip = str(entry.get('zip', '')).strip()
-                                if not candidate_zip:
-                                    continue
-                                try:
-                                    street_in_candidate = await self.autocomplete_street(candidate_zip, street_name_raw)
-                                except Exception:
-                                    street_in_candidate = None
-                                if street_in_candidate:
-                                    # Korrigiere PLZ und ggf. Strassen-Schreibweise, Ort aus ZIP übernehmen
-                                    if candidate_zip != postcode_raw:
-                                        corrections.append({
-                                            'type': 'zip_corrected_from_street',
-                                            'message': 'PLZ anhand Strasse+Ort korrigiert',
-                                            'old': postcode_raw,
-                                            'new': candidate_zip
-                                        })
-                                        postcode_raw = candidate_zip
-                                    chosen_city = entry.get('city18') or entry.get('city27') or city_final
-                                    if chosen_city != city_final:
-                                        corrections.append({
-                                            'type': 'city_corrected_from_street_zip',
-                                            'message': 'Ort anhand Strasse+PLZ korrigiert',
-                                            'old': city_final,
-                                            'new': chosen_city
-                                        })
-                                        city_final = chosen_city
-                                    if street_in_candidate != street_name_raw:
-                                        corrections.append({
-                                            'type': 'street_corrected_from_zip_search',
-                                            'message': 'Strassenname via Street-Lookup (nach ZIP-Suche) korrigiert',
-                                            'old': street_name_raw,
-                                            'new': street_in_candidate
-                                        })
-                                        street_name_raw = street_in_candidate
-                                    fixed_by_zip = True
-                                    break
+                    zips_data = await self._api_get("/zips", {"zipCity": city_final, "type": "DOMICILE"})
+                    if zips_data is not None:
+                        zips_for_city = zips_data.get('zips', [])
+                        for entry in zips_for_city:
+                            candidate_zip = str(entry.get('zip', '')).strip()
+                            if not candidate_zip:
+                                continue
+                            try:
+                                street_in_candidate = await self.autocomplete_street(candidate_zip, street_name_raw)
+                            except scheduler.DeadlineExceeded:
+                                raise
+                            except Exception:
+                                street_in_candidate = None
+                            if street_in_candidate:
+                                # Korrigiere PLZ und ggf. Strassen-Schreibweise, Ort aus ZIP übernehmen
+                                if candidate_zip != postcode_raw:
+                                    corrections.append(Correction(
+                                        type='zip_corrected_from_street',
+                                        message='PLZ anhand Strasse+Ort korrigiert',
+                                        old=postcode_raw,
+                                        new=candidate_zip
+                                    ))
+                                    postcode_raw = candidate_zip
+                                chosen_city = entry.get('city18') or entry.get('city27') or city_final
+                                if chosen_city != city_final:
+                                    corrections.append(Correction(
+                                        type='city_corrected_from_street_zip',
+                                        message='Ort anhand Strasse+PLZ korrigiert',
+                                        old=city_final,
+                                        new=chosen_city
+                                    ))
+                                    city_final = chosen_city
+                                if street_in_candidate != street_name_raw:
+                                    corrections.append(Correction(
+                                        type='street_corrected_from_zip_search',
+                                        message='Strassenname via Street-Lookup (nach ZIP-Suche) korrigiert',
+                                        old=street_name_raw,
+                                        new=street_in_candidate
+                                    ))
+                                    street_name_raw = street_in_candidate
+                                fixed_by_zip = True
+                                break
+                except scheduler.DeadlineExceeded:
+                    raise
                 except Exception:
                     fixed_by_zip = False
 
@@ -888,33 +1270,28 @@ class SmartAddressAgent:
                     # 3) City-Korrektur: Ortsnamen aus ZIPs bestimmen und besten per Buchstaben-Überschneidung wählen
                     city_choice = None
                     try:
-                        token = await self.token_manager.get_token()
-                        async with httpx.AsyncClient() as client:
-                            resp = await client.get(
-                                f"{API_BASE_URL}/zips",
-                                headers={"Authorization": f"Bearer {token}"},
-                                params={"zipCity": postcode_raw, "type": "DOMICILE"},
-                                timeout=10.0
-                            )
-                            if resp.status_code == 200:
-                                zips = resp.json().get('zips', [])
-                                candidates: List[str] = []
-                                for entry in zips:
-                                    for cand in [entry.get('city18', ''), entry.get('city27', '')]:
-                                        if cand:
-                                            candidates.append(cand)
-                                if candidates:
-                                    city_choice = self._pick_best_city_by_overlap(city_final, candidates)
+                        zips_data = await self._api_get("/zips", {"zipCity": postcode_raw, "type": "DOMICILE"})
+                        if zips_data is not None:
+                            zips = zips_data.get('zips', [])
+                            candidates: List[str] = []
+                            for entry in zips:
+                                for cand in [entry.get('city18', ''), entry.get('city27', '')]:
+                                    if cand:
+                                        candidates.append(cand)
+                            if candidates:
+                                city_choice = self._pick_best_city_by_overlap(city_final, candidates)
+                    except scheduler.DeadlineExceeded:
+                        raise
                     except Exception:
                         city_choice = None
 
                     if city_choice and city_choice != city_final:
-                        corrections.append({
-                            'type': 'city_corrected_after_usable',
-                            'message': 'Ort via ZIP-Lookup nach USABLE verbessert (Buchstaben-Überschneidung)',
-                            'old': original_city,
-                            'new': city_choice
-                        })
+                        corrections.append(Correction(
+                            type='city_corrected_after_usable',
+                            message='Ort via ZIP-Lookup nach USABLE verbessert (Buchstaben-Überschneidung)',
+                            old=original_city,
+                            new=city_choice
+                        ))
                         city_final = city_choice
 
                     # Zweite Re-Validierung nach City-Korrektur (oder wenn ZIP-Fix nicht gegriffen hat)
@@ -929,7 +1306,234 @@ class SmartAddressAgent:
                     })
                     validation_result = re_validation_2
                     quality = re_validation_2.get('response', {}).get('quality', quality)
+            stages.mark("usable_correction")
+        
+        # Spekulativer Kandidat besser als der sequentielle Ablauf: dessen Korrekturen übernehmen
+        if (speculative_best is not None
+                and self.quality_to_score(speculative_best['quality']) > self.quality_to_score(quality)):
+            corrections[:] = corrections_before_speculation + speculative_best['corrections']
+            street_name_raw, house_no_raw = self._enforce_api_street(
+                speculative_best['validation'], speculative_best['street_name'],
+                speculative_best['house_number'], corrections
+            )
+            city_final = speculative_best['city']
+            postcode_raw = speculative_best['postcode']
+            validation_result = speculative_best['validation']
+            quality = speculative_best['quality']
         
+        return self._finalize_result(
+            address, corrections, stages, validation_result, quality,
+            street_name_raw, house_no_raw, city_final, postcode_raw,
+            street_raw, street2_raw, city_raw, company_raw
+        )
+    
+    def _enforce_api_street(self, validation_result: Dict, street_name: str, house_no: str,
+                            corrections: List[Correction]) -> Tuple[str, str]:
+        """Übernimmt Strasse/Hausnummer aus der API-Antwort, falls abweichend (mit Korrektur-Eintrag)"""
+        final_addr = validation_result.get('response', {}).get('address', {})
+        final_house = final_addr.get('geographicLocation', {}).get('house', {})
+        final_street_name = final_house.get('street', '')
+        final_house_number = final_house.get('houseNumber', '')
+        if final_street_name and final_street_name != street_name:
+            corrections.append(Correction(
+                type='street_from_api_enforced',
+                message='Strasse aus SwissPost API übernommen',
+                old=street_name,
+                new=final_street_name
+            ))
+            street_name = final_street_name
+        if final_house_number and final_house_number != house_no:
+            corrections.append(Correction(
+                type='house_number_from_api_enforced',
+                message='Hausnummer aus SwissPost API übernommen',
+                old=house_no,
+                new=final_house_number
+            ))
+            house_no = final_house_number
+        return street_name, house_no
+    
+    async def _speculative_correction(self, address: Dict, street_name: str, house_no: str, city: str,
+                                      postcode: str, original_street_name: str,
+                                      original_house_no: str) -> Optional[Dict]:
+        """
+        Spekulativer Modus: unabhängige Korrekturkandidaten (Strasse/Hausnummer, Ort aus PLZ,
+        PLZ aus Ort+Strasse, Ort per Buchstaben-Überschneidung) parallel ermitteln und validieren.
+        Unter den CERTIFIED-Kandidaten gewinnt der in Strategie-Reihenfolge erste (stabile
+        Korrekturen), spätere werden abgebrochen.
+        Returns: bester Kandidat oder None
+        """
+        budget = speculation.CallBudget()
+        lookups = speculation.SharedLookups(budget)
+        person = {
+            'firstname': address.get('firstname', ''),
+            'lastname': address.get('lastname', ''),
+            'company': address.get('company', '')
+        }
+        
+        async def validate(candidate_street: str, candidate_house: str, candidate_city: str,
+                           candidate_postcode: str, candidate_corrections: List[Correction]) -> Optional[Dict]:
+            if not budget.try_acquire():
+                return None
+            result = await self.call_validation_api(dict(
+                person, street_name=candidate_street, house_number=candidate_house,
+                city=candidate_city, postcode=candidate_postcode
+            ))
+            if result.get('status') != 'success':
+                return None
+            return {
+                'quality': result.get('response', {}).get('quality', 'UNUSABLE'),
+                'street_name': candidate_street,
+                'house_number': candidate_house,
+                'city': candidate_city,
+                'postcode': candidate_postcode,
+                'corrections': candidate_corrections,
+                'validation': result
+            }
+        
+        async def corrected_street() -> Tuple[str, str, List[Correction]]:
+            """Street- und House-Autocomplete (wie Schritt 4/5)"""
+            fixes: List[Correction] = []
+            street_fixed, house_fixed = street_name, house_no
+            if postcode and street_name:
+                suggestion = await lookups.get(('street', postcode, street_name),
+                                               lambda: self.autocomplete_street(postcode, street_name))
+                if suggestion and suggestion != street_name:
+                    fixes.append(Correction(
+                        type='street_corrected',
+                        message='Strassenname korrigiert via Street-Lookup',
+                        old=original_street_name,
+                        new=suggestion
+                    ))
+                    street_fixed = suggestion
+            if postcode and street_fixed and house_no:
+                house_suggestion = await lookups.get(('house', postcode, street_fixed, house_no),
+                                                     lambda: self.autocomplete_house(postcode, street_fixed, house_no))
+                if house_suggestion and house_suggestion != house_no:
+                    fixes.append(Correction(
+                        type='house_number_corrected',
+                        message='Hausnummer korrigiert via House-Lookup',
+                        old=original_house_no,
+                        new=house_suggestion
+                    ))
+                    house_fixed = house_suggestion
+            return street_fixed, house_fixed, fixes
+        
+        async def city_from_zip() -> Optional[str]:
+            # Über SharedLookups, damit der /zips-Aufruf auch ohne Cache im Budget zählt
+            zips_data = await lookups.get(('zips', postcode), lambda: self._api_get("/zips", {"zipCity": postcode, "type": "DOMICILE"}))
+            if not zips_data:
+                return None
+            suggestion = self._city_from_zips(zips_data.get('zips', []), city)
+            return suggestion if suggestion and suggestion != city else None
+        
+        def city_fix(new_city: str, correction_type: str, message: str) -> Correction:
+            return Correction(type=correction_type, message=message, old=city, new=new_city)
+        
+        async def normalized_only():
+            return await validate(street_name, house_no, city, postcode, [])
+        
+        async def street_house():
+            street_fixed, house_fixed, fixes = await corrected_street()
+            if not fixes:
+                return None
+            return await validate(street_fixed, house_fixed, city, postcode, fixes)
+        
+        async def zip_city():
+            new_city = await city_from_zip()
+            if not new_city:
+                return None
+            return await validate(street_name, house_no, new_city, postcode, [city_fix(
+                new_city, 'city_corrected_from_zip',
+                f"Ort anhand PLZ korrigiert (PLZ {postcode} gehört zu '{new_city}')"
+            )])
+        
+        async def street_house_zip_city():
+            (street_fixed, house_fixed, fixes), new_city = await asyncio.gather(corrected_street(), city_from_zip())
+            if not fixes or not new_city:
+                return None
+            return await validate(street_fixed, house_fixed, new_city, postcode, fixes + [city_fix(
+                new_city, 'city_corrected_from_zip',
+                f"Ort anhand PLZ korrigiert (PLZ {postcode} gehört zu '{new_city}')"
+            )])
+        
+        async def zip_from_city_and_street():
+            zips_data = await lookups.get(('zips', city), lambda: self._api_get("/zips", {"zipCity": city, "type": "DOMICILE"}))
+            if not zips_data or not street_name:
+                return None
+            entries = [entry for entry in zips_data.get('zips', []) if str(entry.get('zip', '')).strip()][:3]
+            found = await asyncio.gather(*(
+                lookups.get(('street', str(entry['zip']).strip(), street_name),
+                            lambda zip_code=str(entry['zip']).strip(): self.autocomplete_street(zip_code, street_name))
+                for entry in entries
+            ))
+            for entry, street_in_candidate in zip(entries, found):
+                if not street_in_candidate:
+                    continue
+                candidate_zip = str(entry['zip']).strip()
+                chosen_city = entry.get('city18') or entry.get('city27') or city
+                fixes: List[Correction] = []
+                if candidate_zip != postcode:
+                    fixes.append(Correction(type='zip_corrected_from_street', message='PLZ anhand Strasse+Ort korrigiert',
+                                  old=postcode, new=candidate_zip))
+                if chosen_city != city:
+                    fixes.append(city_fix(chosen_city, 'city_corrected_from_street_zip', 'Ort anhand Strasse+PLZ korrigiert'))
+                if street_in_candidate != street_name:
+                    fixes.append(Correction(type='street_corrected_from_zip_search',
+                                  message='Strassenname via Street-Lookup (nach ZIP-Suche) korrigiert',
+                                  old=original_street_name, new=street_in_candidate))
+                if not fixes:
+                    return None
+                return await validate(street_in_candidate, house_no, chosen_city, candidate_zip, fixes)
+            return None
+        
+        async def city_by_overlap():
+            zips_data = await lookups.get(('zips', postcode), lambda: self._api_get("/zips", {"zipCity": postcode, "type": "DOMICILE"}))
+            if not zips_data:
+                return None
+            candidates = [cand for entry in zips_data.get('zips', [])
+                          for cand in (entry.get('city18', ''), entry.get('city27', '')) if cand]
+            city_choice = self._pick_best_city_by_overlap(city, candidates)
+            if not city_choice or city_choice == city:
+                return None
+            street_fixed, house_fixed, fixes = await corrected_street()
+            return await validate(street_fixed, house_fixed, city_choice, postcode, fixes + [city_fix(
+                city_choice, 'city_corrected_after_usable',
+                'Ort via ZIP-Lookup verbessert (Buchstaben-Überschneidung)'
+            )])
+        
+        strategies = {
+            'normalized': normalized_only,
+            'street_house': street_house,
+            'zip_city': zip_city,
+            'street_house_zip_city': street_house_zip_city,
+            'zip_from_city_and_street': zip_from_city_and_street,
+            'city_by_overlap': city_by_overlap,
+        }
+        try:
+            winner, best, stats = await speculation.race(
+                strategies,
+                is_final=lambda candidate: candidate['quality'] in ("DOMICILE_CERTIFIED", "CERTIFIED"),
+                score=lambda candidate: self.quality_to_score(candidate['quality']),
+                # Vom Scheduler verworfene Aufrufe enden als 503, nicht als schwächeres Ergebnis
+                propagate=(scheduler.DeadlineExceeded,)
+            )
+        finally:
+            await lookups.cancel_pending()
+        
+        outcome = "none" if best is None else "final" if best['quality'] in ("DOMICILE_CERTIFIED", "CERTIFIED") else "best"
+        speculation.SPECULATIONS.inc(outcome=outcome)
+        logger.debug(
+            "Spekulative Korrektur",
+            extra={'winner': winner, 'quality': best['quality'] if best else None,
+                   'budget_used': budget.used, **stats}
+        )
+        return best
+    
+    def _finalize_result(self, address: Dict, corrections: List[Correction], stages: metrics.StageTimer,
+                         validation_result: Dict, quality: str,
+                         street_name_raw: str, house_no_raw: str, city_final: str, postcode_raw: str,
+                         street_raw: str, street2_raw: str, city_raw: str, company_raw: str) -> ValidationResult:
+        """Personendaten formatieren, Score berechnen und Ergebnis zusammenstellen"""
         # Personendaten formatieren und Korrekturen hinzufügen
         firstname_raw = address.get('firstname', '')
         lastname_raw = address.get('lastname', '')
@@ -943,29 +1547,29 @@ class SmartAddressAgent:
         
         # Personendaten-Korrekturen hinzufügen
         if firstname_formatted != firstname_raw and firstname_raw:
-            corrections.append({
-                'type': 'firstname_formatted',
-                'message': 'Vorname formatiert',
-                'old': firstname_raw,
-                'new': firstname_formatted
-            })
+            corrections.append(Correction(
+                type='firstname_formatted',
+                message='Vorname formatiert',
+                old=firstname_raw,
+                new=firstname_formatted
+            ))
         
         if lastname_formatted != lastname_raw and lastname_raw:
-            corrections.append({
-                'type': 'lastname_formatted',
-                'message': 'Nachname formatiert',
-                'old': lastname_raw,
-                'new': lastname_formatted
-            })
+            corrections.append(Correction(
+                type='lastname_formatted',
+                message='Nachname formatiert',
+                old=lastname_raw,
+                new=lastname_formatted
+            ))
         
         # Firmenname-Korrektur nur, wenn Rechtsform normalisiert wurde
         if company_raw and company_normalized != company_raw:
-            corrections.append({
-                'type': 'company_legal_form_normalized',
-                'message': 'Rechtsform in Firmenname normalisiert',
-                'old': company_raw,
-                'new': company_normalized
-            })
+            corrections.append(Correction(
+                type='company_legal_form_normalized',
+                message='Rechtsform in Firmenname normalisiert',
+                old=company_raw,
+                new=company_normalized
+            ))
         
         # Korrigierte Ausgabe formatieren
         corrected_formatted = self.analyzer.format_corrected_output(
@@ -975,90 +1579,84 @@ class SmartAddressAgent:
         
         # Score berechnen (nach möglicher Re-Validierung)
         score = self.quality_to_score(quality)
+        stages.mark("formatting")
         
-        return {
-            'status': 'success' if score >= 50 else 'failed',
-            'quality': quality,
-            'score': score,
-            'corrections': corrections,
-            'input': {
-                'street': street_raw,
-                'street2': street2_raw,
-                'city': city_raw,
-                'postcode': postcode_raw,
-                'firstname': firstname_raw,
-                'lastname': lastname_raw,
-                'company': company_raw
-            },
-            'corrected': corrected_formatted,
-            'validation': validation_result.get('response', {}),
-            'has_corrections': len(corrections) > 0
-        }
+        return ValidationResult(
+            status='success' if score >= 50 else 'failed',
+            quality=quality,
+            score=score,
+            corrections=corrections,
+            input=AddressInput(
+                street=street_raw,
+                street2=street2_raw,
+                city=city_raw,
+                postcode=postcode_raw,
+                firstname=firstname_raw,
+                lastname=lastname_raw,
+                company=company_raw
+            ),
+            corrected=CorrectedAddress.from_mapping(corrected_formatted),
+            validation=validation_result.get('response', {})
+        )
     
     async def enhanced_city_correction(self, zip_code: str, city_input: str) -> Optional[str]:
         """
         Erweiterte Stadt-Korrektur mit verschiedenen Suchstrategien
         """
         try:
-            token = await self.token_manager.get_token()
+            data = await self._api_get(
+                "/zips",
+                {
+                    "zipCity": zip_code,
+                    "type": "DOMICILE"
+                }
+            )
+            if data is None:
+                return None
+            zips = data.get('zips', [])
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{API_BASE_URL}/zips",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={
-                        "zipCity": zip_code,
-                        "type": "DOMICILE"
-                    },
-                    timeout=10.0
-                )
-                
-                if response.status_code != 200:
-                    return None
-                
-                data = response.json()
-                zips = data.get('zips', [])
-                
-                if not zips:
-                    return None
-                
-                # Verschiedene Suchstrategien
-                city_lower = city_input.lower()
-                
-                # 1. Exakter Match (case-insensitive)
-                for zip_entry in zips:
-                    for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
-                        if candidate and candidate.lower() == city_lower:
-                            return candidate
-                
-                # 2. "Startet mit" Match
-                for zip_entry in zips:
-                    for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
-                        if candidate and candidate.lower().startswith(city_lower):
-                            return candidate
-                
-                # 3. "Enthält" Match
-                for zip_entry in zips:
-                    for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
-                        if candidate and city_lower in candidate.lower():
-                            return candidate
-                
-                # 4. Ähnlichkeits-Score (niedrigere Schwelle)
-                best_match = None
-                best_score = 0.0
-                
-                for zip_entry in zips:
-                    for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
-                        if candidate:
-                            score = self.analyzer.similarity_score(city_input, candidate)
-                            if score > best_score and score > 0.2:  # Niedrigere Schwelle
-                                best_score = score
-                                best_match = candidate
-                
-                return best_match
-        
+            if not zips:
+                return None
+            
+            # Verschiedene Suchstrategien
+            city_lower = city_input.lower()
+            
+            # 1. Exakter Match (case-insensitive)
+            for zip_entry in zips:
+                for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
+                    if candidate and candidate.lower() == city_lower:
+                        return candidate
+            
+            # 2. "Startet mit" Match
+            for zip_entry in zips:
+                for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
+                    if candidate and candidate.lower().startswith(city_lower):
+                        return candidate
+            
+            # 3. "Enthält" Match
+            for zip_entry in zips:
+                for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
+                    if candidate and city_lower in candidate.lower():
+                        return candidate
+            
+            # 4. Ähnlichkeits-Score (niedrigere Schwelle)
+            best_match = None
+            best_score = 0.0
+            
+            for zip_entry in zips:
+                for candidate in [zip_entry.get('city18', ''), zip_entry.get('city27', '')]:
+                    if candidate:
+                        score = self.analyzer.similarity_score(city_input, candidate)
+                        if score > best_score and score > 0.2:  # Niedrigere Schwelle
+                            best_score = score
+                            best_match = candidate
+            
+            return best_match
+    
+        except scheduler.DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Enhanced city correction Fehler: {e}")
+            logger.warning("Enhanced city correction Fehler: %s", e)
             return None
     
     async def autocomplete_zip(self, zip_code: str, city_input: str) -> Optional[str]:
@@ -1067,171 +1665,230 @@ class SmartAddressAgent:
         Wenn mehrere Orte: wähle den mit bester Übereinstimmung
         """
         try:
-            token = await self.token_manager.get_token()
+            data = await self._api_get(
+                "/zips",
+                {
+                    "zipCity": zip_code,
+                    "type": "DOMICILE"
+                }
+            )
+            if data is None:
+                return None
+            return self._city_from_zips(data.get('zips', []), city_input)
+    
+        except scheduler.DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning("ZIP Autocomplete Fehler: %s", e)
+            return None
+    
+    def _city_from_zips(self, zips: List[Dict], city_input: str) -> Optional[str]:
+        """Wählt aus den /zips-Einträgen einer PLZ den Ort mit der besten Übereinstimmung"""
+        if not zips:
+            return None
+        
+        if len(zips) == 1:
+            # Nur ein Ort gefunden
+            return zips[0].get('city18') or zips[0].get('city27')
+        
+        # Mehrere Orte: besten Match finden
+        best_match = None
+        best_score = 0.0
+        
+        for zip_entry in zips:
+            city18 = zip_entry.get('city18', '')
+            city27 = zip_entry.get('city27', '')
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{API_BASE_URL}/zips",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={
-                        "zipCity": zip_code,
-                        "type": "DOMICILE"
-                    },
-                    timeout=10.0
-                )
-                
-                if response.status_code != 200:
-                    return None
-                
-                data = response.json()
-                zips = data.get('zips', [])
-                
-                if not zips:
-                    return None
-                
-                if len(zips) == 1:
-                    # Nur ein Ort gefunden
-                    return zips[0].get('city18') or zips[0].get('city27')
-                
-                # Mehrere Orte: besten Match finden
-                best_match = None
-                best_score = 0.0
-                
-                for zip_entry in zips:
-                    city18 = zip_entry.get('city18', '')
-                    city27 = zip_entry.get('city27', '')
+            # Prüfe beide Varianten
+            for candidate in [city18, city27]:
+                if candidate:
+                    # Prüfe zuerst auf exakten Match
+                    if candidate.lower() == city_input.lower():
+                        return candidate
+                    
+                    # Prüfe auf "startet mit" Match
+                    if candidate.lower().startswith(city_input.lower()):
+                        return candidate
                     
-                    # Prüfe beide Varianten
-                    for candidate in [city18, city27]:
-                        if candidate:
-                            # Prüfe zuerst auf exakten Match
-                            if candidate.lower() == city_input.lower():
-                                return candidate
-                            
-                            # Prüfe auf "startet mit" Match
-                            if candidate.lower().startswith(city_input.lower()):
-                                return candidate
-                            
-                            # Prüfe auf Ähnlichkeit
-                            score = self.analyzer.similarity_score(city_input, candidate)
-                            if score > best_score:
-                                best_score = score
-                                best_match = candidate
-                
-                # Wenn kein exakter oder "startet mit" Match gefunden, 
-                # aber ein ähnlicher Match mit Score > 0.3
-                if best_match and best_score > 0.3:
-                    return best_match
-                
-                return best_match
+                    # Prüfe auf Ähnlichkeit
+                    score = self.analyzer.similarity_score(city_input, candidate)
+                    if score > best_score:
+                        best_score = score
+                        best_match = candidate
         
-        except Exception as e:
-            print(f"ZIP Autocomplete Fehler: {e}")
-            return None
+        # Wenn kein exakter oder "startet mit" Match gefunden, 
+        # aber ein ähnlicher Match mit Score > 0.3
+        if best_match and best_score > 0.3:
+            return best_match
+        
+        return best_match
     
     async def autocomplete_street(self, zip_code: str, street_input: str) -> Optional[str]:
         """Sucht korrekte Strassenschreibweise via Street-Autocomplete"""
         try:
-            token = await self.token_manager.get_token()
+            data = await self._api_get(
+                "/streets",
+                {
+                    "zip": zip_code,
+                    "name": street_input
+                }
+            )
+            if data is None:
+                return None
+            if payloads_enabled(logger):
+                logger.debug("Street API response", extra={'payload': data})
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{API_BASE_URL}/streets",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={
-                        "zip": zip_code,
-                        "name": street_input
-                    },
-                    timeout=10.0
-                )
-                
-                if response.status_code != 200:
-                    return None
-                
-                data = response.json()
-                print(f"DEBUG: Street API response: {data}")
-                
-                streets = data.get('streets', [])
-                
-                if not streets:
-                    print(f"DEBUG: No streets found for {street_input} in {zip_code}")
-                    return None
-                
-                # Prüfe ob streets eine Liste ist
-                if not isinstance(streets, list):
-                    print(f"DEBUG: Streets is not a list: {type(streets)} - {streets}")
-                    return None
-                
-                # Prüfe ob der erste Eintrag ein Dictionary oder String ist
-                if isinstance(streets[0], dict):
-                    # Dictionary Format: {'name': 'Talstrasse'}
-                    street_name = streets[0].get('name', '')
-                elif isinstance(streets[0], str):
-                    # String Format: 'Talstrasse'
-                    street_name = streets[0]
-                else:
-                    print(f"DEBUG: Unexpected street entry format: {type(streets[0])} - {streets[0]}")
-                    return None
-                
-                print(f"DEBUG: Found street name: {street_name}")
-                return street_name
-        
+            streets = data.get('streets', [])
+            
+            if not streets:
+                logger.debug("No streets found for %s in %s", street_input, zip_code)
+                return None
+            
+            # Prüfe ob streets eine Liste ist
+            if not isinstance(streets, list):
+                logger.warning("Streets is not a list: %s", type(streets).__name__)
+                return None
+            
+            # Prüfe ob der erste Eintrag ein Dictionary oder String ist
+            if isinstance(streets[0], dict):
+                # Dictionary Format: {'name': 'Talstrasse'}
+                street_name = streets[0].get('name', '')
+            elif isinstance(streets[0], str):
+                # String Format: 'Talstrasse'
+                street_name = streets[0]
+            else:
+                logger.warning("Unexpected street entry format: %s", type(streets[0]).__name__)
+                return None
+            
+            logger.debug("Found street name: %s", street_name)
+            return street_name
+    
+        except scheduler.DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Street Autocomplete Fehler: {e}")
+            logger.warning("Street Autocomplete Fehler: %s", e)
             return None
     
     async def autocomplete_house(self, zip_code: str, street_name: str, house_no: str) -> Optional[str]:
         """Validiert Hausnummer via House-Autocomplete"""
         try:
-            token = await self.token_manager.get_token()
+            data = await self._api_get(
+                "/houses",
+                {
+                    "zip": zip_code,
+                    "streetname": street_name,
+                    "number": house_no
+                }
+            )
+            if data is None:
+                return None
+            if payloads_enabled(logger):
+                logger.debug("House API response", extra={'payload': data})
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{API_BASE_URL}/houses",
-                    headers={"Authorization": f"Bearer {token}"},
-                    params={
-                        "zip": zip_code,
-                        "streetname": street_name,
-                        "number": house_no
-                    },
-                    timeout=10.0
-                )
-                
-                if response.status_code != 200:
-                    return None
-                
-                data = response.json()
-                print(f"DEBUG: House API response: {data}")
-                
-                houses = data.get('houses', [])
-                
-                if not houses:
-                    print(f"DEBUG: No houses found for {house_no} in {street_name}, {zip_code}")
-                    return None
-                
-                # Prüfe ob houses eine Liste ist
-                if not isinstance(houses, list):
-                    print(f"DEBUG: Houses is not a list: {type(houses)} - {houses}")
-                    return None
-                
-                # Prüfe ob der erste Eintrag ein Dictionary oder String ist
-                if isinstance(houses[0], dict):
-                    # Dictionary Format: {'number': '4'}
-                    house_number = houses[0].get('number', '')
-                elif isinstance(houses[0], str):
-                    # String Format: '4'
-                    house_number = houses[0]
-                else:
-                    print(f"DEBUG: Unexpected house entry format: {type(houses[0])} - {houses[0]}")
-                    return None
-                
-                print(f"DEBUG: Found house number: {house_number}")
-                return house_number
-        
+            houses = data.get('houses', [])
+            
+            if not houses:
+                logger.debug("No houses found for %s in %s, %s", house_no, street_name, zip_code)
+                return None
+            
+            # Prüfe ob houses eine Liste ist
+            if not isinstance(houses, list):
+                logger.warning("Houses is not a list: %s", type(houses).__name__)
+                return None
+            
+            # Prüfe ob der erste Eintrag ein Dictionary oder String ist
+            if isinstance(houses[0], dict):
+                # Dictionary Format: {'number': '4'}
+                house_number = houses[0].get('number', '')
+            elif isinstance(houses[0], str):
+                # String Format: '4'
+                house_number = houses[0]
+            else:
+                logger.warning("Unexpected house entry format: %s", type(houses[0]).__name__)
+                return None
+            
+            logger.debug("Found house number: %s", house_number)
+            return house_number
+    
+        except scheduler.DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"House Autocomplete Fehler: {e}")
+            logger.warning("House Autocomplete Fehler: %s", e)
             return None
     
+    @staticmethod
+    def _observe_outcome(status: str, duration: float) -> None:
+        """Upstream-Ergebnis an die adaptive Grenze und den Readiness-Breaker melden"""
+        adaptive.LIMITER.observe(status, duration)
+        readiness.BREAKER.record(status)
+    
+    async def probe_upstream(self) -> str:
+        """
+        Readiness-Probe: ein /zips-Aufruf am Cache und am Scheduler vorbei.
+        Returns: HTTP-Status als String; Netzwerkfehler werden weitergereicht.
+        """
+        token = await self.token_manager.get_token()
+        started = time.perf_counter()
+        try:
+            response = await http_pool.client().get(
+                f"{API_BASE_URL}/zips",
+                headers={"Authorization": f"Bearer {token}"},
+                params={"zipCity": "3000", "type": "DOMICILE"},
+                timeout=5.0
+            )
+        except Exception:
+            metrics.observe_upstream("/zips", "error", started)
+            readiness.BREAKER.record("error")
+            raise
+        status = str(response.status_code)
+        metrics.observe_upstream("/zips", status, started)
+        readiness.BREAKER.record(status)
+        return status
+    
+    async def _api_get(self, endpoint: str, params: Dict[str, Any], timeout: float = 10.0) -> Optional[Dict]:
+        """
+        GET auf einen Autocomplete-Endpoint (/zips, /streets, /houses) mit Cache und Metriken.
+        Returns: JSON-Antwort bei Status 200, sonst None. Netzwerkfehler und
+        scheduler.DeadlineExceeded werden weitergereicht.
+        """
+        cache_key = make_key(endpoint, params)
+        cached = AUTOCOMPLETE_CACHE.get(cache_key)
+        if cached is not None:
+            tracing.record_upstream(endpoint, "cached", 0.0, cache="hit")
+            return cached
+        
+        token = await self.token_manager.get_token()
+        
+        async def attempt(retries: int):
+            async with scheduler.SCHEDULER.slot():
+                started = time.perf_counter()
+                try:
+                    response = await http_pool.client().get(
+                        f"{API_BASE_URL}{endpoint}",
+                        headers={"Authorization": f"Bearer {token}"},
+                        params=params,
+                        timeout=timeout
+                    )
+                except Exception:
+                    duration = metrics.observe_upstream(endpoint, "error", started)
+                    tracing.record_upstream(endpoint, "error", duration, retries=retries)
+                    self._observe_outcome("error", duration)
+                    raise
+                status = str(response.status_code)
+                duration = metrics.observe_upstream(endpoint, status, started)
+                tracing.record_upstream(endpoint, status, duration, retries=retries)
+                self._observe_outcome(status, duration)
+            return response
+        
+        response = await hedging.HEDGER.run(endpoint, attempt)
+        if response.status_code != 200:
+            logger.debug("%s returned status %s", endpoint, response.status_code)
+            return None
+        
+        data = response.json()
+        AUTOCOMPLETE_CACHE.set(cache_key, data)
+        return data
+    
     def _pick_best_city_by_overlap(self, original_city: str, candidates: List[str]) -> Optional[str]:
         """Wählt den besten Ortsnamen anhand Buchstaben-Überschneidung (Character-Overlap)."""
         if not candidates:
@@ -1244,55 +1901,97 @@ class SmartAddressAgent:
         return best[0]
     
     async def call_validation_api(self, data: Dict) -> Dict:
-        """Finale Validierung mit Swisspost API"""
+        """
+        Finale Validierung mit Swisspost API.
+        Innerhalb von validate_smart wird ein bereits gesendeter Payload aus dem Request-Memo beantwortet.
+        """
+        request_body = {
+            "addressee": {},
+            "geographicLocation": {
+                "house": {
+                    "street": data.get('street_name', ''),
+                    "houseNumber": data.get('house_number', '')
+                },
+                "zip": {
+                    "zip": str(data.get('postcode', '')),
+                    "city": data.get('city', '')
+                }
+            },
+            "fullValidation": True
+        }
+
+        if data.get('firstname'):
+            request_body['addressee']['firstName'] = data['firstname']
+        if data.get('lastname'):
+            request_body['addressee']['lastName'] = data['lastname']
+        if data.get('company'):
+            request_body['addressee']['companyName'] = data['company']
+
+        memo_for_request = memo.current()
+        if memo_for_request is None:
+            result = await self._post_validation(request_body)
+        else:
+            # Netzwerkfehler (ohne HTTP-Status) nicht merken – ein erneuter Versuch bleibt möglich
+            result = await memo_for_request.get_or_call(
+                request_body,
+                lambda: self._post_validation(request_body),
+                keep=lambda result: result.get('status') == 'success' or 'http_status' in result
+            )
+        # Für ein Teilergebnis, falls die Deadline abläuft
+        best = deadline.current()
+        if best is not None:
+            best.offer(data, result)
+        return result
+    
+    async def _post_validation(self, request_body: Dict) -> Dict:
+        """
+        POST /addresses/validation mit Metriken; Fehler werden als Ergebnis-Dict geliefert.
+        Raises: scheduler.DeadlineExceeded, wenn innerhalb der Deadline kein Upstream-Slot frei wird
+        """
         try:
             token = await self.token_manager.get_token()
             
-            request_body = {
-                "addressee": {},
-                "geographicLocation": {
-                    "house": {
-                        "street": data.get('street_name', ''),
-                        "houseNumber": data.get('house_number', '')
-                    },
-                    "zip": {
-                        "zip": str(data.get('postcode', '')),
-                        "city": data.get('city', '')
-                    }
-                },
-                "fullValidation": True
-            }
-            
-            if data.get('firstname'):
-                request_body['addressee']['firstName'] = data['firstname']
-            if data.get('lastname'):
-                request_body['addressee']['lastName'] = data['lastname']
-            if data.get('company'):
-                request_body['addressee']['companyName'] = data['company']
+            async def attempt(retries: int):
+                async with scheduler.SCHEDULER.slot():
+                    started = time.perf_counter()
+                    try:
+                        response = await http_pool.client().post(
+                            f"{API_BASE_URL}/addresses/validation",
+                            headers={
+                                "Authorization": f"Bearer {token}",
+                                "Content-Type": "application/json"
+                            },
+                            json=request_body,
+                            timeout=15.0
+                        )
+                    except Exception:
+                        duration = metrics.observe_upstream("/addresses/validation", "error", started)
+                        tracing.record_upstream("/addresses/validation", "error", duration, retries=retries)
+                        self._observe_outcome("error", duration)
+                        raise
+                    status = str(response.status_code)
+                    duration = metrics.observe_upstream("/addresses/validation", status, started)
+                    tracing.record_upstream("/addresses/validation", status, duration, retries=retries)
+                    self._observe_outcome(status, duration)
+                    return response
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{API_BASE_URL}/addresses/validation",
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Content-Type": "application/json"
-                    },
-                    json=request_body,
-                    timeout=15.0
-                )
-                
-                if response.status_code == 200:
-                    return {
-                        'status': 'success',
-                        'response': response.json()
-                    }
-                else:
-                    return {
-                        'status': 'error',
-                        'http_status': response.status_code,
-                        'message': response.text
-                    }
+            # Validierung ist idempotent – bei Ausreissern darf ein zweiter Versuch starten
+            response = await hedging.HEDGER.run("/addresses/validation", attempt)
+            if response.status_code == 200:
+                return {
+                    'status': 'success',
+                    'response': response.json()
+                }
+            else:
+                return {
+                    'status': 'error',
+                    'http_status': response.status_code,
+                    'message': response.text
+                }
         
+        except scheduler.DeadlineExceeded:
+            # Kein Upstream-Slot innerhalb der Deadline – der ganze Request wird verworfen
+            raise
         except Exception as e:
             return {
                 'status': 'error',
@@ -1312,14 +2011,120 @@ class SmartAddressAgent:
         }
         return quality_map.get(quality.upper(), 0)
     
-    async def run(self):
-        """Server starten"""
-        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
+    def _request_context(self) -> Any:
+        """MCP-Request-Kontext des laufenden Tool-Aufrufs (None ausserhalb eines Requests)"""
+        if self._server is None:
+            return None
+        try:
+            return self._server.request_context
+        except LookupError:
+            return None
+    
+    def _current_session(self) -> Any:
+        """MCP-Session des laufenden Tool-Aufrufs (None ausserhalb eines Requests)"""
+        context = self._request_context()
+        return context.session if context is not None else None
+    
+    async def validate_batch(self, arguments: Dict) -> Dict:
+        """
+        validate_addresses_batch: validiert arguments['addresses'] mit begrenzter Parallelität.
+        Fortschritt und Teilergebnisse gehen als Notifications an die aufrufende MCP-Session;
+        wird der Aufruf abgebrochen, bricht batch.validate_batch alle offenen Validierungen ab.
+        Raises: batch.BatchError bei ungültiger Eingabe
+        """
+        addresses = batch.check_addresses(arguments.get('addresses'))
+        profile = serialization.resolve_profile(arguments.get('response_profile'))
+        priority = arguments.get('priority')
+        partial = bool(arguments.get('partial_results'))
+        try:
+            chunk_size = max(1, int(arguments.get('chunk_size') or batch.CHUNK_SIZE))
+        except (TypeError, ValueError):
+            raise batch.BatchError("chunk_size muss eine positive Zahl sein")
+        
+        context = self._request_context()
+        progress_token = getattr(context.meta, 'progressToken', None) if context is not None else None
+        
+        def shaped(result: Any) -> Any:
+            if result.get('status') == 'error':
+                return result
+            return plain(serialization.shape_result(result, profile))
+        
+        async def on_progress(done: int, total: int) -> None:
+            await context.session.send_progress_notification(
+                progress_token, done, total,
+                message=f"{done}/{total} Adressen validiert",
+                related_request_id=context.request_id
+            )
+        
+        async def on_chunk(chunk: batch.Chunk) -> None:
+            await context.session.send_log_message(
+                level="info",
+                data={'results': [{'index': index, 'result': shaped(result)} for index, result in chunk]},
+                logger="validate_addresses_batch",
+                related_request_id=context.request_id
             )
+        
+        def validate(address: Dict) -> Any:
+            if priority and not address.get('priority'):
+                address = {**address, 'priority': priority}
+            return self.validate_smart(address)
+        
+        results = await batch.validate_batch(
+            addresses,
+            validate,
+            chunk_size=chunk_size,
+            on_progress=on_progress if progress_token is not None else None,
+            on_chunk=on_chunk if partial and context is not None else None
+        )
+        qualities: Dict[str, int] = {}
+        for result in results:
+            quality = result.get('quality') or 'ERROR'
+            qualities[quality] = qualities.get(quality, 0) + 1
+        response: Dict[str, Any] = {'total': len(results), 'qualities': qualities}
+        if not partial:
+            response['results'] = [shaped(result) for result in results]
+        return response
+    
+    async def prewarm(self) -> None:
+        """
+        Vorwärmen im Hintergrund, während der Server bereits Anfragen annimmt:
+        OAuth-Token (SWISSPOST_PREWARM) und Autocomplete-Cache (SWISSPOST_WARMUP_FILES).
+        Fehler werden nur geloggt; der erste Tool-Aufruf holt fehlende Teile selbst.
+        """
+        if PREWARM_TOKEN:
+            try:
+                await self.token_manager.get_token()
+            except Exception as e:
+                logger.warning("Token-Prewarm fehlgeschlagen: %s", e)
+        from swisspost_mcp import warmup
+        if warmup.configured_sources():
+            await warmup.warm_agent(self)
+    
+    async def run(self, transport_name: Optional[str] = None):
+        """Server starten: stdio (Standard) oder Streamable HTTP / SSE (SWISSPOST_MCP_TRANSPORT)"""
+        transport_name = transport.resolve_transport(transport_name)
+        prewarm = asyncio.ensure_future(self.prewarm())
+        try:
+            if transport_name != "stdio":
+                # Ein Prozess für viele Sessions: Token, HTTP-Pool und Caches werden geteilt
+                self.session_limiter = transport.SessionLimiter(transport.SESSION_CONCURRENCY, transport_name)
+                probes = readiness.start(self.token_manager, self.probe_upstream)
+                try:
+                    await transport.serve(self.server, transport_name)
+                finally:
+                    probes.cancel()
+                return
+            import mcp.server.stdio
+            async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            prewarm.cancel()
+            await asyncio.gather(prewarm, return_exceptions=True)
+            await http_pool.aclose()
 
 
 async def main():
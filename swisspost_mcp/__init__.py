@@ -0,0 +1,7 @@
+"""
+Gemeinsame Infrastruktur für den Smart Address Agent und den n8n HTTP Proxy.
+
+Die Module hier sind bewusst leichtgewichtig (nur Standardbibliothek bzw.
+optionale Abhängigkeiten), damit sie sowohl vom MCP Server als auch vom
+Proxy ohne Zusatzkosten importiert werden können.
+"""
@@ -0,0 +1,121 @@
+"""
+Adaptive Obergrenze für gleichzeitige Upstream-Aufrufe (AIMD)
+
+Eine feste SWISSPOST_MAX_CONCURRENCY ist entweder zu niedrig (verschenkter
+Durchsatz) oder zu hoch (429, Timeouts). Der Limiter passt die Obergrenze des
+Prioritäts-Schedulers laufend an:
+
+- Additive Increase: solange Antworten gesund sind und die Slots ausgelastet,
+  steigt die Grenze um etwa 1 pro `limit` erfolgreiche Aufrufe
+- Multiplicative Decrease: bei 429, 5xx, Netzwerkfehlern/Timeouts oder einer
+  Latenzspitze (Vielfaches der geglätteten Normal-Latenz) sinkt sie auf
+  limit * SWISSPOST_AIMD_BACKOFF, höchstens einmal pro Abklingzeit
+
+Da alle Upstream-Aufrufe (Fan-out in validate_smart, Batch, Jobs, Warm-up) über
+SCHEDULER.slot() laufen, gilt die Grenze überall; die Klassenanteile
+(SWISSPOST_SCHED_SHARES) skalieren mit.
+
+Konfiguration:
+- SWISSPOST_AIMD:                 Adaptive Grenze aktivieren (Standard: aus)
+- SWISSPOST_AIMD_MIN:             Untergrenze (Standard: 2)
+- SWISSPOST_AIMD_MAX:             Obergrenze (Standard: SWISSPOST_HTTP_MAX_CONNECTIONS)
+- SWISSPOST_AIMD_BACKOFF:         Faktor beim Zurückfahren (Standard: 0.7)
+- SWISSPOST_AIMD_LATENCY_FACTOR:  Latenzspitze = Faktor x Normal-Latenz (Standard: 3)
+"""
+
+import os
+import time
+from typing import Optional
+
+from swisspost_mcp import http_pool, metrics, scheduler
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("adaptive")
+
+EWMA_WEIGHT = 0.1
+MIN_COOLDOWN = 0.25
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+ENABLED = os.getenv("SWISSPOST_AIMD", "0").strip().lower() in ("1", "true", "yes")
+MIN_LIMIT = max(1, int(_env_number("SWISSPOST_AIMD_MIN", 2)))
+MAX_LIMIT = max(MIN_LIMIT, int(_env_number("SWISSPOST_AIMD_MAX", http_pool.MAX_CONNECTIONS)))
+BACKOFF = min(0.95, max(0.1, _env_number("SWISSPOST_AIMD_BACKOFF", 0.7)))
+LATENCY_FACTOR = max(1.5, _env_number("SWISSPOST_AIMD_LATENCY_FACTOR", 3.0))
+
+ADJUSTMENTS = metrics.REGISTRY.counter(
+    "swisspost_aimd_adjustments_total",
+    "Änderungen der adaptiven Upstream-Grenze nach Richtung und Grund",
+    ("direction", "reason"),
+)
+
+
+class AIMDLimiter:
+    """Steuert scheduler.max_concurrency anhand von Status und Latenz der Upstream-Antworten"""
+
+    def __init__(self, target: scheduler.PriorityScheduler, enabled: bool = ENABLED,
+                 min_limit: int = MIN_LIMIT, max_limit: int = MAX_LIMIT, backoff: float = BACKOFF,
+                 latency_factor: float = LATENCY_FACTOR):
+        self.target = target
+        self.enabled = enabled
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_factor = latency_factor
+        self.limit = float(min(max_limit, max(min_limit, target.max_concurrency)))
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+
+    @staticmethod
+    def _overload_reason(status: str) -> Optional[str]:
+        if status == "error":
+            return "error"
+        if status == "429":
+            return "throttled"
+        if status.isdigit() and int(status) >= 500:
+            return "server_error"
+        return None
+
+    def observe(self, status: str, duration: float) -> None:
+        """Nach jedem Upstream-Aufruf (Status wie in metrics.observe_upstream, Dauer in Sekunden)"""
+        if not self.enabled:
+            return
+        reason = self._overload_reason(status)
+        if reason is None and self._baseline is not None and duration > self._baseline * self.latency_factor:
+            reason = "latency"
+        if reason is not None:
+            self._decrease(reason)
+            return
+
+        self._baseline = duration if self._baseline is None else (
+            (1 - EWMA_WEIGHT) * self._baseline + EWMA_WEIGHT * duration)
+        # Nur erhöhen, wenn die Grenze tatsächlich ausgeschöpft wird
+        if self.limit < self.max_limit and self.target.saturated():
+            previous = int(self.limit)
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            if int(self.limit) > previous:
+                ADJUSTMENTS.inc(direction="increase", reason="healthy")
+                self.target.set_max_concurrency(int(self.limit))
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        # Eine Überlast-Episode trifft meist mehrere laufende Aufrufe – nur einmal reagieren
+        cooldown = max(MIN_COOLDOWN, 2 * (self._baseline or 0.0))
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        previous = int(self.limit)
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        if int(self.limit) < previous:
+            ADJUSTMENTS.inc(direction="decrease", reason=reason)
+            logger.info("Upstream-Grenze gesenkt", extra={'limit': int(self.limit), 'reason': reason})
+            self.target.set_max_concurrency(int(self.limit))
+
+
+LIMITER = AIMDLimiter(scheduler.SCHEDULER)
@@ -0,0 +1,118 @@
+"""
+Batch-Validierung mehrerer Adressen mit Fortschritt, Teilergebnissen und Abbruch
+
+validate_addresses_batch validiert eine Liste von Adressen mit begrenzter
+Parallelität. Während der Lauf andauert, meldet der Aufrufer den Fortschritt
+(MCP Progress-Notifications) und kann fertige Ergebnisse in Paketen
+weitergeben, damit der Client sie schon vor dem Ende verarbeiten kann. Wird
+der Aufruf abgebrochen (MCP Cancel, Verbindungsabbruch), werden alle noch
+offenen Validierungen abgebrochen und verbrauchen kein Upstream-Kontingent mehr.
+
+Konfiguration:
+- SWISSPOST_BATCH_MAX:          Maximale Anzahl Adressen pro Aufruf (Standard: 1000)
+- SWISSPOST_BATCH_CONCURRENCY:  Gleichzeitige Validierungen pro Aufruf (Standard: 4)
+- SWISSPOST_BATCH_CHUNK:        Standard-Paketgrösse für Teilergebnisse (Standard: 25)
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from swisspost_mcp import metrics
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("batch")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+MAX_ADDRESSES = max(1, _env_int("SWISSPOST_BATCH_MAX", 1000))
+CONCURRENCY = max(1, _env_int("SWISSPOST_BATCH_CONCURRENCY", 4))
+CHUNK_SIZE = max(1, _env_int("SWISSPOST_BATCH_CHUNK", 25))
+
+BATCH_ADDRESSES = metrics.REGISTRY.counter(
+    "swisspost_batch_addresses_total",
+    "Adressen in Batch-Aufrufen nach Ergebnis (completed, error, cancelled)",
+    ("result",),
+)
+
+Chunk = List[Tuple[int, Any]]
+
+
+class BatchError(ValueError):
+    """Ungültige Batch-Eingabe (keine Liste, leer oder zu gross)"""
+
+
+def check_addresses(addresses: Any, limit: int = MAX_ADDRESSES) -> List[Dict[str, Any]]:
+    if not isinstance(addresses, list) or not addresses:
+        raise BatchError("addresses muss eine nicht-leere Liste von Adressen sein")
+    if len(addresses) > limit:
+        raise BatchError(f"Zu viele Adressen: {len(addresses)} (Maximum {limit})")
+    for index, address in enumerate(addresses):
+        if not isinstance(address, dict):
+            raise BatchError(f"addresses[{index}] ist kein Objekt")
+    return addresses
+
+
+async def validate_batch(
+    addresses: Sequence[Dict[str, Any]],
+    validate: Callable[[Dict[str, Any]], Awaitable[Any]],
+    concurrency: int = CONCURRENCY,
+    chunk_size: int = CHUNK_SIZE,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    on_chunk: Optional[Callable[[Chunk], Awaitable[None]]] = None,
+) -> List[Any]:
+    """
+    Validiert alle Adressen; Ergebnisse in Eingabe-Reihenfolge.
+
+    on_progress(fertig, total) wird höchstens ~100 Mal pro Lauf aufgerufen,
+    on_chunk([(index, ergebnis), ...]) in Fertigstellungs-Reihenfolge, sobald
+    chunk_size Ergebnisse vorliegen (der Rest am Ende). Fehler einzelner Adressen
+    werden als {'status': 'error', 'message': ...} geliefert und brechen den Lauf nicht ab.
+    """
+    total = len(addresses)
+    results: List[Any] = [None] * total
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    step = max(1, total // 100)
+    pending: Chunk = []
+    done = 0
+
+    async def one(index: int, address: Dict[str, Any]) -> Tuple[int, Any]:
+        async with semaphore:
+            try:
+                return index, await validate(address)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Batch-Adresse %d fehlgeschlagen: %s", index, e)
+                return index, {'status': 'error', 'message': str(e)}
+
+    tasks = [asyncio.ensure_future(one(index, address)) for index, address in enumerate(addresses)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result = await next_done
+            results[index] = result
+            done += 1
+            is_error = isinstance(result, dict) and result.get('status') == 'error'
+            BATCH_ADDRESSES.inc(result="error" if is_error else "completed")
+            if on_chunk is not None:
+                pending.append((index, result))
+                if len(pending) >= chunk_size or done == total:
+                    chunk, pending = pending, []
+                    await on_chunk(chunk)
+            if on_progress is not None and (done % step == 0 or done == total):
+                await on_progress(done, total)
+    finally:
+        # Abbruch: offene Validierungen stoppen, bevor sie weitere Upstream-Aufrufe auslösen
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            BATCH_ADDRESSES.inc(len(unfinished), result="cancelled")
+            await asyncio.gather(*unfinished, return_exceptions=True)
+    return results
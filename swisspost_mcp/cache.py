@@ -0,0 +1,134 @@
+"""
+TTL/LRU-Cache für Swisspost Autocomplete-Antworten (/zips, /streets, /houses)
+
+Die Autocomplete-Daten ändern sich selten, werden in validate_smart aber
+mehrfach mit identischen Parametern abgefragt. Der Cache ist prozessweit,
+damit auch kurzlebige Agent-Instanzen (HTTP Proxy) davon profitieren.
+
+Beim geordneten Herunterfahren schreibt der Proxy den Cache in eine Datei
+(snapshot) und lädt ihn beim nächsten Start wieder (restore, siehe lifecycle.py).
+
+Konfiguration:
+- SWISSPOST_CACHE_TTL:   Lebensdauer in Sekunden (Standard: 3600, 0 = aus)
+- SWISSPOST_CACHE_SIZE:  Maximale Anzahl Einträge (Standard: 10000)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from swisspost_mcp.metrics import CACHE_REQUESTS
+
+
+class TTLCache:
+    """Threadsicherer LRU-Cache mit Ablaufzeit pro Eintrag"""
+
+    def __init__(self, name: str, maxsize: int = 10000, ttl: float = 3600.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    CACHE_REQUESTS.inc(cache=self.name, result="hit")
+                    return value
+                del self._data[key]
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        return None
+
+    def contains(self, key: Hashable) -> bool:
+        """Gültiger Eintrag vorhanden? (ohne LRU-Update und ohne Metriken, z.B. für den Warm-up)"""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def snapshot(self, path: str) -> int:
+        """Schreibt alle gültigen Einträge (JSON, Ablauf als Unix-Zeit) atomar nach `path`"""
+        now_monotonic, now_wall = time.monotonic(), time.time()
+        with self._lock:
+            entries = [[key, expires_at - now_monotonic + now_wall, value]
+                       for key, (expires_at, value) in self._data.items() if expires_at > now_monotonic]
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"cache": self.name, "entries": entries}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporary, path)
+        return len(entries)
+
+    def restore(self, path: str) -> int:
+        """Lädt noch gültige Einträge aus einem Snapshot (fehlende oder defekte Datei: 0)"""
+        if not self.enabled:
+            return 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f).get("entries", [])
+        except (OSError, ValueError, AttributeError):
+            return 0
+        now = time.time()
+        restored = 0
+        for key, expires_at, value in entries:
+            remaining = expires_at - now
+            if remaining > 0:
+                self.set(_as_key(key), value, ttl=min(remaining, self.ttl))
+                restored += 1
+        return restored
+
+
+def _as_key(value: Any) -> Hashable:
+    """JSON-Listen zurück in (verschachtelte) Tupel wie von make_key erzeugt"""
+    if isinstance(value, list):
+        return tuple(_as_key(item) for item in value)
+    return value
+
+
+def make_key(endpoint: str, params: Dict[str, Any]) -> Tuple:
+    """Cache-Key aus Endpoint und (sortierten) Query-Parametern"""
+    return (endpoint,) + tuple(sorted((key, str(value)) for key, value in params.items()))
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+AUTOCOMPLETE_CACHE = TTLCache(
+    "autocomplete",
+    maxsize=int(_env_number("SWISSPOST_CACHE_SIZE", 10000)),
+    ttl=_env_number("SWISSPOST_CACHE_TTL", 3600.0),
+)
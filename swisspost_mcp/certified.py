@@ -0,0 +1,324 @@
+"""
+Fingerprint-Store zertifizierter Adressen (memory-mapped, persistent)
+
+Der grösste Teil des Verkehrs sind Adressen, die bereits als (DOMICILE_)CERTIFIED
+validiert wurden. Für jede solche Adresse (korrigierte Form inkl. Personendaten)
+speichert der Store einen 64-Bit-Fingerprint mit Zeitpunkt und Qualität.
+validate_smart beantwortet einen Treffer ohne die erste Validierungsrunde.
+
+Damit veraltete Einträge begrenzt bleiben:
+- Einträge laufen nach SWISSPOST_CERTIFIED_TTL_DAYS ab
+- ein Anteil SWISSPOST_CERTIFIED_VERIFY der Treffer wird trotzdem validiert;
+  ist die Adresse nicht mehr zertifiziert, wird der Eintrag entfernt
+
+Dateiformat: Header (32 Bytes) + offene Hashtabelle (lineares Sondieren) mit
+16-Byte-Slots (Fingerprint, Zeitpunkt, Qualität). Die Datei wird per mmap
+genutzt; wächst die Tabelle über 70 % Füllgrad, wird sie ohne abgelaufene
+Einträge neu aufgebaut. Kollisionen sind bei 64 Bit praktisch ausgeschlossen.
+Die Datei gehört einem Prozess (Proxy oder MCP Server); Neuaufbau offline per CLI.
+
+Konfiguration:
+- SWISSPOST_CERTIFIED_STORE:      Pfad der Datei; leer = Store aus (Standard)
+- SWISSPOST_CERTIFIED_TTL_DAYS:   Gültigkeit eines Eintrags in Tagen (Standard: 30)
+- SWISSPOST_CERTIFIED_VERIFY:     Anteil der Treffer, die trotzdem validiert werden (Standard: 0.05)
+
+Kommandozeile:
+    python -m swisspost_mcp.certified rebuild --state .jobs/revalidation.sqlite3 ergebnisse.ndjson
+    python -m swisspost_mcp.certified stats
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import random
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+
+from swisspost_mcp import metrics
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("certified")
+
+DAY = 86400.0
+MAGIC = b"SPFS"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQ8x")
+SLOT = struct.Struct("<QIB3x")
+MIN_CAPACITY = 1 << 12
+MAX_LOAD = 0.7
+
+QUALITIES = ("CERTIFIED", "DOMICILE_CERTIFIED")
+FINGERPRINT_FIELDS = ("street_name", "house_number", "postcode", "city", "firstname", "lastname", "company")
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+STORE_PATH = os.getenv("SWISSPOST_CERTIFIED_STORE", "").strip()
+TTL_DAYS = _env_number("SWISSPOST_CERTIFIED_TTL_DAYS", 30.0)
+VERIFY_RATE = min(1.0, max(0.0, _env_number("SWISSPOST_CERTIFIED_VERIFY", 0.05)))
+
+CERTIFIED_LOOKUPS = metrics.REGISTRY.counter(
+    "swisspost_certified_lookups_total",
+    "Abfragen des Fingerprint-Stores (hit, miss, expired, verify)",
+    ("result",),
+)
+CERTIFIED_ENTRIES = metrics.REGISTRY.gauge(
+    "swisspost_certified_entries",
+    "Einträge im Fingerprint-Store (inkl. abgelaufener bis zum nächsten Neuaufbau)",
+)
+
+
+def fingerprint(fields: Mapping[str, Any]) -> int:
+    """64-Bit-Fingerprint der korrigierten Adresse; Gross-/Kleinschreibung und Leerraum spielen keine Rolle"""
+    canonical = "\x1f".join(" ".join(str(fields.get(field) or "").split()).casefold()
+                            for field in FINGERPRINT_FIELDS)
+    value = int.from_bytes(hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1  # 0 markiert freie Slots
+
+
+class CertifiedStore:
+    """Persistente Fingerprint-Menge zertifizierter Adressen (threadsicher)"""
+
+    def __init__(self, path: str, ttl_days: float = TTL_DAYS, verify_rate: float = VERIFY_RATE,
+                 capacity: int = MIN_CAPACITY):
+        self.path = path
+        self.ttl = ttl_days * DAY
+        self.verify_rate = verify_rate
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+            self._create(path, capacity)
+        self._open()
+
+    # --- Datei ---------------------------------------------------------------
+
+    @staticmethod
+    def _create(path: str, capacity: int) -> None:
+        size = 1
+        while size < capacity:
+            size <<= 1
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, size, 0))
+            f.truncate(HEADER.size + size * SLOT.size)
+
+    def _open(self) -> None:
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, capacity, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or len(self._map) != HEADER.size + capacity * SLOT.size:
+            self._map.close()
+            self._file.close()
+            logger.warning("Fingerprint-Store unlesbar, wird neu angelegt: %s", self.path)
+            self._create(self.path, MIN_CAPACITY)
+            return self._open()
+        self._capacity = capacity
+        self._count = count
+        CERTIFIED_ENTRIES.set(count)
+
+    def _write_count(self) -> None:
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self._capacity, self._count)
+
+    def _slot(self, fp: int) -> Tuple[int, int, int, int]:
+        """(Slot-Offset, Fingerprint, Zeitpunkt, Qualität) des Fingerprints bzw. des ersten freien Slots"""
+        mask = self._capacity - 1
+        index = fp & mask
+        while True:
+            offset = HEADER.size + index * SLOT.size
+            stored, certified_at, quality = SLOT.unpack_from(self._map, offset)
+            if stored == fp or stored == 0:
+                return offset, stored, certified_at, quality
+            index = (index + 1) & mask
+
+    def _entries(self, now: float) -> Iterator[Tuple[int, int, int]]:
+        for offset in range(HEADER.size, len(self._map), SLOT.size):
+            fp, certified_at, quality = SLOT.unpack_from(self._map, offset)
+            if fp and certified_at and now - certified_at < self.ttl:
+                yield fp, certified_at, quality
+
+    def _rebuild(self, now: float) -> None:
+        """Neuaufbau ohne abgelaufene Einträge; verdoppelt die Kapazität, falls nötig"""
+        live = list(self._entries(now))
+        capacity = self._capacity
+        while len(live) + 1 > capacity * MAX_LOAD / 2:
+            capacity <<= 1
+        temporary = f"{self.path}.tmp"
+        self._create(temporary, capacity)
+        with open(temporary, "r+b") as f, mmap.mmap(f.fileno(), 0) as target:
+            mask = capacity - 1
+            for fp, certified_at, quality in live:
+                index = fp & mask
+                while SLOT.unpack_from(target, HEADER.size + index * SLOT.size)[0]:
+                    index = (index + 1) & mask
+                SLOT.pack_into(target, HEADER.size + index * SLOT.size, fp, certified_at, quality)
+            HEADER.pack_into(target, 0, MAGIC, VERSION, capacity, len(live))
+            target.flush()
+        self._map.close()
+        self._file.close()
+        os.replace(temporary, self.path)
+        self._open()
+
+    # --- API -----------------------------------------------------------------
+
+    def lookup(self, fields: Mapping[str, Any], now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Gültiger Eintrag für die korrigierte Adresse?
+        Returns: {'quality', 'certified_at', 'verify'} oder None; bei verify=True soll der
+        Aufrufer trotzdem validieren und den Eintrag mit discard() entfernen, falls nicht mehr zertifiziert
+        """
+        now = now or time.time()
+        with self._lock:
+            _, stored, certified_at, quality = self._slot(fingerprint(fields))
+        if not stored or not certified_at:
+            CERTIFIED_LOOKUPS.inc(result="miss")
+            return None
+        if now - certified_at >= self.ttl:
+            CERTIFIED_LOOKUPS.inc(result="expired")
+            return None
+        verify = bool(self.verify_rate) and random.random() < self.verify_rate
+        CERTIFIED_LOOKUPS.inc(result="verify" if verify else "hit")
+        return {'quality': QUALITIES[quality] if quality < len(QUALITIES) else QUALITIES[0],
+                'certified_at': certified_at, 'verify': verify}
+
+    def add(self, fields: Mapping[str, Any], quality: str, certified_at: Optional[float] = None) -> None:
+        """Merkt eine als CERTIFIED/DOMICILE_CERTIFIED validierte Adresse (aktualisiert den Zeitpunkt)"""
+        if quality not in QUALITIES:
+            return
+        certified_at = certified_at or time.time()
+        fp = fingerprint(fields)
+        with self._lock:
+            offset, stored, _, _ = self._slot(fp)
+            if not stored:
+                if self._count + 1 > self._capacity * MAX_LOAD:
+                    self._rebuild(time.time())
+                    offset, stored, _, _ = self._slot(fp)
+                if not stored:
+                    self._count += 1
+                    self._write_count()
+                    CERTIFIED_ENTRIES.set(self._count)
+            SLOT.pack_into(self._map, offset, fp, int(certified_at), QUALITIES.index(quality))
+
+    def discard(self, fields: Mapping[str, Any]) -> None:
+        """Eintrag ungültig machen (Adresse nicht mehr zertifiziert); der Slot bleibt bis zum Neuaufbau belegt"""
+        fp = fingerprint(fields)
+        with self._lock:
+            offset, stored, _, _ = self._slot(fp)
+            if stored:
+                SLOT.pack_into(self._map, offset, fp, 0, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            live = sum(1 for _ in self._entries(now))
+            return {'path': self.path, 'capacity': self._capacity, 'entries': self._count, 'live': live,
+                    'bytes': len(self._map)}
+
+    def flush(self) -> None:
+        with self._lock:
+            self._map.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+
+
+_store: Optional[CertifiedStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[CertifiedStore]:
+    """Prozessweiter Store gemäss SWISSPOST_CERTIFIED_STORE (None, wenn nicht konfiguriert)"""
+    global _store
+    if not STORE_PATH:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = CertifiedStore(STORE_PATH)
+        return _store
+
+
+# --- Neuaufbau aus Validierungsergebnissen ----------------------------------------
+
+
+def records_from_state(path: str) -> Iterator[Tuple[Dict[str, Any], str, float]]:
+    """(corrected, quality, validated_at) aus dem SQLite-Store der inkrementellen Re-Validierung"""
+    db = sqlite3.connect(path)
+    try:
+        placeholders = ",".join("?" * len(QUALITIES))
+        rows = db.execute(f"SELECT quality, validated_at, result FROM records WHERE quality IN ({placeholders})",
+                          QUALITIES)
+        for quality, validated_at, result in rows:
+            corrected = json.loads(result).get("corrected")
+            if isinstance(corrected, dict):
+                yield corrected, quality, validated_at
+    finally:
+        db.close()
+
+
+def records_from_ndjson(path: str) -> Iterator[Tuple[Dict[str, Any], str, float]]:
+    """Ergebnisse mit quality und corrected (Job-Ergebnisse, Tool-Ausgaben); Zeitpunkt = Änderungszeit der Datei"""
+    validated_at = os.path.getmtime(path)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or record.get("quality") not in QUALITIES:
+                continue
+            if isinstance(record.get("corrected"), dict):
+                yield record["corrected"], record["quality"], validated_at
+
+
+def rebuild(store: CertifiedStore, sources: Iterable[Tuple[Dict[str, Any], str, float]]) -> int:
+    count = 0
+    for corrected, quality, validated_at in sources:
+        store.add(corrected, quality, validated_at)
+        count += 1
+    store.flush()
+    return count
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fingerprint-Store zertifizierter Adressen")
+    parser.add_argument("--store", default=STORE_PATH or None, help="Pfad (Standard: SWISSPOST_CERTIFIED_STORE)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = commands.add_parser("rebuild", help="Store aus Validierungsergebnissen füllen")
+    rebuild_parser.add_argument("sources", nargs="*", help="NDJSON mit quality und corrected")
+    rebuild_parser.add_argument("--state", default=None, help="SQLite-Store der inkrementellen Re-Validierung")
+    commands.add_parser("stats", help="Grösse und Füllstand ausgeben")
+    args = parser.parse_args(argv)
+    if not args.store:
+        parser.error("--store oder SWISSPOST_CERTIFIED_STORE angeben")
+
+    store = CertifiedStore(args.store)
+    try:
+        if args.command == "rebuild":
+            count = 0
+            if args.state:
+                count += rebuild(store, records_from_state(args.state))
+            for path in args.sources:
+                count += rebuild(store, records_from_ndjson(path))
+            print(json.dumps({'added': count, **store.stats()}, ensure_ascii=False))
+        else:
+            print(json.dumps(store.stats(), ensure_ascii=False))
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
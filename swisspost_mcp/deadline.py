@@ -0,0 +1,92 @@
+"""
+End-to-End-Deadline für validate_smart
+
+n8n bricht einen Aufruf nach 30 s ab; ohne Deadline liefen Korrekturschritte
+und Upstream-Aufrufe trotzdem weiter. Die Deadline kommt aus dem Tool-Argument
+`timeout_ms`, beim Proxy aus dem Header `X-Timeout-Ms` bzw. `?timeout_ms=`.
+Sie gilt für den ganzen Aufruf: der Scheduler vergibt nach Ablauf keine Slots
+mehr (scheduler.activate), laufende Upstream-Aufrufe werden abgebrochen und
+validate_smart liefert das beste bis dahin gefundene Ergebnis, markiert mit
+`deadline_exceeded`.
+
+Als "bestes Ergebnis" gilt die Validierungsantwort mit der höchsten Qualität,
+die während des Aufrufs eingegangen ist (BestSoFar, ContextVar pro Request).
+Die Rangfolge liefert der Aufrufer (SmartAddressAgent.quality_to_score), damit
+sie mit dem Score der Antwort übereinstimmt.
+
+Konfiguration:
+- SWISSPOST_REQUEST_TIMEOUT_MS:  Standard-Deadline ohne Angabe (Standard: 0 = keine)
+"""
+
+import contextvars
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from swisspost_mcp import metrics
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+DEFAULT_TIMEOUT_MS = max(0.0, _env_number("SWISSPOST_REQUEST_TIMEOUT_MS", 0.0))
+
+DEADLINE_EXCEEDED = metrics.REGISTRY.counter(
+    "swisspost_deadline_exceeded_total",
+    "Aufrufe, deren Deadline ablief, nach Ergebnis (best_effort = Teilergebnis geliefert, no_result)",
+    ("outcome",),
+)
+
+_current: "contextvars.ContextVar[Optional[BestSoFar]]" = contextvars.ContextVar(
+    "swisspost_best_so_far", default=None
+)
+
+
+def resolve_timeout(value: Any = None, default_ms: float = DEFAULT_TIMEOUT_MS) -> Optional[float]:
+    """Tool-Argument/Header in ms -> Sekunden; ungültig oder <= 0: Standard, None = keine Deadline"""
+    try:
+        milliseconds = float(value) if value not in (None, "") else default_ms
+    except (TypeError, ValueError):
+        milliseconds = default_ms
+    if milliseconds <= 0:
+        return None
+    return milliseconds / 1000.0
+
+
+class BestSoFar:
+    """Merkt sich die beste Validierungsantwort eines Requests samt gesendeter Adresse (höchster `score`)"""
+
+    __slots__ = ("score", "started", "data", "validation", "quality")
+
+    def __init__(self, score: Callable[[str], int]):
+        self.score = score
+        self.started = time.monotonic()
+        self.data: Optional[Dict[str, Any]] = None
+        self.validation: Optional[Dict[str, Any]] = None
+        self.quality: Optional[str] = None
+
+    def offer(self, data: Dict[str, Any], validation: Dict[str, Any]) -> None:
+        if validation.get('status') != 'success':
+            return
+        quality = validation.get('response', {}).get('quality', 'UNUSABLE')
+        if self.quality is None or self.score(quality) > self.score(self.quality):
+            self.data, self.validation, self.quality = dict(data), validation, quality
+
+    def elapsed_ms(self) -> float:
+        return round((time.monotonic() - self.started) * 1000.0, 1)
+
+
+def activate(best: BestSoFar) -> contextvars.Token:
+    return _current.set(best)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[BestSoFar]:
+    return _current.get()
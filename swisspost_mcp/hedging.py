@@ -0,0 +1,178 @@
+"""
+Hedged Requests gegen Ausreisser in der Upstream-Latenz
+
+Der Validierungs-Endpoint hängt gelegentlich mehrere Sekunden, während die
+meisten Antworten nach wenigen hundert Millisekunden da sind. Hat ein
+idempotenter Aufruf (Autocomplete-GETs, Validierung) nach der Schwelle noch
+nicht geantwortet, geht ein zweiter, identischer Aufruf raus; die erste
+erfolgreiche Antwort gewinnt, der andere Aufruf wird abgebrochen.
+
+Die Schwelle ist ein gleitendes Perzentil der Latenzen pro Endpoint (die
+letzten WINDOW Aufrufe). Ein Budget begrenzt die Mehrlast: jeder Aufruf spart
+SWISSPOST_HEDGE_BUDGET Hedge-Token an, jeder Hedge kostet eines. Bei einem
+Budget von 0.05 steigt die Upstream-Last also um höchstens ~5 % (plus einem
+kleinen Vorrat für Spitzen). Jeder Versuch belegt einen eigenen Scheduler-Slot.
+
+Konfiguration:
+- SWISSPOST_HEDGE:             Hedging aktivieren (Standard: aus)
+- SWISSPOST_HEDGE_PERCENTILE:  Perzentil der Latenz als Schwelle (Standard: 95)
+- SWISSPOST_HEDGE_BUDGET:      Maximaler Anteil zusätzlicher Aufrufe (Standard: 0.05)
+- SWISSPOST_HEDGE_MIN_MS:      Untergrenze der Schwelle in ms (Standard: 50)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from swisspost_mcp import metrics
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("hedging")
+
+T = TypeVar("T")
+
+WINDOW = 200
+MIN_SAMPLES = 20
+RECOMPUTE_EVERY = 16
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+ENABLED = os.getenv("SWISSPOST_HEDGE", "0").strip().lower() in ("1", "true", "yes")
+PERCENTILE = min(99.9, max(50.0, _env_number("SWISSPOST_HEDGE_PERCENTILE", 95.0)))
+BUDGET = min(1.0, max(0.0, _env_number("SWISSPOST_HEDGE_BUDGET", 0.05)))
+MIN_DELAY = max(0.0, _env_number("SWISSPOST_HEDGE_MIN_MS", 50.0)) / 1000.0
+
+HEDGES = metrics.REGISTRY.counter(
+    "swisspost_hedges_total",
+    "Hedged Requests nach Endpoint und Ergebnis (sent, won, lost, denied)",
+    ("endpoint", "result"),
+)
+HEDGE_THRESHOLD = metrics.REGISTRY.gauge(
+    "swisspost_hedge_threshold_seconds",
+    "Aktuelle Hedge-Schwelle pro Endpoint",
+    ("endpoint",),
+)
+
+
+class LatencyWindow:
+    """Gleitendes Fenster der letzten Latenzen eines Endpoints mit Perzentil-Schwelle"""
+
+    def __init__(self, endpoint: str, percentile: float = PERCENTILE, size: int = WINDOW):
+        self.endpoint = endpoint
+        self.percentile = percentile
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._since_recompute = 0
+        self._threshold: Optional[float] = None
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_recompute += 1
+        if len(self._samples) >= MIN_SAMPLES and (self._threshold is None or self._since_recompute >= RECOMPUTE_EVERY):
+            ordered = sorted(self._samples)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100.0))
+            self._threshold = max(MIN_DELAY, ordered[index])
+            self._since_recompute = 0
+            HEDGE_THRESHOLD.set(self._threshold, endpoint=self.endpoint)
+
+    def threshold(self) -> Optional[float]:
+        """Schwelle in Sekunden, None solange zu wenige Messungen vorliegen"""
+        return self._threshold
+
+
+class HedgeBudget:
+    """Token-Konto: jeder Aufruf zahlt `ratio` ein, jeder Hedge kostet 1"""
+
+    def __init__(self, ratio: float = BUDGET, reserve: float = 10.0):
+        self.ratio = ratio
+        self.capacity = max(1.0, reserve)
+        self._balance = 1.0 if ratio > 0 else 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._balance < 1.0:
+                return False
+            self._balance -= 1.0
+            return True
+
+
+class Hedger:
+    """Führt idempotente Upstream-Aufrufe bei Bedarf doppelt aus"""
+
+    def __init__(self, enabled: bool = ENABLED, budget: Optional[HedgeBudget] = None):
+        self.enabled = enabled
+        self.budget = budget or HedgeBudget()
+        self._windows: Dict[str, LatencyWindow] = {}
+
+    def window(self, endpoint: str) -> LatencyWindow:
+        window = self._windows.get(endpoint)
+        if window is None:
+            window = self._windows[endpoint] = LatencyWindow(endpoint)
+        return window
+
+    async def run(self, endpoint: str, attempt: Callable[[int], Awaitable[T]]) -> T:
+        """
+        Führt `attempt(0)` aus; ist nach der Schwelle keine Antwort da und das Budget
+        reicht, startet ein zweiter Versuch `attempt(1)` (Index z.B. für den Trace).
+        Liefert das erste erfolgreiche Ergebnis; schlagen alle Versuche fehl, wird der
+        Fehler des ersten Versuchs weitergereicht.
+        """
+        if not self.enabled:
+            return await attempt(0)
+
+        window = self.window(endpoint)
+        self.budget.deposit()
+
+        async def timed(index: int) -> T:
+            started = time.perf_counter()
+            result = await attempt(index)
+            window.observe(time.perf_counter() - started)
+            return result
+
+        started = time.perf_counter()
+        tasks: List["asyncio.Task[T]"] = [asyncio.ensure_future(timed(0))]
+        try:
+            delay = window.threshold()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if self.budget.withdraw():
+                        HEDGES.inc(endpoint=endpoint, result="sent")
+                        logger.debug("Hedge für %s nach %.0f ms", endpoint, delay * 1000)
+                        tasks.append(asyncio.ensure_future(timed(1)))
+                    else:
+                        HEDGES.inc(endpoint=endpoint, result="denied")
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1:
+                            HEDGES.inc(endpoint=endpoint, result="won" if task is tasks[1] else "lost")
+                        return task.result()
+            # Alle Versuche fehlgeschlagen: der Fehler des ersten Versuchs ist massgeblich
+            raise tasks[0].exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    if task is tasks[0]:
+                        # Abgebrochener erster Versuch: seine Laufzeit ist eine Untergrenze und gehört ins Fenster
+                        window.observe(time.perf_counter() - started)
+
+
+HEDGER = Hedger()
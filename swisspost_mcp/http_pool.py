@@ -0,0 +1,52 @@
+"""
+Gemeinsamer HTTP-Verbindungspool für Upstream-Aufrufe (OAuth und Swisspost API)
+
+Bisher öffnete jeder Aufruf einen eigenen httpx.AsyncClient und damit eine neue
+TCP/TLS-Verbindung. Alle Aufrufe eines Prozesses (alle MCP-Sessions, Proxy,
+Jobs, Warm-up) teilen sich jetzt einen Client mit Keep-Alive. Der Client ist an
+die Event-Loop gebunden, in der er erstellt wurde; pro Loop gibt es daher einen.
+
+Konfiguration:
+- SWISSPOST_HTTP_MAX_CONNECTIONS:  Maximale Verbindungen zum Upstream (Standard: 32)
+- SWISSPOST_HTTP_KEEPALIVE:        Davon offen gehaltene Verbindungen (Standard: 16)
+"""
+
+import asyncio
+import os
+import weakref
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover - httpx wird erst beim ersten Aufruf importiert
+    import httpx
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+MAX_CONNECTIONS = max(1, _env_int("SWISSPOST_HTTP_MAX_CONNECTIONS", 32))
+KEEPALIVE_CONNECTIONS = max(0, min(MAX_CONNECTIONS, _env_int("SWISSPOST_HTTP_KEEPALIVE", 16)))
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def client() -> "httpx.AsyncClient":
+    """Gemeinsamer Client der laufenden Event-Loop (wird bei Bedarf erstellt)"""
+    loop = asyncio.get_running_loop()
+    shared = _clients.get(loop)
+    if shared is None or shared.is_closed:
+        import httpx
+        shared = _clients[loop] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=KEEPALIVE_CONNECTIONS)
+        )
+    return shared
+
+
+async def aclose() -> None:
+    """Schliesst den Client der laufenden Event-Loop (z.B. beim Herunterfahren)"""
+    shared = _clients.pop(asyncio.get_running_loop(), None)
+    if shared is not None:
+        await shared.aclose()
@@ -0,0 +1,162 @@
+"""
+Inkrementelle Re-Validierung: nur geänderte oder veraltete Datensätze prüfen
+
+Für jede Datensatz-ID speichert ein lokaler SQLite-Store den Inhalts-Hash der
+Adressfelder, die Qualität, den Zeitpunkt der letzten Validierung und den
+kompakten Ergebnis-Datensatz. Ein Datensatz wird nur dann erneut an
+validate_smart geschickt, wenn sich sein Inhalt geändert hat oder das von der
+Qualität abhängige Frische-Fenster abgelaufen ist; sonst wird das gespeicherte
+Ergebnis übernommen.
+
+Konfiguration:
+- SWISSPOST_STATE_DB:   Pfad der SQLite-Datei (Standard: .jobs/revalidation.sqlite3)
+- SWISSPOST_FRESHNESS:  Frische in Tagen pro Qualität, z.B. "CERTIFIED=90,USABLE=7,UNUSABLE=1"
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from swisspost_mcp import metrics
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("incremental")
+
+DAY = 86400.0
+
+# Frische-Fenster in Tagen: zertifizierte Adressen ändern sich selten, problematische sollen bald erneut geprüft werden
+DEFAULT_FRESHNESS_DAYS = {
+    "DOMICILE_CERTIFIED": 90.0,
+    "CERTIFIED": 90.0,
+    "VERIFIED": 30.0,
+    "USABLE": 7.0,
+    "COMPROMISED": 1.0,
+    "UNUSABLE": 1.0,
+}
+# Unbekannte Qualitäten: sofort veraltet
+FALLBACK_FRESHNESS_DAYS = 0.0
+
+DECISIONS = ("new", "changed", "stale", "unchanged")
+
+INCREMENTAL_RECORDS = metrics.REGISTRY.counter(
+    "swisspost_incremental_records_total",
+    "Entscheidungen der inkrementellen Re-Validierung (new, changed, stale, unchanged)",
+    ("decision",),
+)
+
+
+def _parse_freshness(value: Optional[str]) -> Dict[str, float]:
+    result = dict(DEFAULT_FRESHNESS_DAYS)
+    for part in filter(None, (p.strip() for p in (value or "").split(","))):
+        quality, _, days = part.partition("=")
+        try:
+            result[quality.strip().upper()] = float(days)
+        except ValueError:
+            logger.warning("Ungültiger Frische-Wert ignoriert: %s", part)
+    return result
+
+
+FRESHNESS_DAYS = _parse_freshness(os.getenv("SWISSPOST_FRESHNESS"))
+
+
+def default_path() -> str:
+    from swisspost_mcp.jobs import JOBS_DIR
+    return os.getenv("SWISSPOST_STATE_DB", os.path.join(JOBS_DIR, "revalidation.sqlite3"))
+
+
+def content_hash(address: Dict[str, Any], fields: Sequence[str]) -> str:
+    """Hash der Adressfelder; Gross-/Kleinschreibung und Leerraum spielen keine Rolle"""
+    canonical = "\x1f".join(" ".join(str(address.get(field) or "").split()).casefold() for field in fields)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RevalidationState:
+    """SQLite-Store: record_id -> (content_hash, quality, validated_at, result)"""
+
+    def __init__(self, path: Optional[str] = None, freshness_days: Optional[Dict[str, float]] = None):
+        self.path = path or default_path()
+        self.freshness_days = freshness_days or FRESHNESS_DAYS
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " record_id TEXT PRIMARY KEY,"
+            " content_hash TEXT NOT NULL,"
+            " quality TEXT,"
+            " validated_at REAL NOT NULL,"
+            " result TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def is_fresh(self, quality: Optional[str], validated_at: float, now: Optional[float] = None) -> bool:
+        days = self.freshness_days.get((quality or "").upper(), FALLBACK_FRESHNESS_DAYS)
+        return ((now or time.time()) - validated_at) < days * DAY
+
+    def classify(self, items: Iterable[Tuple[str, str]],
+                 now: Optional[float] = None) -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Entscheidet für (record_id, content_hash) Paare, ob neu validiert werden muss.
+        Returns: {record_id: (Entscheidung, gespeichertes Ergebnis bei "unchanged")}
+        """
+        items = list(items)
+        stored: Dict[str, Tuple[str, Optional[str], float, str]] = {}
+        with self._lock:
+            # SQLite erlaubt begrenzt viele Platzhalter pro Statement
+            for start in range(0, len(items), 500):
+                ids = [record_id for record_id, _ in items[start:start + 500]]
+                rows = self._db.execute(
+                    f"SELECT record_id, content_hash, quality, validated_at, result FROM records "
+                    f"WHERE record_id IN ({','.join('?' * len(ids))})",
+                    ids,
+                )
+                for record_id, digest, quality, validated_at, result in rows:
+                    stored[record_id] = (digest, quality, validated_at, result)
+
+        now = now or time.time()
+        decisions: Dict[str, Tuple[str, Optional[Dict[str, Any]]]] = {}
+        for record_id, digest in items:
+            previous = stored.get(record_id)
+            if previous is None:
+                decision, result = "new", None
+            elif previous[0] != digest:
+                decision, result = "changed", None
+            elif not self.is_fresh(previous[1], previous[2], now):
+                decision, result = "stale", None
+            else:
+                decision, result = "unchanged", json.loads(previous[3])
+            INCREMENTAL_RECORDS.inc(decision=decision)
+            decisions[record_id] = (decision, result)
+        return decisions
+
+    def update(self, entries: List[Tuple[str, str, Optional[str], Dict[str, Any]]],
+               now: Optional[float] = None) -> None:
+        """Speichert (record_id, content_hash, quality, result) für frisch validierte Datensätze"""
+        if not entries:
+            return
+        now = now or time.time()
+        rows = [(record_id, digest, quality, now, json.dumps(result, ensure_ascii=False))
+                for record_id, digest, quality, result in entries]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO records (record_id, content_hash, quality, validated_at, result) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
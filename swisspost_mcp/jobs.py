@@ -0,0 +1,581 @@
+"""
+Asynchrone Validierungs-Jobs für grosse Dateien (HTTP Proxy: /jobs)
+
+Eine hochgeladene CSV- oder NDJSON-Datei wird auf Platte gespeichert und von
+einem Worker-Pool zeilenweise durch validate_smart geschickt. Ergebnisse
+werden an `results.ndjson` angehängt; nach jedem Block wird ein Checkpoint
+(verarbeitete Zeilen, Byte-Offset der Ergebnisdatei) in `job.json` geschrieben.
+Nach einem Neustart setzen die Worker offene Jobs ab dem letzten Checkpoint fort.
+Im inkrementellen Modus (`incremental`) werden unveränderte, noch frische
+Datensätze aus dem Re-Validierungs-Store übernommen (siehe incremental.py).
+
+Verzeichnisaufbau pro Job: <SWISSPOST_JOBS_DIR>/<job_id>/{job.json, upload.csv|upload.ndjson, results.ndjson}
+
+Konfiguration:
+- SWISSPOST_JOBS_DIR:            Ablage der Jobs (Standard: .jobs im Projektverzeichnis)
+- SWISSPOST_JOB_WORKERS:         Gleichzeitig bearbeitete Jobs (Standard: 2)
+- SWISSPOST_JOB_CONCURRENCY:     Gleichzeitige Zeilen pro Job (Standard: 8)
+- SWISSPOST_JOB_CHECKPOINT_ROWS: Zeilen pro Checkpoint (Standard: 200)
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Mapping
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from swisspost_mcp import incremental, metrics
+from swisspost_mcp.log import get_logger
+from swisspost_mcp.records import plain
+
+logger = get_logger("jobs")
+
+try:
+    import pyarrow  # type: ignore
+    import pyarrow.parquet  # type: ignore
+except ImportError:  # pragma: no cover - optionale Abhängigkeit
+    pyarrow = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+DEFAULT_JOBS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".jobs")
+JOBS_DIR = os.getenv("SWISSPOST_JOBS_DIR", DEFAULT_JOBS_DIR)
+WORKERS = max(1, _env_int("SWISSPOST_JOB_WORKERS", 2))
+CONCURRENCY = max(1, _env_int("SWISSPOST_JOB_CONCURRENCY", 8))
+CHECKPOINT_ROWS = max(1, _env_int("SWISSPOST_JOB_CHECKPOINT_ROWS", 200))
+
+INPUT_FORMATS = ("csv", "ndjson")
+RESULT_FORMATS = ("csv", "ndjson", "parquet")
+ACTIVE_STATES = ("queued", "running")
+
+# Adressfelder, die an validate_smart übergeben werden (Rest der Zeile bleibt unberührt)
+ADDRESS_FIELDS = ("street", "street2", "city", "postcode", "firstname", "lastname", "company")
+REQUIRED_FIELDS = ("street", "city", "postcode")
+RESULT_COLUMNS = ("row", "id") + tuple(f"input_{field}" for field in ADDRESS_FIELDS) + (
+    "status", "quality", "score", "street_name", "house_number", "postcode", "city",
+    "street_full", "corrections", "error", "reused",
+)
+
+JOB_ROWS = metrics.REGISTRY.counter(
+    "swisspost_job_rows_total",
+    "In Jobs verarbeitete Zeilen nach Ergebnis (success, failed, error)",
+    ("outcome",),
+)
+JOBS_ACTIVE = metrics.REGISTRY.gauge(
+    "swisspost_jobs_active",
+    "Wartende und laufende Jobs",
+    ("status",),
+)
+
+
+class JobError(Exception):
+    """Ungültige Job-Anfrage (Format, Upload)"""
+
+
+class JobNotFound(JobError):
+    """Unbekannte Job-ID"""
+
+
+class Job:
+    """Zustand eines Jobs; wird als job.json persistiert"""
+
+    FIELDS = ("id", "status", "input_format", "delimiter", "priority", "incremental", "total", "processed",
+              "succeeded", "failed", "errors", "reused", "qualities", "results_bytes", "created_at",
+              "started_at", "finished_at", "updated_at", "error", "cancel_requested")
+
+    def __init__(self, **values: Any):
+        self.id: str = values.get("id") or uuid.uuid4().hex[:16]
+        self.status: str = values.get("status", "queued")
+        self.input_format: str = values.get("input_format", "csv")
+        self.delimiter: str = values.get("delimiter", ",")
+        self.priority: str = values.get("priority", "bulk")
+        self.incremental: bool = values.get("incremental", False)
+        self.total: int = values.get("total", 0)
+        self.processed: int = values.get("processed", 0)
+        self.succeeded: int = values.get("succeeded", 0)
+        self.failed: int = values.get("failed", 0)
+        self.errors: int = values.get("errors", 0)
+        self.reused: int = values.get("reused", 0)
+        self.qualities: Dict[str, int] = dict(values.get("qualities") or {})
+        self.results_bytes: int = values.get("results_bytes", 0)
+        self.created_at: float = values.get("created_at", time.time())
+        self.started_at: Optional[float] = values.get("started_at")
+        self.finished_at: Optional[float] = values.get("finished_at")
+        self.updated_at: float = values.get("updated_at", self.created_at)
+        self.error: Optional[str] = values.get("error")
+        self.cancel_requested: bool = values.get("cancel_requested", False)
+        # Nur für den Durchsatz des aktuellen Laufs (nicht persistiert)
+        self.run_started: Optional[float] = None
+        self.run_processed_start = self.processed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def progress(self) -> Dict[str, Any]:
+        """Status für GET /jobs/{id} inkl. Durchsatz (Zeilen/s) und geschätzter Restdauer"""
+        data = self.to_dict()
+        del data["results_bytes"], data["cancel_requested"]
+        data["percent"] = round(100.0 * self.processed / self.total, 2) if self.total else 0.0
+        rate = 0.0
+        if self.run_started is not None:
+            elapsed = (self.finished_at or time.time()) - self.run_started
+            if elapsed > 0:
+                rate = (self.processed - self.run_processed_start) / elapsed
+        data["rows_per_second"] = round(rate, 2)
+        remaining = self.total - self.processed
+        data["eta_seconds"] = round(remaining / rate, 1) if rate > 0 and self.status == "running" else None
+        return data
+
+
+def detect_format(value: Optional[str], content_type: Optional[str] = None) -> str:
+    """Eingabeformat aus ?format= bzw. Content-Type (Standard: csv)"""
+    if value:
+        fmt = value.strip().lower()
+        if fmt in ("jsonl", "json"):
+            fmt = "ndjson"
+        if fmt not in INPUT_FORMATS:
+            raise JobError(f"Unbekanntes Eingabeformat: {value} (erlaubt: {', '.join(INPUT_FORMATS)})")
+        return fmt
+    content_type = (content_type or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type or "json" in content_type:
+        return "ndjson"
+    return "csv"
+
+
+def _sniff_delimiter(sample: str) -> str:
+    try:
+        return csv.Sniffer().sniff(sample.splitlines()[0] if sample else "", delimiters=",;\t|").delimiter
+    except (csv.Error, IndexError):
+        return ","
+
+
+class JobStore:
+    """Persistenz der Jobs im Dateisystem"""
+
+    def __init__(self, root: str = JOBS_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, job_id: str) -> str:
+        if not job_id or not all(c.isalnum() for c in job_id):
+            raise JobNotFound(job_id)
+        return os.path.join(self.root, job_id)
+
+    def upload_path(self, job: Job) -> str:
+        return os.path.join(self._dir(job.id), f"upload.{job.input_format}")
+
+    def results_path(self, job: Job) -> str:
+        return os.path.join(self._dir(job.id), "results.ndjson")
+
+    def save(self, job: Job) -> None:
+        """Schreibt job.json atomar (tmp + replace), damit ein Absturz keinen halben Zustand hinterlässt"""
+        job.updated_at = time.time()
+        path = os.path.join(self._dir(job.id), "job.json")
+        tmp_path = path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(job.to_dict(), f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+    def create(self, chunks: Iterable[bytes], input_format: str, priority: str = "bulk",
+               incremental_mode: bool = False) -> Job:
+        """Speichert den Upload (gestreamt, ohne ihn im Speicher zu halten) und legt den Job an"""
+        job = Job(input_format=input_format, priority=priority, incremental=incremental_mode)
+        os.makedirs(self._dir(job.id))
+        try:
+            with open(self.upload_path(job), "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            if input_format == "csv":
+                with open(self.upload_path(job), "r", encoding="utf-8-sig", newline="") as f:
+                    job.delimiter = _sniff_delimiter(f.read(4096))
+            job.total = sum(1 for _ in self.iter_rows(job))
+            if job.total == 0:
+                raise JobError("Upload enthält keine Zeilen")
+            open(self.results_path(job), "wb").close()
+            self.save(job)
+        except BaseException:
+            self.delete(job.id)
+            raise
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        path = os.path.join(self._dir(job_id), "job.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                job = Job(**json.load(f))
+        except FileNotFoundError:
+            raise JobNotFound(job_id) from None
+        with self._lock:
+            return self._jobs.setdefault(job_id, job)
+
+    def list(self) -> List[Job]:
+        jobs = []
+        for name in sorted(os.listdir(self.root)):
+            if not os.path.isdir(os.path.join(self.root, name)):
+                continue
+            try:
+                jobs.append(self.get(name))
+            except (JobNotFound, ValueError, OSError):
+                continue
+        return sorted(jobs, key=lambda job: job.created_at)
+
+    def delete(self, job_id: str) -> None:
+        directory = self._dir(job_id)
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+    def iter_rows(self, job: Job, skip: int = 0) -> Iterator[Dict[str, Any]]:
+        """Eingabezeilen ab Zeile `skip` (CSV mit Kopfzeile oder ein JSON-Objekt pro Zeile)"""
+        path = self.upload_path(job)
+        if job.input_format == "csv":
+            with open(path, "r", encoding="utf-8-sig", newline="") as f:
+                for index, row in enumerate(csv.DictReader(f, delimiter=job.delimiter)):
+                    if index >= skip:
+                        yield {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+            return
+        with open(path, "r", encoding="utf-8-sig") as f:
+            index = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                if index >= skip:
+                    try:
+                        row = json.loads(line)
+                    except ValueError as e:
+                        row = {"_error": f"Ungültiges JSON: {e}"}
+                    yield row if isinstance(row, dict) else {"_error": "Zeile ist kein JSON-Objekt"}
+                index += 1
+
+    def append_results(self, job: Job, records: List[Dict[str, Any]]) -> None:
+        """Hängt Ergebnisse an und setzt den Checkpoint (Zeilen + Byte-Offset)"""
+        payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        with open(self.results_path(job), "r+b") as f:
+            # Nach einem Absturz hinter dem letzten Checkpoint geschriebene Zeilen verwerfen
+            f.truncate(job.results_bytes)
+            f.seek(job.results_bytes)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        job.results_bytes += len(payload)
+        job.processed += len(records)
+        self.save(job)
+
+    def iter_results(self, job: Job) -> Iterator[Dict[str, Any]]:
+        with open(self.results_path(job), "rb") as f:
+            remaining = job.results_bytes
+            for line in f:
+                if remaining <= 0:
+                    break
+                remaining -= len(line)
+                yield json.loads(line)
+
+
+def result_record(index: int, row: Dict[str, Any], result: Optional[Dict[str, Any]],
+                  error: Optional[str] = None) -> Dict[str, Any]:
+    """Kompakter Ergebnis-Datensatz pro Zeile (Eingabe, Qualität, korrigierte Adresse)"""
+    record: Dict[str, Any] = {
+        "row": index,
+        "id": row.get("id"),
+        "input": {field: row.get(field, "") for field in ADDRESS_FIELDS if row.get(field)},
+    }
+    if result is not None:
+        record["status"] = result.get("status")
+        record["quality"] = result.get("quality")
+        record["score"] = result.get("score")
+        record["corrected"] = plain(result.get("corrected"))
+        record["corrections"] = [c.get("type") for c in result.get("corrections") or [] if isinstance(c, Mapping)]
+        if result.get("error"):
+            error = str(result["error"])
+    if error:
+        record["error"] = error
+    return record
+
+
+def _state_key(row: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(record_id, content_hash) für den Re-Validierungs-Store; ohne id dient der Hash als ID"""
+    if row.get("_error") or any(not row.get(field) for field in REQUIRED_FIELDS):
+        return None
+    digest = incremental.content_hash(row, ADDRESS_FIELDS)
+    record_id = row.get("id")
+    return (digest if record_id in (None, "") else str(record_id)), digest
+
+
+def _flat_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    inputs = record.get("input") or {}
+    corrected = record.get("corrected") or {}
+    flat = {"row": record.get("row"), "id": None if record.get("id") is None else str(record["id"])}
+    for field in ADDRESS_FIELDS:
+        flat[f"input_{field}"] = inputs.get(field, "")
+    flat.update({
+        "status": record.get("status") or "error",
+        "quality": record.get("quality") or "",
+        "score": record.get("score"),
+        "street_name": corrected.get("street_name", ""),
+        "house_number": corrected.get("house_number", ""),
+        "postcode": corrected.get("postcode", ""),
+        "city": corrected.get("city", ""),
+        "street_full": corrected.get("street_full", ""),
+        "corrections": ",".join(record.get("corrections") or []),
+        "error": record.get("error", ""),
+        "reused": bool(record.get("reused")),
+    })
+    return flat
+
+
+def export_results(store: JobStore, job: Job, fmt: str) -> Iterator[bytes]:
+    """Ergebnisse als CSV, NDJSON oder Parquet (pyarrow, optional) in Blöcken"""
+    fmt = (fmt or "ndjson").strip().lower()
+    if fmt not in RESULT_FORMATS:
+        raise JobError(f"Unbekanntes Ergebnisformat: {fmt} (erlaubt: {', '.join(RESULT_FORMATS)})")
+    if fmt == "parquet" and pyarrow is None:
+        raise JobError("Parquet benötigt das optionale Paket pyarrow")
+    return _export(store, job, fmt)
+
+
+def _export(store: JobStore, job: Job, fmt: str) -> Iterator[bytes]:
+    if fmt == "ndjson":
+        with open(store.results_path(job), "rb") as f:
+            remaining = job.results_bytes
+            while remaining > 0:
+                chunk = f.read(min(65536, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        return
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        for index, record in enumerate(store.iter_results(job), 1):
+            writer.writerow(_flat_record(record))
+            if index % 1000 == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode("utf-8")
+        return
+    # Parquet braucht den Footer am Dateiende: eine Row Group pro Block in eine temporäre
+    # Datei neben den Ergebnissen schreiben und diese dann wie NDJSON blockweise ausliefern
+    types = {"row": pyarrow.int64(), "score": pyarrow.int64(), "reused": pyarrow.bool_()}
+    schema = pyarrow.schema([(column, types.get(column, pyarrow.string())) for column in RESULT_COLUMNS])
+    with tempfile.TemporaryFile(dir=os.path.dirname(store.results_path(job))) as spool:
+        writer = pyarrow.parquet.ParquetWriter(spool, schema)
+        try:
+            block: List[Dict[str, Any]] = []
+            for record in store.iter_results(job):
+                block.append(_flat_record(record))
+                if len(block) >= 10000:
+                    writer.write_table(pyarrow.Table.from_pylist(block, schema=schema))
+                    block = []
+            if block:
+                writer.write_table(pyarrow.Table.from_pylist(block, schema=schema))
+        finally:
+            writer.close()
+        spool.seek(0)
+        while True:
+            chunk = spool.read(65536)
+            if not chunk:
+                break
+            yield chunk
+
+
+class JobManager:
+    """
+    Worker-Pool für Jobs. Jeder Worker-Thread bearbeitet einen Job blockweise;
+    die Zeilen eines Blocks laufen über `run` (z.B. AgentRuntime.run) gleichzeitig
+    durch `validate`.
+    """
+
+    def __init__(self, store: JobStore, validate: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 run: Callable[[Awaitable[Any]], Any], workers: int = WORKERS,
+                 concurrency: int = CONCURRENCY, checkpoint_rows: int = CHECKPOINT_ROWS,
+                 state: Optional[incremental.RevalidationState] = None):
+        self.store = store
+        self.validate = validate
+        self.run = run
+        self.workers = workers
+        self.concurrency = concurrency
+        self.checkpoint_rows = checkpoint_rows
+        self._state = state
+        self._state_lock = threading.Lock()
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> int:
+        """Startet die Worker und reiht offene Jobs (auch nach Neustart) wieder ein"""
+        if not self._threads:
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"swisspost-job-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        resumed = 0
+        for job in self.store.list():
+            if job.status in ACTIVE_STATES:
+                if job.processed:
+                    logger.info("Job %s wird ab Zeile %s fortgesetzt", job.id, job.processed)
+                self._enqueue(job)
+                resumed += 1
+        return resumed
+
+    def _enqueue(self, job: Job) -> None:
+        JOBS_ACTIVE.inc(status="queued")
+        self._queue.put(job.id)
+
+    def submit(self, chunks: Iterable[bytes], input_format: str, priority: str = "bulk",
+               incremental_mode: bool = False) -> Job:
+        job = self.store.create(chunks, input_format, priority, incremental_mode)
+        logger.info("Job %s angelegt", job.id,
+                    extra={'rows': job.total, 'format': input_format, 'incremental': incremental_mode})
+        self._enqueue(job)
+        return job
+
+    def revalidation_state(self) -> incremental.RevalidationState:
+        """Re-Validierungs-Store, erst beim ersten inkrementellen Job geöffnet"""
+        with self._state_lock:
+            if self._state is None:
+                self._state = incremental.RevalidationState()
+            return self._state
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.store.get(job_id)
+        if job.status in ACTIVE_STATES:
+            job.cancel_requested = True
+            self.store.save(job)
+        return job
+
+    def _worker(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            JOBS_ACTIVE.dec(status="queued")
+            try:
+                job = self.store.get(job_id)
+                if job.status in ACTIVE_STATES:
+                    JOBS_ACTIVE.inc(status="running")
+                    try:
+                        self._process(job)
+                    finally:
+                        JOBS_ACTIVE.dec(status="running")
+            except Exception as e:
+                logger.error("Job %s abgebrochen: %s", job_id, e)
+                try:
+                    job = self.store.get(job_id)
+                    job.status, job.error, job.finished_at = "failed", str(e), time.time()
+                    self.store.save(job)
+                except JobError:
+                    pass
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = job.started_at or time.time()
+        job.run_started = time.time()
+        job.run_processed_start = job.processed
+        self.store.save(job)
+
+        block: List[Dict[str, Any]] = []
+        index = job.processed
+        for row in self.store.iter_rows(job, skip=job.processed):
+            block.append(row)
+            if len(block) >= self.checkpoint_rows:
+                if not self._checkpoint(job, index, block):
+                    return
+                index += len(block)
+                block = []
+        if block and not self._checkpoint(job, index, block):
+            return
+        job.status = "completed"
+        job.finished_at = time.time()
+        self.store.save(job)
+        logger.info("Job %s abgeschlossen", job.id, extra={'rows': job.processed, 'errors': job.errors})
+
+    def _checkpoint(self, job: Job, first_index: int, rows: List[Dict[str, Any]]) -> bool:
+        """Validiert einen Block und schreibt den Checkpoint; False wenn der Job abgebrochen wurde"""
+        if job.cancel_requested:
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self.store.save(job)
+            return False
+        keys: List[Optional[Tuple[str, str]]] = []
+        reused: Dict[int, Dict[str, Any]] = {}
+        if job.incremental:
+            keys = [_state_key(row) for row in rows]
+            decisions = self.revalidation_state().classify(key for key in keys if key is not None)
+            for offset, key in enumerate(keys):
+                if key is not None and decisions[key[0]][0] == "unchanged":
+                    record = dict(decisions[key[0]][1], row=first_index + offset, reused=True)
+                    reused[offset] = record
+            job.reused += len(reused)
+        records = self.run(self._validate_block(job, first_index, rows, reused))
+        if job.incremental:
+            # Nur echte Validierungen speichern (Fehler bleiben unbekannt und werden erneut versucht)
+            self.revalidation_state().update([
+                (key[0], key[1], record.get("quality"), record)
+                for offset, (key, record) in enumerate(zip(keys, records))
+                if key is not None and offset not in reused and not record.get("error")
+            ])
+        for record in records:
+            if record.get("error"):
+                job.errors += 1
+                JOB_ROWS.inc(outcome="error")
+            elif record.get("status") == "success":
+                job.succeeded += 1
+                JOB_ROWS.inc(outcome="success")
+            else:
+                job.failed += 1
+                JOB_ROWS.inc(outcome="failed")
+            if record.get("quality"):
+                job.qualities[record["quality"]] = job.qualities.get(record["quality"], 0) + 1
+        self.store.append_results(job, records)
+        return True
+
+    async def _validate_block(self, job: Job, first_index: int, rows: List[Dict[str, Any]],
+                              reused: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(index: int, row: Dict[str, Any]) -> Dict[str, Any]:
+            if index - first_index in reused:
+                return reused[index - first_index]
+            if row.get("_error"):
+                return result_record(index, row, None, row["_error"])
+            missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+            if missing:
+                return result_record(index, row, None, f"Fehlende Felder: {', '.join(missing)}")
+            address = {field: str(row[field]) for field in ADDRESS_FIELDS if row.get(field)}
+            address["priority"] = job.priority
+            async with semaphore:
+                try:
+                    return result_record(index, row, await self.validate(address))
+                except Exception as e:
+                    return result_record(index, row, None, str(e) or type(e).__name__)
+
+        return await asyncio.gather(*(one(first_index + offset, row) for offset, row in enumerate(rows)))
+
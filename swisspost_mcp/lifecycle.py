@@ -0,0 +1,172 @@
+"""
+Lebenszyklus langlaufender Prozesse (HTTP Proxy, MCP Server im Netzwerk-Modus)
+
+Bei einem Rolling Restart soll keine laufende Validierung verloren gehen.
+Auf SIGTERM/SIGINT wechselt der Prozess in den Zustand "draining":
+
+1. Readiness meldet 503, der Load Balancer schickt keine neuen Requests mehr;
+   neue Validierungen werden mit 503 + Retry-After abgewiesen
+2. laufende Validierungen dürfen bis SWISSPOST_SHUTDOWN_TIMEOUT fertig werden
+3. Autocomplete-Cache und Metriken werden auf Platte geschrieben; der Cache
+   wird beim nächsten Start wieder geladen (warmer Neustart)
+
+Liveness (/health/live) bleibt während des Drainings 200: der Prozess ist
+gesund, nimmt aber nichts Neues mehr an. Jobs brauchen kein Draining, sie
+setzen nach dem Neustart ab ihrem letzten Checkpoint fort.
+
+Konfiguration:
+- SWISSPOST_SHUTDOWN_TIMEOUT:  Maximale Wartezeit auf laufende Requests in Sekunden (Standard: 25)
+- SWISSPOST_CACHE_SNAPSHOT:    Cache-Datei (Standard: <SWISSPOST_JOBS_DIR>/autocomplete-cache.json, leer = aus)
+- SWISSPOST_METRICS_FILE:      Metriken im Prometheus-Textformat (Standard: <SWISSPOST_JOBS_DIR>/metrics.prom, leer = aus)
+"""
+
+import contextlib
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator
+
+from swisspost_mcp import metrics
+from swisspost_mcp.cache import AUTOCOMPLETE_CACHE
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("lifecycle")
+
+STATES = ("starting", "ready", "draining", "stopped")
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _state_path(name: str, filename: str) -> str:
+    value = os.getenv(name)
+    if value is not None:
+        return value.strip()
+    from swisspost_mcp.jobs import JOBS_DIR
+    return os.path.join(JOBS_DIR, filename)
+
+
+SHUTDOWN_TIMEOUT = max(0.0, _env_number("SWISSPOST_SHUTDOWN_TIMEOUT", 25.0))
+
+IN_FLIGHT = metrics.REGISTRY.gauge(
+    "swisspost_requests_in_flight",
+    "Laufende Validierungs-Requests (werden beim Herunterfahren abgewartet)",
+)
+READY = metrics.REGISTRY.gauge(
+    "swisspost_ready",
+    "1, solange der Prozess neue Requests annimmt",
+)
+
+
+class Lifecycle:
+    """Zustand, laufende Requests und geordnetes Herunterfahren (threadsicher)"""
+
+    def __init__(self):
+        self.state = "starting"
+        self.started_at = time.time()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def accepting(self) -> bool:
+        return self.state in ("starting", "ready")
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def mark_ready(self) -> None:
+        if self.state == "starting":
+            self.state = "ready"
+            READY.set(1)
+
+    def begin_drain(self) -> bool:
+        """Wechselt nach "draining"; False, wenn das bereits geschehen ist"""
+        with self._condition:
+            if not self.accepting:
+                return False
+            self.state = "draining"
+        READY.set(0)
+        logger.info("Herunterfahren: keine neuen Requests, warte auf laufende", extra={'in_flight': self._in_flight})
+        return True
+
+    @contextlib.contextmanager
+    def track(self) -> Iterator[None]:
+        """Zählt einen laufenden Request (auch während des Drainings begonnene Antworten)"""
+        with self._condition:
+            self._in_flight += 1
+        IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+            IN_FLIGHT.dec()
+
+    def wait_idle(self, timeout: float = SHUTDOWN_TIMEOUT) -> bool:
+        """Wartet, bis keine Requests mehr laufen; False bei Timeout"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("Herunterfahren: %d Requests nach %.0fs noch offen", self._in_flight, timeout)
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'live': self.state != "stopped",
+            'ready': self.state == "ready",
+            'in_flight': self._in_flight,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+        }
+
+
+def restore_state() -> int:
+    """Lädt den Cache-Snapshot des letzten Laufs (falls vorhanden)"""
+    path = _state_path("SWISSPOST_CACHE_SNAPSHOT", "autocomplete-cache.json")
+    if not path:
+        return 0
+    restored = AUTOCOMPLETE_CACHE.restore(path)
+    if restored:
+        logger.info("Cache-Snapshot geladen", extra={'entries': restored, 'path': path})
+    return restored
+
+
+def flush_state() -> Dict[str, Any]:
+    """Schreibt Cache-Snapshot, Metriken und Fingerprint-Store auf Platte (Fehler werden nur geloggt)"""
+    flushed: Dict[str, Any] = {}
+    cache_path = _state_path("SWISSPOST_CACHE_SNAPSHOT", "autocomplete-cache.json")
+    if cache_path:
+        try:
+            flushed['cache_entries'] = AUTOCOMPLETE_CACHE.snapshot(cache_path)
+        except OSError as e:
+            logger.warning("Cache-Snapshot fehlgeschlagen: %s", e)
+    metrics_path = _state_path("SWISSPOST_METRICS_FILE", "metrics.prom")
+    if metrics_path:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(metrics_path)), exist_ok=True)
+            with open(f"{metrics_path}.tmp", "w", encoding="utf-8") as f:
+                f.write(metrics.render())
+            os.replace(f"{metrics_path}.tmp", metrics_path)
+            flushed['metrics'] = metrics_path
+        except OSError as e:
+            logger.warning("Metriken konnten nicht geschrieben werden: %s", e)
+    from swisspost_mcp import certified
+    store = certified.get_store()
+    if store is not None:
+        store.flush()
+        flushed['certified'] = store.path
+    logger.info("Zustand gesichert", extra=flushed)
+    return flushed
+
+
+LIFECYCLE = Lifecycle()
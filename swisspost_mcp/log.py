@@ -0,0 +1,147 @@
+"""
+Strukturiertes, nicht-blockierendes Logging
+
+Alle Logger hängen unter dem Namensraum "swisspost". Log-Records werden über
+eine QueueHandler/QueueListener-Kombination in einem Hintergrund-Thread
+geschrieben, damit der Hot-Path nie auf I/O wartet. Ausgabe erfolgt nach
+stderr (stdout ist beim MCP-Server der stdio-Transportkanal) oder in eine Datei.
+
+Konfiguration über Umgebungsvariablen:
+- SWISSPOST_LOG_LEVEL:        DEBUG|INFO|WARNING|ERROR (Standard: INFO)
+- SWISSPOST_LOG_FILE:         Pfad zur Logdatei (Standard: stderr)
+- SWISSPOST_LOG_FORMAT:       text|json (Standard: text)
+- SWISSPOST_LOG_SAMPLE_RATE:  Anteil der DEBUG/INFO-Records, die geschrieben werden (0.0-1.0)
+- SWISSPOST_LOG_PAYLOADS:     1 = vollständige API-Antworten auf DEBUG loggen (Standard: aus)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Optional
+
+ROOT_LOGGER_NAME = "swisspost"
+
+# Attribute, die jeder LogRecord hat – alles andere stammt aus `extra` und wird als Feld ausgegeben
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configure_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Payload-Dumps (komplette API-Antworten) nur auf ausdrücklichen Wunsch
+PAYLOAD_LOGGING = os.getenv("SWISSPOST_LOG_PAYLOADS", "0").strip().lower() in ("1", "true", "yes")
+
+
+def _record_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in record.__dict__.items() if key not in _RESERVED_ATTRS}
+
+
+class TextFormatter(logging.Formatter):
+    """Lesbares Format mit angehängten key=value Feldern"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """Ein JSON-Objekt pro Zeile"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_record_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Lässt DEBUG/INFO nur mit gegebener Rate durch; WARNING und höher immer"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+def configure_logging(level: Optional[str] = None, log_file: Optional[str] = None,
+                      fmt: Optional[str] = None, sample_rate: Optional[float] = None) -> logging.Logger:
+    """Richtet den "swisspost" Logger einmalig ein (idempotent)"""
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    with _configure_lock:
+        if _listener is not None:
+            return root
+
+        level = (level or os.getenv("SWISSPOST_LOG_LEVEL", "INFO")).upper()
+        log_file = log_file or os.getenv("SWISSPOST_LOG_FILE") or None
+        fmt = (fmt or os.getenv("SWISSPOST_LOG_FORMAT", "text")).lower()
+        if sample_rate is None:
+            try:
+                sample_rate = float(os.getenv("SWISSPOST_LOG_SAMPLE_RATE", "1.0"))
+            except ValueError:
+                sample_rate = 1.0
+
+        if log_file:
+            target: logging.Handler = logging.FileHandler(log_file, encoding="utf-8")
+        else:
+            target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(sample_rate))
+
+        root.setLevel(getattr(logging, level, logging.INFO))
+        root.addHandler(queue_handler)
+        # Nicht an den Root-Logger des Host-Prozesses weiterreichen (stdout bleibt sauber)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, target, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging() -> None:
+    """Leert die Queue und stoppt den Hintergrund-Thread"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            root = logging.getLogger(ROOT_LOGGER_NAME)
+            for handler in list(root.handlers):
+                if isinstance(handler, logging.handlers.QueueHandler):
+                    root.removeHandler(handler)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Liefert einen Logger unterhalb von "swisspost" (konfiguriert bei Bedarf)"""
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def payloads_enabled(logger: logging.Logger) -> bool:
+    """True, wenn Payload-Dumps geschrieben werden sollen (vor dem Formatieren prüfen)"""
+    return PAYLOAD_LOGGING and logger.isEnabledFor(logging.DEBUG)
@@ -0,0 +1,95 @@
+"""
+Request-lokales Memo für Upstream-Aufrufe mit identischem Payload
+
+validate_smart ruft die Validierungs-API nach jedem Korrekturschritt erneut
+auf – oft mit unverändertem Payload (z.B. USABLE-Zweig ohne neue Strasse).
+Das Memo lebt genau einen validate_smart Aufruf lang (ContextVar) und sorgt
+dafür, dass ein identischer Payload nie zweimal gesendet wird. Gleichzeitige
+Aufrufe mit demselben Payload (parallele Korrekturstrategien) teilen sich
+einen einzigen Upstream-Aufruf. Wird der Besitzer des Aufrufs abgebrochen
+(z.B. Verlierer eines spekulativen Rennens), übernimmt ein Wartender den
+Aufruf, statt ebenfalls abgebrochen zu werden.
+
+Vermiedene Aufrufe erscheinen in `swisspost_cache_requests_total{cache="validation_memo"}`
+und im Request-Trace als Cache-Treffer.
+"""
+
+import asyncio
+import contextvars
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from swisspost_mcp import tracing
+from swisspost_mcp.metrics import CACHE_REQUESTS
+
+_current: "contextvars.ContextVar[Optional[RequestMemo]]" = contextvars.ContextVar(
+    "swisspost_request_memo", default=None
+)
+
+
+def payload_key(payload: Any) -> str:
+    """Kanonische Darstellung eines JSON-Payloads (Schlüsselreihenfolge egal)"""
+    return json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+class _OwnerCancelled(Exception):
+    """Der Besitzer eines laufenden Eintrags wurde abgebrochen; Wartende rufen selbst auf"""
+
+
+class RequestMemo:
+    """Ergebnisse nach exaktem Payload für die Dauer eines Requests"""
+
+    def __init__(self, name: str, endpoint: str):
+        self.name = name
+        self.endpoint = endpoint
+        self.avoided = 0
+        self._entries: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def get_or_call(self, payload: Any, call: Callable[[], Awaitable[Any]],
+                          keep: Callable[[Any], bool] = lambda result: True) -> Any:
+        """
+        Liefert das gespeicherte (oder laufende) Ergebnis für `payload`, sonst `await call()`.
+        Ergebnisse, für die `keep(result)` False ist (z.B. Netzwerkfehler), werden nicht behalten.
+        """
+        key = payload_key(payload)
+        pending = self._entries.get(key)
+        while pending is not None:
+            try:
+                result = await asyncio.shield(pending)
+            except _OwnerCancelled:
+                # Eintrag ist entfernt; der erste Wartende wird neuer Besitzer, die übrigen warten auf ihn
+                pending = self._entries.get(key)
+                continue
+            self.avoided += 1
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            tracing.record_upstream(self.endpoint, "memo", 0.0, cache="hit")
+            return result
+
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = future
+        try:
+            result = await call()
+        except BaseException as e:
+            del self._entries[key]
+            # Ein Abbruch betrifft nur den Besitzer; Wartende übernehmen den Aufruf
+            future.set_exception(_OwnerCancelled() if isinstance(e, asyncio.CancelledError) else e)
+            # Nur für wartende Teilnehmer; ohne diese keine "never retrieved" Warnung
+            future.exception()
+            raise
+        if not keep(result):
+            del self._entries[key]
+        future.set_result(result)
+        return result
+
+
+def activate(memo: RequestMemo) -> contextvars.Token:
+    return _current.set(memo)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestMemo]:
+    return _current.get()
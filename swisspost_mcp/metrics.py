@@ -0,0 +1,269 @@
+"""
+Prometheus-kompatible Metriken (Counter, Gauge, Histogram) ohne Fremdabhängigkeit
+
+Alle Metriken werden in einer prozessweiten Registry gesammelt und können
+im Prometheus Text-Format (Version 0.0.4) ausgegeben werden – vom HTTP Proxy
+unter /metrics, vom MCP Server als Resource.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Latenz-Buckets in Sekunden (Swisspost Timeouts liegen bei 10-15 s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: Labels {sorted(labels)} != {sorted(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.collect())
+        return lines
+
+
+class Counter(_Metric):
+    """Monoton steigender Zähler"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Momentanwert"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Verteilung mit festen Buckets (kumulativ ausgegeben)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Pro Label-Kombination: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        lines = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Sammlung aller Metriken eines Prozesses"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Mehrfaches Laden des Agent-Moduls (Proxy) liefert dieselbe Instanz
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Upstream (Swisspost API) -------------------------------------------------
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "swisspost_upstream_requests_total",
+    "Anzahl Aufrufe der Swisspost API nach Endpoint und Status",
+    ("endpoint", "status"),
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "swisspost_upstream_request_duration_seconds",
+    "Latenz der Swisspost API Aufrufe nach Endpoint und Status",
+    ("endpoint", "status"),
+)
+
+# --- validate_smart -------------------------------------------------------------
+STAGE_LATENCY = REGISTRY.histogram(
+    "swisspost_validate_stage_duration_seconds",
+    "Dauer der einzelnen validate_smart Phasen",
+    ("stage",),
+)
+VALIDATIONS = REGISTRY.counter(
+    "swisspost_validations_total",
+    "Abgeschlossene validate_smart Aufrufe nach Ergebnis-Qualität",
+    ("quality",),
+)
+PREFLIGHT_REJECTIONS = REGISTRY.counter(
+    "swisspost_preflight_rejections_total",
+    "Lokal abgewiesene Eingaben (ohne Upstream-Aufruf) nach Grund",
+    ("reason",),
+)
+
+# --- Caches -------------------------------------------------------------------
+CACHE_REQUESTS = REGISTRY.counter(
+    "swisspost_cache_requests_total",
+    "Cache-Zugriffe nach Cache und Ergebnis (hit/miss)",
+    ("cache", "result"),
+)
+
+
+def observe_upstream(endpoint: str, status: str, started: float) -> float:
+    """Verbucht einen Upstream-Aufruf; `started` ist ein time.perf_counter() Wert"""
+    duration = time.perf_counter() - started
+    UPSTREAM_REQUESTS.inc(endpoint=endpoint, status=status)
+    UPSTREAM_LATENCY.observe(duration, endpoint=endpoint, status=status)
+    return duration
+
+
+class StageTimer:
+    """
+    Misst aufeinanderfolgende Phasen: mark(stage) verbucht die Zeit seit dem letzten mark.
+    Optional wird jede Phase zusätzlich in einen RequestTrace (record_stage) geschrieben.
+    """
+
+    __slots__ = ("started", "_last", "trace")
+
+    def __init__(self, trace=None):
+        self.started = self._last = time.perf_counter()
+        self.trace = trace
+
+    def mark(self, stage: str) -> float:
+        now = time.perf_counter()
+        duration = now - self._last
+        self._last = now
+        STAGE_LATENCY.observe(duration, stage=stage)
+        if self.trace is not None:
+            self.trace.record_stage(stage, duration)
+        return duration
+
+    def finish(self) -> float:
+        """Verbucht die Gesamtdauer als Phase "total" """
+        duration = time.perf_counter() - self.started
+        STAGE_LATENCY.observe(duration, stage="total")
+        return duration
+
+
+def render(registry: Optional[Registry] = None) -> str:
+    """Prometheus Text-Format der (Standard-)Registry"""
+    return (registry or REGISTRY).render()
@@ -0,0 +1,230 @@
+"""
+Tiefe Readiness-Prüfung: OAuth, Upstream, Cache und Warteschlangen
+
+/health meldete bisher immer "healthy", auch wenn OAuth oder die Swisspost API
+ausgefallen waren; der Load Balancer schickte weiter Verkehr in Fehler. Die
+Readiness fasst jetzt zusammen:
+
+- token:     gültiges OAuth-Token und Restlaufzeit, Ergebnis der letzten Erneuerung
+- upstream:  Circuit-Breaker-Zustand aus den echten Upstream-Antworten
+             (closed, open nach SWISSPOST_BREAKER_FAILURES Fehlern in Folge,
+             half_open nach SWISSPOST_BREAKER_COOLDOWN Sekunden)
+- probe:     letzte Hintergrundprobe (Token + ein /zips-Aufruf am Cache vorbei)
+- cache:     Füllstand des Autocomplete-Caches
+- queue:     wartende und laufende Upstream-Aufrufe pro Prioritätsklasse
+
+Health-Checks lesen nur diese zwischengespeicherten Werte und lösen nie selbst
+Upstream-Aufrufe aus. Die Probe läuft im Hintergrund alle
+SWISSPOST_HEALTH_PROBE_INTERVAL Sekunden und ruft den Upstream nur auf, wenn
+seit dem letzten Intervall kein echter Aufruf erfolgreich war. Der Breaker
+blockiert keine Aufrufe; er nimmt die Instanz über die Readiness aus dem Verkehr.
+
+Konfiguration:
+- SWISSPOST_HEALTH_PROBE_INTERVAL:  Abstand der Hintergrundproben in Sekunden (Standard: 30)
+- SWISSPOST_BREAKER_FAILURES:       Fehler in Folge bis "open" (Standard: 5)
+- SWISSPOST_BREAKER_COOLDOWN:       Sekunden bis "half_open" (Standard: 30)
+- SWISSPOST_READY_MAX_QUEUE:        Nicht bereit ab so vielen wartenden Aufrufen (Standard: 0 = ignorieren)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from swisspost_mcp import metrics, scheduler
+from swisspost_mcp.cache import AUTOCOMPLETE_CACHE
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("readiness")
+
+BREAKER_STATES = ("closed", "open", "half_open")
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+PROBE_INTERVAL = max(1.0, _env_number("SWISSPOST_HEALTH_PROBE_INTERVAL", 30.0))
+BREAKER_FAILURES = max(1, int(_env_number("SWISSPOST_BREAKER_FAILURES", 5)))
+BREAKER_COOLDOWN = max(1.0, _env_number("SWISSPOST_BREAKER_COOLDOWN", 30.0))
+READY_MAX_QUEUE = max(0, int(_env_number("SWISSPOST_READY_MAX_QUEUE", 0)))
+
+BREAKER_STATE = metrics.REGISTRY.gauge(
+    "swisspost_upstream_breaker_state",
+    "Circuit-Breaker des Swisspost Upstreams (1 = aktueller Zustand)",
+    ("state",),
+)
+PROBES = metrics.REGISTRY.counter(
+    "swisspost_health_probes_total",
+    "Hintergrundproben nach Prüfung und Ergebnis (ok, failed, skipped)",
+    ("check", "result"),
+)
+
+
+class Breaker:
+    """Zählt Upstream-Fehler in Folge (Netzwerkfehler, 5xx); 429 ist Drosselung, kein Ausfall"""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+        self._lock = threading.Lock()
+        self._publish()
+
+    @staticmethod
+    def is_failure(status: str) -> bool:
+        return status == "error" or (status.isdigit() and int(status) >= 500)
+
+    def record(self, status: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.is_failure(status):
+                self.consecutive_failures += 1
+                self.last_failure = now
+                state = self.state(now)
+                # Ein Fehlschlag nach der Abkühlzeit (half_open) öffnet sofort wieder
+                if state == "half_open" or (state == "closed" and self.consecutive_failures >= self.failures):
+                    logger.warning("Upstream-Breaker offen", extra={'failures': self.consecutive_failures})
+                    self.opened_at = now
+            elif status.isdigit() and int(status) < 500:
+                self.consecutive_failures = 0
+                self.opened_at = None
+                self.last_success = now
+        self._publish()
+
+    def state(self, now: Optional[float] = None) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if (now or time.monotonic()) - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def _publish(self) -> None:
+        current = self.state()
+        for name in BREAKER_STATES:
+            BREAKER_STATE.set(1 if name == current else 0, state=name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._publish()
+        return {
+            'state': self.state(now),
+            'consecutive_failures': self.consecutive_failures,
+            'last_success_age_seconds': None if self.last_success is None else round(now - self.last_success, 1),
+            'last_failure_age_seconds': None if self.last_failure is None else round(now - self.last_failure, 1),
+        }
+
+
+class Prober:
+    """Hintergrundproben für Token und Upstream; Ergebnisse werden nur zwischengespeichert"""
+
+    def __init__(self, token_manager: Any, probe: Callable[[], Awaitable[str]], interval: float = PROBE_INTERVAL):
+        self.token_manager = token_manager
+        self.probe = probe
+        self.interval = interval
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def _store(self, check: str, ok: bool, started: float, detail: Optional[str] = None) -> None:
+        PROBES.inc(check=check, result="ok" if ok else "failed")
+        self.results[check] = {
+            'ok': ok,
+            'at': time.time(),
+            'latency_ms': round((time.perf_counter() - started) * 1000.0, 1),
+            'detail': detail,
+        }
+
+    async def run_once(self) -> None:
+        started = time.perf_counter()
+        try:
+            # Holt nur dann ein neues Token, wenn das aktuelle abläuft
+            await self.token_manager.get_token()
+            self._store("token", True, started)
+        except Exception as e:
+            self._store("token", False, started, str(e)[:200])
+            return
+
+        last_success = BREAKER.last_success
+        if last_success is not None and time.monotonic() - last_success < self.interval:
+            # Echter Verkehr war erfolgreich – keine zusätzliche Upstream-Last
+            PROBES.inc(check="upstream", result="skipped")
+            return
+        started = time.perf_counter()
+        try:
+            status = await self.probe()
+        except Exception as e:
+            self._store("upstream", False, started, str(e)[:200])
+            return
+        self._store("upstream", not Breaker.is_failure(status), started, f"HTTP {status}")
+
+    async def run(self) -> None:
+        """Endlosschleife (als Hintergrund-Task); Fehler beenden die Schleife nicht"""
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Health-Probe fehlgeschlagen: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def token_status(self) -> Dict[str, Any]:
+        expires_at = getattr(self.token_manager, "token_expires_at", 0) or 0
+        valid = bool(getattr(self.token_manager, "access_token", None)) and time.time() < expires_at
+        status = {'valid': valid, 'expires_in_seconds': round(expires_at - time.time()) if valid else 0}
+        if "token" in self.results:
+            status['last_refresh'] = self.results["token"]
+        return status
+
+
+BREAKER = Breaker()
+PROBER: Optional[Prober] = None
+
+
+def start(token_manager: Any, probe: Callable[[], Awaitable[str]]) -> "asyncio.Task[None]":
+    """Startet die Hintergrundproben auf der laufenden Event-Loop"""
+    global PROBER
+    PROBER = Prober(token_manager, probe)
+    return asyncio.ensure_future(PROBER.run())
+
+
+def queue_depth() -> Dict[str, Dict[str, int]]:
+    """Wartende und laufende Upstream-Aufrufe pro Klasse (prozessweit, aus den Scheduler-Gauges)"""
+    return {name: {'queued': int(scheduler.QUEUE_DEPTH.get(priority=name)),
+                   'in_flight': int(scheduler.IN_FLIGHT.get(priority=name))}
+            for name in scheduler.PRIORITIES}
+
+
+def report() -> Dict[str, Any]:
+    """Readiness aus zwischengespeicherten Werten (kein Upstream-Aufruf)"""
+    breaker = BREAKER.snapshot()
+    queue = queue_depth()
+    queued = sum(entry['queued'] for entry in queue.values())
+    checks: Dict[str, Any] = {
+        'upstream': breaker,
+        'cache': {
+            'entries': len(AUTOCOMPLETE_CACHE),
+            'maxsize': AUTOCOMPLETE_CACHE.maxsize,
+            'fill': round(len(AUTOCOMPLETE_CACHE) / AUTOCOMPLETE_CACHE.maxsize, 4) if AUTOCOMPLETE_CACHE.maxsize else 0.0,
+        },
+        'queue': {'queued': queued, 'limit': scheduler.SCHEDULER.max_concurrency, 'priorities': queue},
+    }
+    reasons = []
+    if breaker['state'] == "open":
+        reasons.append("upstream_unavailable")
+    if PROBER is not None:
+        checks['token'] = PROBER.token_status()
+        if "upstream" in PROBER.results:
+            checks['probe'] = PROBER.results["upstream"]
+        last_refresh = PROBER.results.get("token")
+        if last_refresh is not None and not last_refresh['ok'] and not checks['token']['valid']:
+            reasons.append("token_unavailable")
+    if READY_MAX_QUEUE and queued > READY_MAX_QUEUE:
+        reasons.append("queue_full")
+    return {'ready': not reasons, 'reasons': reasons, 'checks': checks}
@@ -0,0 +1,221 @@
+"""
+Kompakte Ergebnis-Datensätze für validate_smart (`__slots__` statt dict)
+
+Bulk-Läufe halten Millionen Ergebnisse im Speicher; jedes bestand bisher aus
+mehreren dicts (Ergebnis, input, corrected, eine pro Korrektur). Die Klassen
+hier speichern dieselben Felder in Slots (kein __dict__ pro Instanz) und
+verhalten sich lesend wie die bisherigen dicts (Mapping: result['quality'],
+result.get('corrections'), dict(result)). `to_dict()` bzw. `plain()` liefern
+exakt die bisherige JSON-Form; serialization.dumps erledigt das automatisch.
+
+Bewusst ohne dataclass(slots=True), damit Python 3.8 unterstützt bleibt.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class _SlottedRecord:
+    """
+    Lesende dict-Schnittstelle auf feste Felder (Reihenfolge = JSON-Reihenfolge).
+    Als Mapping registriert statt davon abgeleitet: isinstance-Prüfungen in plain()
+    bleiben so eine einfache Klassenprüfung ohne ABC-Overhead.
+    """
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]  # type: ignore[index]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return list(self)
+
+    def values(self) -> List[Any]:
+        return [self[key] for key in self]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (_SlottedRecord, dict)):
+            return self.to_dict() == plain(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: plain(getattr(self, field)) for field in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+Mapping.register(_SlottedRecord)
+
+
+class Correction(_SlottedRecord):
+    """Eine Korrektur: {'type', 'message', 'old', 'new'}"""
+
+    __slots__ = ("type", "message", "old", "new")
+    FIELDS = __slots__
+
+    def __init__(self, type: str, message: str, old: Any = "", new: Any = ""):
+        self.type = type
+        self.message = message
+        self.old = old
+        self.new = new
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "message": self.message, "old": self.old, "new": self.new}
+
+
+class AddressInput(_SlottedRecord):
+    """Bereinigte Eingabe (`input` im Ergebnis)"""
+
+    __slots__ = ("street", "street2", "city", "postcode", "firstname", "lastname", "company")
+    FIELDS = __slots__
+
+    def __init__(self, street: str = "", street2: str = "", city: str = "", postcode: str = "",
+                 firstname: str = "", lastname: str = "", company: str = ""):
+        self.street = street
+        self.street2 = street2
+        self.city = city
+        self.postcode = postcode
+        self.firstname = firstname
+        self.lastname = lastname
+        self.company = company
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"street": self.street, "street2": self.street2, "city": self.city, "postcode": self.postcode,
+                "firstname": self.firstname, "lastname": self.lastname, "company": self.company}
+
+
+class CorrectedAddress(_SlottedRecord):
+    """Korrigierte Ausgabe (`corrected` im Ergebnis, Felder wie format_corrected_output)"""
+
+    __slots__ = ("street_name", "house_number", "city", "postcode", "street_full", "firstname", "lastname", "company")
+    FIELDS = __slots__
+
+    def __init__(self, street_name: str = "", house_number: str = "", city: str = "", postcode: str = "",
+                 street_full: str = "", firstname: str = "", lastname: str = "", company: str = ""):
+        self.street_name = street_name
+        self.house_number = house_number
+        self.city = city
+        self.postcode = postcode
+        self.street_full = street_full
+        self.firstname = firstname
+        self.lastname = lastname
+        self.company = company
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"street_name": self.street_name, "house_number": self.house_number, "city": self.city,
+                "postcode": self.postcode, "street_full": self.street_full, "firstname": self.firstname,
+                "lastname": self.lastname, "company": self.company}
+
+    @classmethod
+    def from_mapping(cls, values: Mapping) -> "CorrectedAddress":
+        return cls(**{field: values.get(field, "") for field in cls.FIELDS})
+
+
+class ValidationResult(_SlottedRecord):
+    """
+    Ergebnis von validate_smart. Zusätzliche Schlüssel (trace, city_correction)
+    landen in `extra` und erscheinen in der JSON-Form nach den festen Feldern.
+    """
+
+    __slots__ = ("status", "quality", "score", "corrections", "input", "corrected", "validation", "extra")
+    FIELDS = ("status", "quality", "score", "corrections", "input", "corrected", "validation", "has_corrections")
+
+    def __init__(self, status: str, quality: str, score: int, corrections: List[Correction],
+                 input: AddressInput, corrected: CorrectedAddress, validation: Any):
+        self.status = status
+        self.quality = quality
+        self.score = score
+        self.corrections = corrections
+        self.input = input
+        self.corrected = corrected
+        self.validation = validation
+        self.extra: Optional[Dict[str, Any]] = None
+
+    @property
+    def has_corrections(self) -> bool:
+        return len(self.corrections) > 0
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self.__slots__ and key != "extra":
+            setattr(self, key, value)
+            return
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.FIELDS
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return len(self.FIELDS) + len(self.extra or ())
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "status": self.status,
+            "quality": self.quality,
+            "score": self.score,
+            "corrections": [correction.to_dict() if isinstance(correction, _SlottedRecord) else correction
+                            for correction in self.corrections],
+            "input": self.input.to_dict() if isinstance(self.input, _SlottedRecord) else self.input,
+            "corrected": self.corrected.to_dict() if isinstance(self.corrected, _SlottedRecord) else self.corrected,
+            "validation": self.validation,
+            "has_corrections": len(self.corrections) > 0,
+        }
+        if self.extra:
+            data.update((key, plain(value)) for key, value in self.extra.items())
+        return data
+
+
+def plain(value: Any) -> Any:
+    """Wandelt Records (auch verschachtelt in Listen/dicts) in die bisherige JSON-Form"""
+    if isinstance(value, _SlottedRecord):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    return value
+
+
+def json_default(value: Any) -> Any:
+    """`default` Hook für json/orjson: Records als dict serialisieren"""
+    if isinstance(value, _SlottedRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
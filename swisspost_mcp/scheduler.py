@@ -0,0 +1,333 @@
+"""
+Prioritäts-Scheduler vor den Swisspost Upstream-Aufrufen
+
+Interaktive Anfragen (Claude Desktop, n8n-Lookups) und nächtliche Bulk-Läufe
+teilen sich dieselbe Upstream-Quota. Jeder Upstream-Aufruf belegt einen Slot;
+freie Slots werden per Weighted Fair Queuing (Stride-Scheduling) auf die
+Klassen verteilt, jede Klasse darf höchstens ihren Anteil an Slots gleichzeitig
+belegen, und wartende Aufrufe, deren Deadline abgelaufen ist, werden verworfen.
+
+Die Priorität gilt pro validate_smart Aufruf (ContextVar) und kommt aus dem
+Tool-Argument `priority` bzw. dem Proxy-Header `X-Priority`.
+
+Konfiguration:
+- SWISSPOST_MAX_CONCURRENCY:   Gleichzeitige Upstream-Aufrufe insgesamt (Standard: 8; Startwert mit SWISSPOST_AIMD)
+- SWISSPOST_DEFAULT_PRIORITY:  Klasse ohne Angabe (Standard: normal)
+- SWISSPOST_SCHED_WEIGHTS:     z.B. "interactive=8,normal=4,bulk=1"
+- SWISSPOST_SCHED_SHARES:      Anteil der Slots pro Klasse, z.B. "interactive=1.0,normal=0.75,bulk=0.5"
+- SWISSPOST_SCHED_MAX_WAIT:    Maximale Wartezeit in Sekunden, z.B. "interactive=10,normal=60,bulk=600"
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from swisspost_mcp import metrics
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("scheduler")
+
+PRIORITIES = ("interactive", "normal", "bulk")
+
+DEFAULT_WEIGHTS = {"interactive": 8.0, "normal": 4.0, "bulk": 1.0}
+DEFAULT_SHARES = {"interactive": 1.0, "normal": 0.75, "bulk": 0.5}
+DEFAULT_MAX_WAIT = {"interactive": 10.0, "normal": 60.0, "bulk": 600.0}
+
+QUEUE_DEPTH = metrics.REGISTRY.gauge(
+    "swisspost_scheduler_queue_depth",
+    "Wartende Upstream-Aufrufe pro Prioritätsklasse",
+    ("priority",),
+)
+IN_FLIGHT = metrics.REGISTRY.gauge(
+    "swisspost_scheduler_in_flight",
+    "Laufende Upstream-Aufrufe pro Prioritätsklasse",
+    ("priority",),
+)
+WAIT_SECONDS = metrics.REGISTRY.histogram(
+    "swisspost_scheduler_wait_seconds",
+    "Wartezeit auf einen Upstream-Slot pro Prioritätsklasse",
+    ("priority",),
+)
+CONCURRENCY_LIMIT = metrics.REGISTRY.gauge(
+    "swisspost_scheduler_concurrency_limit",
+    "Aktuelle Obergrenze gleichzeitiger Upstream-Aufrufe (statisch oder adaptiv)",
+)
+DROPPED = metrics.REGISTRY.counter(
+    "swisspost_scheduler_dropped_total",
+    "Wegen abgelaufener Deadline verworfene Upstream-Aufrufe",
+    ("priority",),
+)
+
+_current_priority: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar(
+    "swisspost_priority", default=None
+)
+_current_deadline: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar(
+    "swisspost_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """Der Aufruf hat innerhalb seiner Deadline keinen Upstream-Slot erhalten"""
+
+    def __init__(self, priority: str, waited: float):
+        super().__init__(f"Deadline abgelaufen nach {waited:.2f}s Wartezeit (Priorität {priority})")
+        self.priority = priority
+        self.waited = waited
+
+
+def _parse_classes(value: Optional[str], defaults: Dict[str, float]) -> Dict[str, float]:
+    result = dict(defaults)
+    for part in filter(None, (p.strip() for p in (value or "").split(","))):
+        name, _, number = part.partition("=")
+        if name.strip() in result:
+            try:
+                result[name.strip()] = float(number)
+            except ValueError:
+                logger.warning("Ungültiger Scheduler-Wert ignoriert: %s", part)
+    return result
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+DEFAULT_PRIORITY = os.getenv("SWISSPOST_DEFAULT_PRIORITY", "normal").strip().lower()
+if DEFAULT_PRIORITY not in PRIORITIES:
+    DEFAULT_PRIORITY = "normal"
+
+
+def resolve_priority(value: Any = None) -> str:
+    """Tool-Argument/Header -> gültige Klasse (unbekannte Werte: Standardklasse)"""
+    if isinstance(value, str) and value.strip().lower() in PRIORITIES:
+        return value.strip().lower()
+    return DEFAULT_PRIORITY
+
+
+class _Waiter:
+    __slots__ = ("future", "deadline", "enqueued")
+
+    def __init__(self, future: "asyncio.Future[None]", deadline: float):
+        self.future = future
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+
+
+class _LoopState:
+    """Warteschlangen eines Event-Loops (asyncio-Futures sind an den Loop gebunden)"""
+
+    def __init__(self):
+        self.queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in PRIORITIES}
+        self.in_flight: Dict[str, int] = {name: 0 for name in PRIORITIES}
+        self.passes: Dict[str, float] = {name: 0.0 for name in PRIORITIES}
+
+
+class PriorityScheduler:
+    """Weighted Fair Queuing mit Klassen-Obergrenzen und Deadlines"""
+
+    def __init__(self, max_concurrency: int = 8, weights: Optional[Dict[str, float]] = None,
+                 shares: Optional[Dict[str, float]] = None, max_wait: Optional[Dict[str, float]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        CONCURRENCY_LIMIT.set(self.max_concurrency)
+        self.weights = weights or dict(DEFAULT_WEIGHTS)
+        self.shares = shares or dict(DEFAULT_SHARES)
+        self.max_wait = max_wait or dict(DEFAULT_MAX_WAIT)
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_env(cls) -> "PriorityScheduler":
+        return cls(
+            max_concurrency=_env_int("SWISSPOST_MAX_CONCURRENCY", 8),
+            weights=_parse_classes(os.getenv("SWISSPOST_SCHED_WEIGHTS"), DEFAULT_WEIGHTS),
+            shares=_parse_classes(os.getenv("SWISSPOST_SCHED_SHARES"), DEFAULT_SHARES),
+            max_wait=_parse_classes(os.getenv("SWISSPOST_SCHED_MAX_WAIT"), DEFAULT_MAX_WAIT),
+        )
+
+    def class_limit(self, priority: str) -> int:
+        """Maximal gleichzeitig belegte Slots einer Klasse"""
+        return max(1, int(self.max_concurrency * self.shares.get(priority, 1.0)))
+
+    def set_max_concurrency(self, limit: int) -> None:
+        """Neue Obergrenze (z.B. vom adaptiven Limiter); laufende Aufrufe werden nicht abgebrochen"""
+        limit = max(1, int(limit))
+        if limit == self.max_concurrency:
+            return
+        self.max_concurrency = limit
+        CONCURRENCY_LIMIT.set(limit)
+        try:
+            state = self._states.get(asyncio.get_running_loop())
+        except RuntimeError:
+            return
+        if state is not None:
+            self._dispatch(state)
+
+    def saturated(self) -> bool:
+        """Wird die Obergrenze im aktuellen Loop ausgeschöpft (Aufrufe warten oder fast alle Slots belegt)?"""
+        state = self._state()
+        return any(state.queues.values()) or self._total_in_flight(state) >= self.max_concurrency - 1
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState()
+        return state
+
+    def _total_in_flight(self, state: _LoopState) -> int:
+        return sum(state.in_flight.values())
+
+    def _can_start(self, state: _LoopState, priority: str) -> bool:
+        return (self._total_in_flight(state) < self.max_concurrency
+                and state.in_flight[priority] < self.class_limit(priority))
+
+    def _start(self, state: _LoopState, priority: str) -> None:
+        state.in_flight[priority] += 1
+        state.passes[priority] += 1.0 / max(self.weights.get(priority, 1.0), 0.001)
+        IN_FLIGHT.inc(priority=priority)
+
+    def _dispatch(self, state: _LoopState) -> None:
+        """Vergibt freie Slots an die Klasse mit dem kleinsten Pass-Wert (Stride-Scheduling)"""
+        now = time.monotonic()
+        while self._total_in_flight(state) < self.max_concurrency:
+            eligible = []
+            for priority in PRIORITIES:
+                queue = state.queues[priority]
+                # Abgelaufene bzw. abgebrochene Warter vorne entfernen
+                while queue and (queue[0].future.done() or queue[0].deadline <= now):
+                    waiter = queue.popleft()
+                    QUEUE_DEPTH.dec(priority=priority)
+                    if not waiter.future.done():
+                        self._drop(priority, waiter, now)
+                if queue and state.in_flight[priority] < self.class_limit(priority):
+                    eligible.append(priority)
+            if not eligible:
+                return
+            priority = min(eligible, key=lambda name: state.passes[name])
+            waiter = state.queues[priority].popleft()
+            QUEUE_DEPTH.dec(priority=priority)
+            self._start(state, priority)
+            WAIT_SECONDS.observe(now - waiter.enqueued, priority=priority)
+            waiter.future.set_result(None)
+
+    def _discard(self, state: _LoopState, priority: str, waiter: _Waiter) -> None:
+        """Entfernt einen abgebrochenen bzw. abgelaufenen Warter sofort (QUEUE_DEPTH, snapshot, Readiness)"""
+        try:
+            state.queues[priority].remove(waiter)
+        except ValueError:
+            return  # bereits von _dispatch entnommen
+        QUEUE_DEPTH.dec(priority=priority)
+
+    def _drop(self, priority: str, waiter: _Waiter, now: float) -> None:
+        DROPPED.inc(priority=priority)
+        waiter.future.set_exception(DeadlineExceeded(priority, now - waiter.enqueued))
+
+    async def acquire(self, priority: Optional[str] = None, deadline: Optional[float] = None) -> str:
+        """
+        Wartet auf einen Slot. `deadline` ist ein time.monotonic() Zeitpunkt; ohne Angabe gilt
+        die Request-Deadline bzw. die maximale Wartezeit der Klasse.
+        Raises: DeadlineExceeded
+        """
+        priority = priority or current_priority()
+        state = self._state()
+        if not any(state.queues.values()) and self._can_start(state, priority):
+            self._start(state, priority)
+            WAIT_SECONDS.observe(0.0, priority=priority)
+            return priority
+
+        now = time.monotonic()
+        limit = now + self.max_wait.get(priority, 60.0)
+        request_deadline = deadline if deadline is not None else _current_deadline.get()
+        if request_deadline is not None:
+            limit = min(limit, request_deadline)
+        if limit <= now:
+            DROPPED.inc(priority=priority)
+            raise DeadlineExceeded(priority, 0.0)
+
+        # Eine Klasse, die leer war, startet beim kleinsten aktiven Pass-Wert (kein angespartes Guthaben)
+        if not state.queues[priority]:
+            active = [state.passes[name] for name in PRIORITIES if state.queues[name]]
+            if active:
+                state.passes[priority] = max(state.passes[priority], min(active))
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), limit)
+        state.queues[priority].append(waiter)
+        QUEUE_DEPTH.inc(priority=priority)
+        self._dispatch(state)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=max(0.0, limit - now))
+        except asyncio.TimeoutError:
+            self._discard(state, priority, waiter)
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # Slot kam gleichzeitig mit dem Timeout – freigeben
+                self.release(priority)
+            elif not waiter.future.done():
+                self._drop(priority, waiter, time.monotonic())
+                waiter.future.exception()
+            self._dispatch(state)
+            raise DeadlineExceeded(priority, time.monotonic() - waiter.enqueued) from None
+        except asyncio.CancelledError:
+            self._discard(state, priority, waiter)
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release(priority)
+            else:
+                waiter.future.cancel()
+            self._dispatch(state)
+            raise
+        return priority
+
+    def release(self, priority: str) -> None:
+        state = self._state()
+        state.in_flight[priority] -= 1
+        IN_FLIGHT.dec(priority=priority)
+        self._dispatch(state)
+
+    def slot(self, priority: Optional[str] = None, deadline: Optional[float] = None) -> "_Slot":
+        """async with SCHEDULER.slot(): ... – belegt einen Slot für einen Upstream-Aufruf"""
+        return _Slot(self, priority, deadline)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Warteschlangen und laufende Aufrufe des aktuellen Loops (für Health/Debug)"""
+        state = self._state()
+        return {name: {"queued": len(state.queues[name]), "in_flight": state.in_flight[name]} for name in PRIORITIES}
+
+
+class _Slot:
+    __slots__ = ("scheduler", "priority", "deadline", "_acquired")
+
+    def __init__(self, scheduler: PriorityScheduler, priority: Optional[str], deadline: Optional[float]):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.deadline = deadline
+        self._acquired: Optional[str] = None
+
+    async def __aenter__(self) -> str:
+        self._acquired = await self.scheduler.acquire(self.priority, self.deadline)
+        return self._acquired
+
+    async def __aexit__(self, *exc) -> None:
+        if self._acquired is not None:
+            self.scheduler.release(self._acquired)
+
+
+def current_priority() -> str:
+    return _current_priority.get() or DEFAULT_PRIORITY
+
+
+def activate(priority: str, deadline: Optional[float] = None):
+    """Setzt Priorität (und optional Deadline) für den aktuellen Request; Rückgabe für deactivate"""
+    return _current_priority.set(priority), _current_deadline.set(deadline)
+
+
+def deactivate(tokens) -> None:
+    priority_token, deadline_token = tokens
+    _current_deadline.reset(deadline_token)
+    _current_priority.reset(priority_token)
+
+
+SCHEDULER = PriorityScheduler.from_env()
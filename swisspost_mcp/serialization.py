@@ -0,0 +1,137 @@
+"""
+Antwort-Profile und JSON-Serialisierung
+
+Profile:
+- full:    Bisheriges Format (eingerückt, vollständige Swisspost-Antwort)
+- compact: Ohne Einrückung, `validation` auf die relevanten Felder gekürzt
+- minimal: Nur quality, score und corrected
+
+Als JSON-Backend wird orjson verwendet, falls installiert (optional),
+sonst das Standardmodul json.
+"""
+
+import gzip
+import json
+import os
+import zlib
+from collections.abc import Mapping
+from typing import Any, Dict, Optional, Tuple
+
+from swisspost_mcp.records import json_default
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optionale Abhängigkeit
+    orjson = None
+
+
+RESPONSE_PROFILES = ("full", "compact", "minimal")
+DEFAULT_RESPONSE_PROFILE = "full"
+
+# Felder der Swisspost Validierungsantwort, die im compact-Profil erhalten bleiben
+# (source nur bei Antworten aus dem Store zertifizierter Adressen)
+COMPACT_VALIDATION_KEYS = ("quality", "address", "source")
+
+# Felder, die im minimal-Profil ausgegeben werden (trace nur falls per debug_timing angefordert,
+# preflight nur bei lokal abgewiesenen Eingaben)
+MINIMAL_RESULT_KEYS = ("quality", "score", "corrected", "preflight", "previously_certified", "deadline_exceeded", "trace")
+
+# Antworten unter dieser Grösse werden nicht komprimiert (Overhead > Nutzen)
+MIN_COMPRESS_SIZE = 1024
+
+
+def _json_backend() -> str:
+    """Ermittelt das JSON-Backend (SWISSPOST_JSON_BACKEND=auto|orjson|json)"""
+    backend = os.getenv("SWISSPOST_JSON_BACKEND", "auto").strip().lower()
+    if backend == "json" or orjson is None:
+        return "json"
+    return "orjson"
+
+
+JSON_BACKEND = _json_backend()
+
+
+def resolve_profile(value: Optional[str]) -> str:
+    """Liefert ein gültiges Profil; unbekannte/leere Werte fallen auf den Default zurück"""
+    if value:
+        profile = str(value).strip().lower()
+        if profile in RESPONSE_PROFILES:
+            return profile
+    env_profile = os.getenv("SWISSPOST_RESPONSE_PROFILE", DEFAULT_RESPONSE_PROFILE).strip().lower()
+    return env_profile if env_profile in RESPONSE_PROFILES else DEFAULT_RESPONSE_PROFILE
+
+
+def trim_validation(validation: Any) -> Any:
+    """Kürzt die rohe Swisspost-Antwort auf quality und address"""
+    if not isinstance(validation, dict):
+        return validation
+    return {key: validation[key] for key in COMPACT_VALIDATION_KEYS if key in validation}
+
+
+def shape_result(result: Any, profile: str) -> Any:
+    """Formt ein validate_smart Ergebnis (dict oder records.ValidationResult) gemäss Antwort-Profil"""
+    if not isinstance(result, Mapping) or profile == "full":
+        return result
+    if profile == "minimal":
+        return {key: result[key] for key in MINIMAL_RESULT_KEYS if key in result}
+    # compact: flache Kopie, nur validation wird ersetzt
+    shaped = dict(result)
+    if 'validation' in shaped:
+        shaped['validation'] = trim_validation(shaped['validation'])
+    return shaped
+
+
+def dumps_bytes(data: Any, profile: str = DEFAULT_RESPONSE_PROFILE) -> bytes:
+    """Serialisiert nach UTF-8 JSON; eingerückt nur im full-Profil"""
+    indent = profile == "full"
+    if JSON_BACKEND == "orjson":
+        try:
+            return orjson.dumps(data, default=json_default, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # z.B. Nicht-String-Keys: auf json zurückfallen
+            pass
+    if indent:
+        text = json.dumps(data, ensure_ascii=False, indent=2, default=json_default)
+    else:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=json_default)
+    return text.encode('utf-8')
+
+
+def dumps(data: Any, profile: str = DEFAULT_RESPONSE_PROFILE) -> str:
+    """Wie dumps_bytes, aber als str (z.B. für MCP TextContent)"""
+    return dumps_bytes(data, profile).decode('utf-8')
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Wählt gzip oder deflate anhand des Accept-Encoding Headers (q-Werte beachtet)"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+    for encoding in ("gzip", "deflate"):
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Komprimiert den Body falls vom Client akzeptiert; liefert (body, content_encoding)"""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=5), "gzip"
+    if encoding == "deflate":
+        return zlib.compress(body, 5), "deflate"
+    return body, None
@@ -0,0 +1,161 @@
+"""
+Spekulative Ausführung: mehrere Kandidaten parallel, der erste endgültige gewinnt
+
+Wird von validate_smart im spekulativen Modus genutzt, um unabhängige
+Korrekturstrategien gleichzeitig zu validieren statt nacheinander.
+
+Konfiguration:
+- SWISSPOST_SPECULATIVE:            1 = spekulativer Modus standardmässig an (Standard: aus)
+- SWISSPOST_SPECULATIVE_MAX_CALLS:  Obergrenze Upstream-Aufrufe pro Spekulation (Standard: 10)
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Type
+
+from swisspost_mcp import metrics
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("speculation")
+
+ENABLED_BY_DEFAULT = os.getenv("SWISSPOST_SPECULATIVE", "0").strip().lower() in ("1", "true", "yes")
+try:
+    MAX_CALLS = int(os.getenv("SWISSPOST_SPECULATIVE_MAX_CALLS", "10"))
+except ValueError:
+    MAX_CALLS = 10
+
+SPECULATIONS = metrics.REGISTRY.counter(
+    "swisspost_speculations_total",
+    "Spekulative Korrekturläufe nach Ergebnis (final, best, none)",
+    ("outcome",),
+)
+SPECULATIVE_CANCELLED = metrics.REGISTRY.counter(
+    "swisspost_speculative_cancelled_total",
+    "Abgebrochene spekulative Kandidaten und Lookups",
+)
+SPECULATIVE_BUDGET_EXHAUSTED = metrics.REGISTRY.counter(
+    "swisspost_speculative_budget_exhausted_total",
+    "Kandidaten, die wegen der Upstream-Obergrenze nicht gestartet wurden",
+)
+
+
+def is_enabled(value: Any) -> bool:
+    """Tool-Argument / Header-Wert, sonst SWISSPOST_SPECULATIVE"""
+    if value is None or value == "":
+        return ENABLED_BY_DEFAULT
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+class CallBudget:
+    """Reserviert Upstream-Aufrufe bis zu einer festen Obergrenze"""
+
+    __slots__ = ("max_calls", "used")
+
+    def __init__(self, max_calls: int = MAX_CALLS):
+        self.max_calls = max_calls
+        self.used = 0
+
+    def try_acquire(self, calls: int = 1) -> bool:
+        if self.used + calls > self.max_calls:
+            SPECULATIVE_BUDGET_EXHAUSTED.inc()
+            return False
+        self.used += calls
+        return True
+
+
+class SharedLookups:
+    """
+    Lookups, auf die mehrere Kandidaten warten, laufen nur einmal.
+    Abbruch eines wartenden Kandidaten bricht den Lookup nicht ab (shield).
+    """
+
+    def __init__(self, budget: CallBudget):
+        self.budget = budget
+        self._tasks: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            if not self.budget.try_acquire():
+                return None
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+        return await asyncio.shield(task)
+
+    async def cancel_pending(self) -> int:
+        pending = [task for task in self._tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        # Nicht abgeholte Exceptions abgeschlossener Lookups quittieren
+        for task in self._tasks.values():
+            if task.done() and not task.cancelled():
+                task.exception()
+        return len(pending)
+
+
+async def race(candidates: Dict[str, Callable[[], Awaitable[Optional[Any]]]],
+               is_final: Callable[[Any], bool],
+               score: Callable[[Any], float],
+               propagate: Tuple[Type[BaseException], ...] = ()) -> Tuple[Optional[str], Optional[Any], Dict[str, int]]:
+    """
+    Startet alle Kandidaten gleichzeitig. Gewinner ist der erste `is_final` Kandidat in der
+    Reihenfolge von `candidates`, nicht der schnellste – gleiche Eingaben liefern so gleiche
+    Korrekturen. Liegt ein endgültiges Ergebnis vor, werden spätere Kandidaten abgebrochen
+    und nur frühere noch abgewartet. Ohne endgültiges Ergebnis gewinnt der höchste `score`
+    (bei Gleichstand der frühere Kandidat).
+    Kandidaten liefern None, wenn sie nichts beizutragen haben; Fehler zählen wie None,
+    ausser Fehlern aus `propagate` und Abbrüchen: diese beenden das Rennen und werden weitergereicht.
+    Returns: (Name, Ergebnis, Statistik)
+    """
+    order = list(candidates)
+    tasks = {asyncio.ensure_future(factory()): name for name, factory in candidates.items()}
+    stats = {"launched": len(tasks), "completed": 0, "cancelled": 0}
+    results: Dict[str, Any] = {}
+    final_rank: Optional[int] = None
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stats["completed"] += 1
+                if task.cancelled():
+                    raise asyncio.CancelledError()
+                error = task.exception()
+                if error is not None:
+                    if isinstance(error, propagate):
+                        raise error
+                    logger.debug("Spekulativer Kandidat %s fehlgeschlagen: %s", tasks[task], error)
+                    continue
+                result = task.result()
+                if result is None:
+                    continue
+                name = tasks[task]
+                results[name] = result
+                if is_final(result) and (final_rank is None or order.index(name) < final_rank):
+                    final_rank = order.index(name)
+            if final_rank is not None:
+                # Spätere Kandidaten können nicht mehr gewinnen
+                later = {task for task in pending if order.index(tasks[task]) > final_rank}
+                for task in later:
+                    task.cancel()
+                if later:
+                    await asyncio.gather(*later, return_exceptions=True)
+                    stats["cancelled"] += len(later)
+                    SPECULATIVE_CANCELLED.inc(len(later))
+                pending -= later
+        if final_rank is not None:
+            best_name: Optional[str] = order[final_rank]
+        else:
+            best_name = max((name for name in order if name in results),
+                            key=lambda name: score(results[name]), default=None)
+        return best_name, results.get(best_name) if best_name else None, stats
+    finally:
+        if pending:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            stats["cancelled"] += len(pending)
+            SPECULATIVE_CANCELLED.inc(len(pending))
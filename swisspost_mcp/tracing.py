@@ -0,0 +1,134 @@
+"""
+Request-Trace und Kostenerfassung pro validate_smart Aufruf
+
+Jeder validate_smart Aufruf erhält einen RequestTrace (über eine ContextVar
+an die Upstream-Helfer weitergereicht). Die Zähler (Upstream-Aufrufe,
+Cache-Treffer, Upstream-Zeit) werden immer geführt und am Ende in die
+Metriken übernommen. Die detaillierte Span-Liste wird nur mit
+`debug_timing` gesammelt und im Ergebnis unter `trace` ausgegeben.
+
+Konfiguration:
+- SWISSPOST_COST_WARN_CALLS: Ab dieser Anzahl Upstream-Aufrufe pro Adresse
+  wird eine Warnung mit der Eingabe geloggt (Standard: 12)
+"""
+
+import contextvars
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from swisspost_mcp import metrics
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("tracing")
+
+COST_WARN_CALLS = int(os.getenv("SWISSPOST_COST_WARN_CALLS", "12"))
+
+UPSTREAM_CALLS_PER_VALIDATION = metrics.REGISTRY.histogram(
+    "swisspost_upstream_calls_per_validation",
+    "Upstream-Aufrufe (ohne Cache-Treffer) pro validate_smart Aufruf",
+    buckets=(0, 1, 2, 3, 4, 6, 8, 10, 12, 16, 20, 30),
+)
+UPSTREAM_COST_SECONDS = metrics.REGISTRY.counter(
+    "swisspost_upstream_cost_seconds_total",
+    "Summe der Upstream-Zeit aller validate_smart Aufrufe",
+)
+EXPENSIVE_VALIDATIONS = metrics.REGISTRY.counter(
+    "swisspost_expensive_validations_total",
+    "validate_smart Aufrufe über SWISSPOST_COST_WARN_CALLS Upstream-Aufrufen",
+)
+
+_current: "contextvars.ContextVar[Optional[RequestTrace]]" = contextvars.ContextVar(
+    "swisspost_request_trace", default=None
+)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 3)
+
+
+class RequestTrace:
+    """Upstream-Aufrufe und lokale Phasen eines einzelnen validate_smart Aufrufs"""
+
+    def __init__(self, detailed: bool = False):
+        self.detailed = detailed
+        self.started = time.perf_counter()
+        self.upstream_calls = 0
+        self.cache_hits = 0
+        self.upstream_seconds = 0.0
+        self.spans: List[Dict[str, Any]] = []
+        self.stages: Dict[str, float] = {}
+        self.total_seconds: Optional[float] = None
+
+    def record_upstream(self, endpoint: str, status: str, duration: float,
+                        cache: str = "miss", retries: int = 0) -> None:
+        """Verbucht einen Upstream-Aufruf bzw. Cache-Treffer (cache="hit")"""
+        if cache == "hit":
+            self.cache_hits += 1
+        else:
+            self.upstream_calls += 1
+            self.upstream_seconds += duration
+        if self.detailed:
+            self.spans.append({
+                'endpoint': endpoint,
+                'status': status,
+                'duration_ms': _ms(duration),
+                'cache': cache,
+                'retries': retries,
+                'offset_ms': _ms(time.perf_counter() - self.started - duration),
+            })
+
+    def record_stage(self, stage: str, duration: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration
+
+    def finish(self, address: Optional[Dict] = None) -> None:
+        """Schliesst den Trace ab und übernimmt die Kosten in die Metriken"""
+        self.total_seconds = time.perf_counter() - self.started
+        UPSTREAM_CALLS_PER_VALIDATION.observe(self.upstream_calls)
+        UPSTREAM_COST_SECONDS.inc(self.upstream_seconds)
+        if self.upstream_calls >= COST_WARN_CALLS:
+            EXPENSIVE_VALIDATIONS.inc()
+            address = address or {}
+            logger.warning(
+                "Teure Adressvalidierung",
+                extra={
+                    'upstream_calls': self.upstream_calls,
+                    'upstream_ms': _ms(self.upstream_seconds),
+                    'street': address.get('street', ''),
+                    'city': address.get('city', ''),
+                    'postcode': address.get('postcode', ''),
+                }
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.total_seconds if self.total_seconds is not None else time.perf_counter() - self.started
+        local = self.stages.get("normalization", 0.0) + self.stages.get("formatting", 0.0)
+        return {
+            'total_ms': _ms(total),
+            'upstream_ms': _ms(self.upstream_seconds),
+            'local_normalization_ms': _ms(local),
+            'upstream_calls': self.upstream_calls,
+            'cache_hits': self.cache_hits,
+            'stages_ms': {stage: _ms(duration) for stage, duration in self.stages.items()},
+            'calls': self.spans,
+        }
+
+
+def activate(trace: RequestTrace) -> contextvars.Token:
+    return _current.set(trace)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestTrace]:
+    return _current.get()
+
+
+def record_upstream(endpoint: str, status: str, duration: float,
+                    cache: str = "miss", retries: int = 0) -> None:
+    """Verbucht im aktiven Trace (falls vorhanden)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.record_upstream(endpoint, status, duration, cache, retries)
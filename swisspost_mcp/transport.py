@@ -0,0 +1,196 @@
+"""
+Netzwerk-Transport für den MCP Server: Streamable HTTP und SSE
+
+Über stdio startet jeder MCP-Client einen eigenen Prozess mit eigenem Token und
+kalten Caches. Im Netzwerk-Modus bedient ein Prozess beliebig viele Sessions;
+alle teilen sich Token Manager, HTTP-Pool (http_pool), Autocomplete-Cache und
+Scheduler. Damit eine einzelne Session den Server nicht monopolisiert, ist die
+Zahl gleichzeitiger Tool-Aufrufe pro Session begrenzt.
+
+Endpunkte:
+- /mcp                Streamable HTTP (SWISSPOST_MCP_TRANSPORT=http)
+- /sse, /messages/    SSE (SWISSPOST_MCP_TRANSPORT=sse)
+- /health, /metrics   Readiness (inkl. Token, Breaker, Cache, Queue) und Prometheus-Metriken (beide Modi)
+- /health/live        Liveness (auch während des Herunterfahrens 200)
+
+SIGTERM/SIGINT fahren geordnet herunter (siehe lifecycle.py): Readiness aus,
+laufende Requests bis SWISSPOST_SHUTDOWN_TIMEOUT abwarten, Cache und Metriken sichern.
+
+Konfiguration:
+- SWISSPOST_MCP_TRANSPORT:        stdio (Standard), http oder sse
+- SWISSPOST_MCP_HOST:             Bind-Adresse (Standard: 127.0.0.1)
+- SWISSPOST_MCP_PORT:             Port (Standard: 8765)
+- SWISSPOST_SESSION_CONCURRENCY:  Gleichzeitige Tool-Aufrufe pro Session (Standard: 4, 0 = unbegrenzt)
+"""
+
+import asyncio
+import contextlib
+import os
+import weakref
+from typing import Any, AsyncIterator, Optional
+
+from swisspost_mcp import lifecycle, metrics, readiness
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("transport")
+
+TRANSPORTS = ("stdio", "http", "sse")
+MCP_PATH = "/mcp"
+SSE_PATH = "/sse"
+MESSAGES_PATH = "/messages/"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+HOST = os.getenv("SWISSPOST_MCP_HOST", "127.0.0.1")
+PORT = _env_int("SWISSPOST_MCP_PORT", 8765)
+SESSION_CONCURRENCY = max(0, _env_int("SWISSPOST_SESSION_CONCURRENCY", 4))
+
+SESSIONS = metrics.REGISTRY.gauge(
+    "swisspost_mcp_sessions",
+    "MCP-Sessions mit Tool-Aufrufen, die noch nicht freigegeben sind, nach Transport",
+    ("transport",),
+)
+SESSION_THROTTLED = metrics.REGISTRY.counter(
+    "swisspost_mcp_session_throttled_total",
+    "Tool-Aufrufe, die auf einen freien Slot ihrer Session warten mussten",
+    ("transport",),
+)
+
+
+def resolve_transport(value: Optional[str] = None) -> str:
+    """Transport aus Argument bzw. SWISSPOST_MCP_TRANSPORT; Unbekanntes fällt auf stdio zurück"""
+    name = (value or os.getenv("SWISSPOST_MCP_TRANSPORT") or "stdio").strip().lower()
+    if name == "streamable-http":
+        name = "http"
+    if name not in TRANSPORTS:
+        logger.warning("Unbekannter MCP-Transport %r, verwende stdio", name)
+        return "stdio"
+    return name
+
+
+class SessionLimiter:
+    """Begrenzt gleichzeitige Tool-Aufrufe pro MCP-Session (limit 0 = unbegrenzt)"""
+
+    def __init__(self, limit: int = SESSION_CONCURRENCY, transport: str = "stdio"):
+        self.limit = limit
+        self.transport = transport
+        # Sessions werden nicht festgehalten: endet eine Session, verschwindet auch ihr Semaphor
+        self._semaphores: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, session: Any) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(session)
+        if semaphore is None:
+            semaphore = self._semaphores[session] = asyncio.Semaphore(self.limit)
+            SESSIONS.inc(transport=self.transport)
+            weakref.finalize(session, SESSIONS.dec, transport=self.transport)
+        return semaphore
+
+    @contextlib.asynccontextmanager
+    async def slot(self, session: Any) -> AsyncIterator[None]:
+        if session is None or self.limit <= 0:
+            yield
+            return
+        semaphore = self._semaphore(session)
+        if semaphore.locked():
+            SESSION_THROTTLED.inc(transport=self.transport)
+        async with semaphore:
+            yield
+
+
+class _ASGIEndpoint:
+    """Reicht einen Pfad unverändert an eine ASGI-Funktion weiter (Starlette Route ohne Request-Wrapper)"""
+
+    def __init__(self, handler: Any):
+        self.handler = handler
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        await self.handler(scope, receive, send)
+
+
+def build_app(server: Any, transport: str) -> Any:
+    """Starlette-App für einen mcp.server.Server im Modus http oder sse"""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, PlainTextResponse, Response
+    from starlette.routing import Mount, Route
+
+    async def health(request: Any) -> Any:
+        state = lifecycle.LIFECYCLE.health()
+        deep = readiness.report()
+        ready = state["ready"] and deep["ready"]
+        status = "ok" if ready else (state["state"] if not state["ready"] else "unavailable")
+        return JSONResponse({"status": status, "transport": transport, "live": state["live"], "ready": ready,
+                             "reasons": deep["reasons"], "checks": deep["checks"], "lifecycle": state},
+                            status_code=200 if ready else 503)
+
+    async def liveness(request: Any) -> Any:
+        return JSONResponse({"status": "alive", "transport": transport, "lifecycle": lifecycle.LIFECYCLE.health()})
+
+    async def render_metrics(request: Any) -> Any:
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    routes = [Route("/health", health), Route("/health/ready", health), Route("/health/live", liveness),
+              Route("/metrics", render_metrics)]
+    manager = None
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Any) -> AsyncIterator[None]:
+        async with contextlib.AsyncExitStack() as stack:
+            if manager is not None:
+                await stack.enter_async_context(manager.run())
+            lifecycle.LIFECYCLE.mark_ready()
+            try:
+                yield
+            finally:
+                # Läuft, nachdem uvicorn die offenen Requests abgewartet hat
+                lifecycle.LIFECYCLE.begin_drain()
+                lifecycle.flush_state()
+
+    if transport == "http":
+        from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+
+        manager = StreamableHTTPSessionManager(app=server)
+        routes.append(Route(MCP_PATH, endpoint=_ASGIEndpoint(manager.handle_request)))
+        return Starlette(routes=routes, lifespan=lifespan)
+
+    if transport == "sse":
+        from mcp.server.sse import SseServerTransport
+
+        sse = SseServerTransport(MESSAGES_PATH)
+
+        async def handle_sse(request: Any) -> Any:
+            async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, server.create_initialization_options())
+            # Leere Antwort, sonst scheitert Starlette nach dem Verbindungsende
+            return Response()
+
+        routes.append(Route(SSE_PATH, endpoint=handle_sse, methods=["GET"]))
+        routes.append(Mount(MESSAGES_PATH, app=sse.handle_post_message))
+        return Starlette(routes=routes, lifespan=lifespan)
+
+    raise ValueError(f"Kein Netzwerk-Transport: {transport}")
+
+
+async def serve(server: Any, transport: str, host: str = HOST, port: int = PORT) -> None:
+    """Startet den MCP Server als Netzwerkdienst (blockiert bis zum Beenden)"""
+    import uvicorn
+
+    class _Server(uvicorn.Server):
+        def handle_exit(self, sig: int, frame: Any) -> None:
+            # Readiness sofort aus; uvicorn schliesst den Listener und wartet auf laufende Requests
+            lifecycle.LIFECYCLE.begin_drain()
+            super().handle_exit(sig, frame)
+
+    lifecycle.restore_state()
+    app = build_app(server, transport)
+    path = MCP_PATH if transport == "http" else SSE_PATH
+    logger.info("MCP Server lauscht", extra={'transport': transport, 'url': f"http://{host}:{port}{path}",
+                                              'session_concurrency': SESSION_CONCURRENCY})
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="on",
+                            timeout_graceful_shutdown=lifecycle.SHUTDOWN_TIMEOUT)
+    await _Server(config).serve()
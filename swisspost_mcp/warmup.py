@@ -0,0 +1,271 @@
+"""
+Cache-Warm-up aus historischen Anfragen (Proxy-Logs, CSV, NDJSON)
+
+Nach einem Deploy ist der Autocomplete-Cache leer, und die ersten Stunden
+Verkehr zahlen die vollen Upstream-Kosten. Der Warm-up liest historische
+Eingaben, ermittelt die häufigsten PLZ, Orte, Strassen und Hausnummern und
+lädt deren `/zips`, `/streets` und `/houses` Antworten mit begrenzter
+Parallelität und Rate vorab in den Cache – mit genau den Parametern, die
+validate_smart später verwendet. Die Eingaben werden dazu wie in validate_smart
+normalisiert (AddressAnalyzer.normalize_input); `/houses` folgt in einer zweiten
+Runde mit dem Strassennamen aus der geladenen `/streets` Antwort.
+
+Quellen (Format nach Inhalt erkannt):
+- JSON-Logs des Proxys (SWISSPOST_LOG_FORMAT=json, Meldung "Adressvalidierung")
+- NDJSON mit einem Adress-Objekt pro Zeile (street, city, postcode)
+- CSV mit Kopfzeile (Trennzeichen , ; Tab)
+
+Konfiguration (Start von MCP Server bzw. Proxy):
+- SWISSPOST_WARMUP_FILES:        Kommagetrennte Quellen; leer = kein Warm-up
+- SWISSPOST_WARMUP_TOP:          Anzahl häufigster Einträge pro Endpoint (Standard: 500)
+- SWISSPOST_WARMUP_CONCURRENCY:  Gleichzeitige Upstream-Aufrufe (Standard: 4)
+- SWISSPOST_WARMUP_RATE:         Maximale Aufrufe pro Sekunde (Standard: 20, 0 = unbegrenzt)
+
+Kommandozeile:
+    python -m swisspost_mcp.warmup logs/proxy.log adressen.csv --top 1000 --dry-run
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from swisspost_mcp import metrics, scheduler
+from swisspost_mcp.log import get_logger
+
+logger = get_logger("warmup")
+
+ADDRESS_FIELDS = ("street", "street2", "city", "postcode")
+LOG_MESSAGE = "Adressvalidierung"
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+TOP = int(_env_number("SWISSPOST_WARMUP_TOP", 500))
+CONCURRENCY = max(1, int(_env_number("SWISSPOST_WARMUP_CONCURRENCY", 4)))
+RATE = _env_number("SWISSPOST_WARMUP_RATE", 20.0)
+
+WARMUP_REQUESTS = metrics.REGISTRY.counter(
+    "swisspost_warmup_requests_total",
+    "Warm-up Aufrufe nach Endpoint und Ergebnis (loaded, empty, cached, error)",
+    ("endpoint", "result"),
+)
+
+Request = Tuple[str, Dict[str, str]]
+
+
+def configured_sources() -> List[str]:
+    return [path.strip() for path in os.getenv("SWISSPOST_WARMUP_FILES", "").split(",") if path.strip()]
+
+
+def _address(record: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    if "msg" in record and record.get("msg") != LOG_MESSAGE:
+        return None
+    body = record.get("body") if isinstance(record.get("body"), dict) else record
+    address = {field: str(body[field]).strip() for field in ADDRESS_FIELDS if body.get(field)}
+    return address if address.get("postcode") else None
+
+
+def read_addresses(path: str) -> Iterator[Dict[str, str]]:
+    """Adressen aus einer Quelle; unlesbare Zeilen und fremde Logmeldungen werden übersprungen"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        head = f.readline()
+        f.seek(0)
+        if head.lstrip().startswith("{"):
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                address = _address(record) if isinstance(record, dict) else None
+                if address:
+                    yield address
+            return
+        try:
+            delimiter = csv.Sniffer().sniff(head, delimiters=",;\t|").delimiter
+        except csv.Error:
+            delimiter = ","
+        for row in csv.DictReader(f, delimiter=delimiter):
+            address = _address({(key or "").strip().lower(): value for key, value in row.items() if value})
+            if address:
+                yield address
+
+
+def plan(addresses: Iterable[Dict[str, str]], analyzer: Any, top: int = TOP) -> List[Request]:
+    """
+    Häufigste Lookups in der Form, in der validate_smart sie stellt (Eingabe über
+    `analyzer.normalize_input` und `expand_street_abbreviations` wie im Korrekturpfad):
+    /zips per PLZ und per Ort, /streets per (PLZ, Strasse), /houses per (PLZ, Strasse, Nummer).
+    Die Strasse der /houses Einträge ist die Eingabe; warm_agent ersetzt sie durch die
+    Schreibweise aus /streets. Reihenfolge: nach Häufigkeit, Endpoints abwechselnd.
+    """
+    zips: Counter = Counter()
+    streets: Counter = Counter()
+    houses: Counter = Counter()
+    for address in map(analyzer.normalize_input, addresses):
+        postcode = address["postcode"]
+        if not postcode:
+            continue
+        zips[postcode] += 1
+        if address["city"]:
+            zips[address["city"]] += 1
+        if address["street_name"]:
+            street_name = analyzer.expand_street_abbreviations(address["street_name"])
+            house_no = address["house_no"]
+            if street_name:
+                streets[(postcode, street_name)] += 1
+                if house_no:
+                    houses[(postcode, street_name, house_no)] += 1
+
+    groups = [
+        [("/zips", {"zipCity": value, "type": "DOMICILE"}) for value, _ in zips.most_common(top)],
+        [("/streets", {"zip": postcode, "name": name}) for (postcode, name), _ in streets.most_common(top)],
+        [("/houses", {"zip": postcode, "streetname": name, "number": number})
+         for (postcode, name, number), _ in houses.most_common(top)],
+    ]
+    requests: List[Request] = []
+    for index in range(max(len(group) for group in groups)):
+        requests.extend(group[index] for group in groups if index < len(group))
+    return requests
+
+
+class RateLimiter:
+    """Token-Bucket: höchstens `rate` Aufrufe pro Sekunde (0 = unbegrenzt)"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+async def run(requests: Sequence[Request], fetch: Callable[[str, Dict[str, str]], Awaitable[Optional[Dict]]],
+              is_cached: Callable[[str, Dict[str, str]], bool] = lambda endpoint, params: False,
+              concurrency: int = CONCURRENCY, rate: float = RATE) -> Dict[str, Any]:
+    """Führt den Warm-up aus (Priorität bulk); Fehler einzelner Aufrufe brechen ihn nicht ab"""
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    stats: Counter = Counter()
+    started = time.perf_counter()
+
+    async def one(endpoint: str, params: Dict[str, str]) -> None:
+        if is_cached(endpoint, params):
+            result = "cached"
+        else:
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    result = "loaded" if await fetch(endpoint, params) is not None else "empty"
+                except Exception as e:
+                    logger.debug("Warm-up %s %s fehlgeschlagen: %s", endpoint, params, e)
+                    result = "error"
+        stats[result] += 1
+        WARMUP_REQUESTS.inc(endpoint=endpoint, result=result)
+
+    tokens = scheduler.activate("bulk")
+    try:
+        await asyncio.gather(*(one(endpoint, params) for endpoint, params in requests))
+    finally:
+        scheduler.deactivate(tokens)
+    return {"requests": len(requests), **{key: stats[key] for key in ("loaded", "empty", "cached", "error")},
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+async def warm_agent(agent: Any, sources: Optional[Sequence[str]] = None, top: int = TOP,
+                     concurrency: int = CONCURRENCY, rate: float = RATE) -> Optional[Dict[str, Any]]:
+    """Warm-up für einen SmartAddressAgent (nutzt dessen _api_get und Strassen-Splitting)"""
+    from swisspost_mcp.cache import AUTOCOMPLETE_CACHE, make_key
+
+    sources = configured_sources() if sources is None else list(sources)
+    if not sources:
+        return None
+
+    def addresses() -> Iterator[Dict[str, str]]:
+        for path in sources:
+            try:
+                yield from read_addresses(path)
+            except OSError as e:
+                logger.warning("Warm-up Quelle nicht lesbar: %s (%s)", path, e)
+
+    def is_cached(endpoint: str, params: Dict[str, str]) -> bool:
+        return AUTOCOMPLETE_CACHE.contains(make_key(endpoint, params))
+
+    async def corrected_street(params: Dict[str, str]) -> Dict[str, str]:
+        # Wie Schritt 4/5 in validate_smart: /houses mit der Schreibweise aus /streets (nur aus dem Cache)
+        lookup = {"zip": params["zip"], "name": params["streetname"]}
+        if is_cached("/streets", lookup):
+            street = await agent.autocomplete_street(params["zip"], params["streetname"])
+            if street:
+                return dict(params, streetname=street)
+        return params
+
+    # Dateien lesen und auswerten ohne die Event-Loop zu blockieren (der MCP Server nimmt parallel Anfragen an)
+    requests = await asyncio.get_running_loop().run_in_executor(None, plan, addresses(), agent.analyzer, top)
+    logger.info("Cache-Warm-up gestartet", extra={'sources': sources, 'requests': len(requests)})
+    lookups = [request for request in requests if request[0] != "/houses"]
+    summary = await run(lookups, agent._api_get, is_cached=is_cached, concurrency=concurrency, rate=rate)
+    houses = [("/houses", await corrected_street(params)) for endpoint, params in requests if endpoint == "/houses"]
+    if houses:
+        second = await run(houses, agent._api_get, is_cached=is_cached, concurrency=concurrency, rate=rate)
+        summary = {key: round(summary[key] + second[key], 3) for key in summary}
+    logger.info("Cache-Warm-up abgeschlossen", extra=summary)
+    return summary
+
+
+def _load_agent_module():
+    import importlib.util
+
+    agent_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart-address-agent.py")
+    spec = importlib.util.spec_from_file_location("smart_address_agent", agent_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Autocomplete-Cache aus historischen Anfragen vorwärmen")
+    parser.add_argument("sources", nargs="+", help="Proxy-Logs (JSON), NDJSON oder CSV")
+    parser.add_argument("--top", type=int, default=TOP, help="Häufigste Einträge pro Endpoint")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE, help="Aufrufe pro Sekunde (0 = unbegrenzt)")
+    parser.add_argument("--dry-run", action="store_true", help="Nur den Plan ausgeben, keine Upstream-Aufrufe")
+    args = parser.parse_args(argv)
+
+    module = _load_agent_module()
+    if args.dry_run:
+        # Ohne Credentials möglich: nur der Analyzer wird gebraucht
+        addresses = (address for path in args.sources for address in read_addresses(path))
+        for endpoint, params in plan(addresses, module.AddressAnalyzer(), args.top):
+            print(endpoint, json.dumps(params, ensure_ascii=False))
+        return 0
+    summary = asyncio.run(warm_agent(module.SmartAddressAgent(), args.sources, args.top, args.concurrency, args.rate))
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
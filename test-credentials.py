@@ -14,7 +14,7 @@ from typing import Optional
 import httpx
 from dotenv import load_dotenv
 
-OAUTH_TOKEN_URL = "https://api.post.ch/OAuth/token"
+DEFAULT_OAUTH_TOKEN_URL = "https://api.post.ch/OAuth/token"
 
 
 def get_env(name: str) -> Optional[str]:
@@ -25,9 +25,11 @@ def get_env(name: str) -> Optional[str]:
 
 
 async def fetch_token(client_id: str, client_secret: str, scope: str) -> str:
+    # SWISSPOST_OAUTH_TOKEN_URL erlaubt den Test gegen den lokalen Mock-Server
+    token_url = get_env("SWISSPOST_OAUTH_TOKEN_URL") or DEFAULT_OAUTH_TOKEN_URL
     async with httpx.AsyncClient(timeout=15.0) as client:
         resp = await client.post(
-            OAUTH_TOKEN_URL,
+            token_url,
             data={
                 "grant_type": "client_credentials",
                 "client_id": client_id,
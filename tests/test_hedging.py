@@ -0,0 +1,86 @@
+"""Verhalten von Hedger.run: Schwelle, Budget und Fehlerweitergabe"""
+
+import asyncio
+import time
+
+import pytest
+
+from swisspost_mcp.hedging import MIN_SAMPLES, HedgeBudget, Hedger
+
+ENDPOINT = "/test"
+
+
+def make_hedger(ratio: float = 1.0, samples: int = MIN_SAMPLES, latency: float = 0.06) -> Hedger:
+    hedger = Hedger(enabled=True, budget=HedgeBudget(ratio))
+    for _ in range(samples):
+        hedger.window(ENDPOINT).observe(latency)
+    return hedger
+
+
+def recording_attempt(delays, results=None):
+    """Versuch `index` schläft delays[index] und liefert results[index] (Exception = Fehler)"""
+    calls = []
+
+    async def attempt(index: int):
+        calls.append((index, time.perf_counter()))
+        await asyncio.sleep(delays[index])
+        result = (results or ["primary", "hedge"])[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return attempt, calls
+
+
+def test_disabled_runs_single_attempt():
+    attempt, calls = recording_attempt([0.1])
+    assert asyncio.run(Hedger(enabled=False).run(ENDPOINT, attempt)) == "primary"
+    assert [index for index, _ in calls] == [0]
+
+
+def test_no_hedge_without_enough_samples():
+    hedger = make_hedger(samples=MIN_SAMPLES - 1)
+    attempt, calls = recording_attempt([0.2])
+    assert asyncio.run(hedger.run(ENDPOINT, attempt)) == "primary"
+    assert len(calls) == 1
+
+
+def test_no_hedge_below_threshold():
+    hedger = make_hedger()
+    attempt, calls = recording_attempt([0.01])
+    assert asyncio.run(hedger.run(ENDPOINT, attempt)) == "primary"
+    assert len(calls) == 1
+
+
+def test_hedge_sent_after_threshold_and_wins():
+    hedger = make_hedger()
+    threshold = hedger.window(ENDPOINT).threshold()
+    attempt, calls = recording_attempt([1.0, 0.01])
+    assert asyncio.run(hedger.run(ENDPOINT, attempt)) == "hedge"
+    assert [index for index, _ in calls] == [0, 1]
+    assert calls[1][1] - calls[0][1] >= threshold * 0.9
+
+
+def test_hedge_denied_when_budget_exhausted():
+    hedger = make_hedger(ratio=0.0)
+    attempt, calls = recording_attempt([0.2])
+    assert asyncio.run(hedger.run(ENDPOINT, attempt)) == "primary"
+    assert len(calls) == 1
+
+
+def test_budget_limits_hedges():
+    budget = HedgeBudget(ratio=0.5, reserve=1.0)
+    # Startguthaben 1 Hedge, danach ein Hedge pro zwei Aufrufe
+    assert budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_primary_error_wins_when_all_attempts_fail():
+    hedger = make_hedger()
+    attempt, calls = recording_attempt([0.15, 0.0], [ValueError("primary"), KeyError("hedge")])
+    with pytest.raises(ValueError):
+        asyncio.run(hedger.run(ENDPOINT, attempt))
+    assert len(calls) == 2
@@ -0,0 +1,96 @@
+"""Verhalten von RequestMemo.get_or_call: geteilte Aufrufe, Fehler und Abbruch des Besitzers"""
+
+import asyncio
+
+import pytest
+
+from swisspost_mcp.memo import RequestMemo
+
+PAYLOAD = {"street_name": "Bahnhofstrasse", "house_number": "1"}
+
+
+def counting_call(delay: float = 0.05, result=None, error: Exception = None):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result if result is not None else {"status": "success", "call": len(calls)}
+
+    return call, calls
+
+
+def test_identical_payload_is_called_once():
+    async def main():
+        memo = RequestMemo("validation_memo", "/addresses/validation")
+        call, calls = counting_call()
+        first = await memo.get_or_call(PAYLOAD, call)
+        # Schlüsselreihenfolge spielt keine Rolle
+        second = await memo.get_or_call(dict(reversed(list(PAYLOAD.items()))), call)
+        return first, second, calls, memo.avoided
+
+    first, second, calls, avoided = asyncio.run(main())
+    assert first is second
+    assert len(calls) == 1
+    assert avoided == 1
+
+
+def test_concurrent_callers_share_one_call():
+    async def main():
+        memo = RequestMemo("validation_memo", "/addresses/validation")
+        call, calls = counting_call()
+        results = await asyncio.gather(*(memo.get_or_call(PAYLOAD, call) for _ in range(3)))
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_results_rejected_by_keep_are_called_again():
+    async def main():
+        memo = RequestMemo("validation_memo", "/addresses/validation")
+        call, calls = counting_call(result={"status": "error"})
+        keep = lambda result: result.get("status") == "success"
+        await memo.get_or_call(PAYLOAD, call, keep=keep)
+        await memo.get_or_call(PAYLOAD, call, keep=keep)
+        return calls
+
+    assert len(asyncio.run(main())) == 2
+
+
+def test_error_reaches_waiters_and_is_not_kept():
+    async def main():
+        memo = RequestMemo("validation_memo", "/addresses/validation")
+        call, calls = counting_call(error=ConnectionError("down"))
+        results = await asyncio.gather(*(memo.get_or_call(PAYLOAD, call) for _ in range(2)), return_exceptions=True)
+        with pytest.raises(ConnectionError):
+            await memo.get_or_call(PAYLOAD, call)
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert len(calls) == 2
+
+
+def test_waiter_takes_over_when_owner_is_cancelled():
+    async def main():
+        memo = RequestMemo("validation_memo", "/addresses/validation")
+        call, calls = counting_call(delay=0.1)
+        owner = asyncio.ensure_future(memo.get_or_call(PAYLOAD, call))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.ensure_future(memo.get_or_call(PAYLOAD, call)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    # Der Besitzer-Aufruf wurde abgebrochen, genau ein Wartender hat neu aufgerufen
+    assert len(calls) == 2
+    assert results[0] is results[1]
+    assert results[0]["call"] == 2
@@ -0,0 +1,107 @@
+"""Verhalten des PriorityScheduler: Vergabe, Deadlines und Aufräumen abgebrochener Warter"""
+
+import asyncio
+import time
+
+import pytest
+
+from swisspost_mcp import scheduler
+from swisspost_mcp.scheduler import DeadlineExceeded, PriorityScheduler
+
+
+def make_scheduler(max_concurrency: int = 1, max_wait: float = 5.0) -> PriorityScheduler:
+    return PriorityScheduler(
+        max_concurrency=max_concurrency,
+        shares={name: 1.0 for name in scheduler.PRIORITIES},
+        max_wait={name: max_wait for name in scheduler.PRIORITIES},
+    )
+
+
+def queued(sched: PriorityScheduler, priority: str) -> int:
+    return sched.snapshot()[priority]["queued"]
+
+
+def test_slot_is_released_after_use():
+    async def main():
+        sched = make_scheduler()
+        async with sched.slot("normal"):
+            busy = sched.snapshot()["normal"]["in_flight"]
+        return busy, sched.snapshot()["normal"]["in_flight"]
+
+    assert asyncio.run(main()) == (1, 0)
+
+
+def test_higher_weight_class_is_served_first():
+    async def main():
+        sched = make_scheduler()
+        order = []
+        await sched.acquire("normal")
+
+        async def waiter(priority: str):
+            await sched.acquire(priority)
+            order.append(priority)
+            sched.release(priority)
+
+        tasks = [asyncio.ensure_future(waiter(name)) for name in ("bulk", "interactive")]
+        await asyncio.sleep(0.01)
+        sched.release("normal")
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(main()) == ["interactive", "bulk"]
+
+
+def test_cancelled_waiter_is_removed_immediately():
+    async def main():
+        sched = make_scheduler()
+        await sched.acquire("normal")
+        depth_before = scheduler.QUEUE_DEPTH.get(priority="normal")
+        waiter = asyncio.ensure_future(sched.acquire("normal"))
+        await asyncio.sleep(0.01)
+        waiting = queued(sched, "normal")
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return waiting, queued(sched, "normal"), scheduler.QUEUE_DEPTH.get(priority="normal") - depth_before
+
+    assert asyncio.run(main()) == (1, 0, 0)
+
+
+def test_timed_out_waiter_is_removed_and_raises():
+    async def main():
+        sched = make_scheduler(max_wait=0.05)
+        await sched.acquire("bulk")
+        depth_before = scheduler.QUEUE_DEPTH.get(priority="bulk")
+        with pytest.raises(DeadlineExceeded):
+            await sched.acquire("bulk")
+        return queued(sched, "bulk"), scheduler.QUEUE_DEPTH.get(priority="bulk") - depth_before
+
+    assert asyncio.run(main()) == (0, 0)
+
+
+def test_expired_request_deadline_is_rejected_without_queueing():
+    async def main():
+        sched = make_scheduler()
+        await sched.acquire("normal")
+        with pytest.raises(DeadlineExceeded):
+            await sched.acquire("normal", deadline=time.monotonic() - 1.0)
+        return queued(sched, "normal")
+
+    assert asyncio.run(main()) == 0
+
+
+def test_slot_freed_by_cancelled_waiter_goes_to_next():
+    async def main():
+        sched = make_scheduler()
+        await sched.acquire("normal")
+        first = asyncio.ensure_future(sched.acquire("normal"))
+        second = asyncio.ensure_future(sched.acquire("normal"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        sched.release("normal")
+        granted = await asyncio.wait_for(second, timeout=1.0)
+        return granted, sched.snapshot()["normal"]
+
+    granted, state = asyncio.run(main())
+    assert granted == "normal"
+    assert state == {"queued": 0, "in_flight": 1}